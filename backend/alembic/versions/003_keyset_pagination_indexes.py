@@ -0,0 +1,67 @@
+"""Add composite indexes for keyset pagination of transactions and cases.
+
+Revision ID: 003_keyset_pagination_indexes
+Revises: 002_timescaledb_hypertables
+Create Date: 2026-10-19 00:00:00.000000
+
+On a hypertable the transactions indexes are built one chunk per
+transaction (as in 005) so the whole table is never locked while they build.
+"""
+from alembic import op
+from sqlalchemy import text
+
+
+# revision identifiers, used by Alembic.
+revision = "003_keyset_pagination_indexes"
+down_revision = "002_timescaledb_hypertables"
+branch_labels = None
+depends_on = None
+
+
+def _is_hypertable(table: str) -> bool:
+    connection = op.get_bind()
+    has_timescale = connection.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'timescaledb');"
+    )).scalar()
+    if not has_timescale:
+        return False
+    return connection.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM timescaledb_information.hypertables "
+        "WHERE hypertable_name = :table);"
+    ), {"table": table}).scalar()
+
+
+def _create_index(name: str, table: str, columns: str) -> None:
+    if _is_hypertable(table):
+        # transaction_per_chunk cannot run inside a transaction block
+        with op.get_context().autocommit_block():
+            op.execute(
+                f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"
+                f" WITH (timescaledb.transaction_per_chunk);"
+            )
+    else:
+        op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns});")
+
+
+def upgrade() -> None:
+    """Create (sort key, id) indexes used by cursor pagination."""
+    _create_index("ix_transactions_timestamp_id", "transactions", '"timestamp", id')
+    _create_index("ix_transactions_merchant_timestamp_id", "transactions", 'merchant_id, "timestamp", id')
+    _create_index("ix_transactions_customer_timestamp_id", "transactions", 'customer_id, "timestamp", id')
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_cases_created_at_id "
+        "ON cases (created_at, id);"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_cases_status_created_at_id "
+        "ON cases (status, created_at, id);"
+    )
+
+
+def downgrade() -> None:
+    """Drop keyset pagination indexes."""
+    op.execute("DROP INDEX IF EXISTS ix_cases_status_created_at_id;")
+    op.execute("DROP INDEX IF EXISTS ix_cases_created_at_id;")
+    op.execute("DROP INDEX IF EXISTS ix_transactions_customer_timestamp_id;")
+    op.execute("DROP INDEX IF EXISTS ix_transactions_merchant_timestamp_id;")
+    op.execute("DROP INDEX IF EXISTS ix_transactions_timestamp_id;")
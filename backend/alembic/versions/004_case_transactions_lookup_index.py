@@ -0,0 +1,27 @@
+"""Index case_transactions.transaction_id for flagged semi-joins.
+
+Revision ID: 004_case_transactions_lookup_index
+Revises: 003_keyset_pagination_indexes
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "004_case_transactions_lookup_index"
+down_revision = "003_keyset_pagination_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Support EXISTS / NOT EXISTS probes from transactions into case links."""
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_case_transactions_transaction_id "
+        "ON case_transactions (transaction_id);"
+    )
+
+
+def downgrade() -> None:
+    """Drop the case link lookup index."""
+    op.execute("DROP INDEX IF EXISTS ix_case_transactions_transaction_id;")
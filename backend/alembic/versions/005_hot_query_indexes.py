@@ -0,0 +1,74 @@
+"""Composite and partial indexes for the hot query paths.
+
+Revision ID: 005_hot_query_indexes
+Revises: 004_case_transactions_lookup_index
+Create Date: 2026-10-19 00:00:00.000000
+
+Hot queries and the index serving each one:
+- velocity / previous-transaction (customer_id = ? AND timestamp range):
+  ix_transactions_customer_timestamp_id from 003, scanned backwards for DESC
+- per-device history: ix_transactions_device_timestamp
+- per-account history: ix_transactions_account_timestamp
+- dashboard high-risk join: ix_scores_high_risk_transaction_id (partial)
+- case link probes: ix_case_transactions_transaction_id from 004
+
+On TimescaleDB hypertables every index is local to each chunk, so each index
+leads with the filter column and carries the time column, letting the planner
+exclude chunks by time and then seek within the remaining ones. Hypertable
+indexes are built one chunk per transaction to avoid locking the whole table.
+"""
+from alembic import op
+from sqlalchemy import text
+
+
+# revision identifiers, used by Alembic.
+revision = "005_hot_query_indexes"
+down_revision = "004_case_transactions_lookup_index"
+branch_labels = None
+depends_on = None
+
+
+def _is_hypertable(table: str) -> bool:
+    connection = op.get_bind()
+    has_timescale = connection.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'timescaledb');"
+    )).scalar()
+    if not has_timescale:
+        return False
+    return connection.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM timescaledb_information.hypertables "
+        "WHERE hypertable_name = :table);"
+    ), {"table": table}).scalar()
+
+
+def _create_index(name: str, table: str, columns: str, where: str = "") -> None:
+    where_clause = f" WHERE {where}" if where else ""
+    if _is_hypertable(table):
+        # transaction_per_chunk cannot run inside a transaction block
+        with op.get_context().autocommit_block():
+            op.execute(
+                f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"
+                f" WITH (timescaledb.transaction_per_chunk){where_clause};"
+            )
+    else:
+        op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns}){where_clause};")
+
+
+def upgrade() -> None:
+    """Create composite (filter, time) and partial high-risk indexes."""
+    _create_index("ix_transactions_device_timestamp", "transactions", 'device_id, "timestamp" DESC')
+    _create_index("ix_transactions_account_timestamp", "transactions", 'account_id, "timestamp" DESC')
+    # SQLAlchemy's Enum type stores member names, hence the upper-case literals
+    _create_index(
+        "ix_scores_high_risk_transaction_id",
+        "scores",
+        "transaction_id",
+        where="risk_level IN ('HIGH', 'CRITICAL')",
+    )
+
+
+def downgrade() -> None:
+    """Drop the hot query indexes."""
+    op.execute("DROP INDEX IF EXISTS ix_scores_high_risk_transaction_id;")
+    op.execute("DROP INDEX IF EXISTS ix_transactions_account_timestamp;")
+    op.execute("DROP INDEX IF EXISTS ix_transactions_device_timestamp;")
@@ -0,0 +1,127 @@
+"""Copy risk_level, anomaly_score and decision from scores onto transactions.
+
+Revision ID: 006_denormalize_transaction_scores
+Revises: 005_hot_query_indexes
+Create Date: 2026-10-19 00:00:00.000000
+
+Dashboard and time-series aggregations filter on risk level for every row in
+a time range; reading it from the transactions hypertable avoids a join (or a
+correlated EXISTS) into scores, which lost its foreign key in 002.
+
+The backfill walks transactions in id ranges and commits after each batch so
+a large table is never locked or rewritten in one transaction. It only fills
+rows that are still NULL, so an interrupted run can simply be repeated.
+When a transaction has been scored more than once, the latest score (highest
+scores.id) wins, as it does when scoring overwrites the columns.
+
+TimescaleDB before 2.11 cannot UPDATE rows in compressed chunks. On those
+versions the transactions compression policy is paused and compressed chunks
+are decompressed (one per commit) before the backfill; the policy, resumed
+afterwards, compresses them again on its next run.
+"""
+import re
+from alembic import op
+from sqlalchemy import text
+
+
+# revision identifiers, used by Alembic.
+revision = "006_denormalize_transaction_scores"
+down_revision = "005_hot_query_indexes"
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 50000
+# First TimescaleDB release that supports UPDATE on compressed chunks
+UPDATE_COMPRESSED_MIN_VERSION = (2, 11)
+
+
+def _timescale_version():
+    value = op.get_bind().execute(text(
+        "SELECT extversion FROM pg_extension WHERE extname = 'timescaledb';"
+    )).scalar()
+    if not value:
+        return None
+    return tuple(int(part) for part in re.findall(r"\d+", value)[:2])
+
+
+def _set_compression_policy_scheduled(scheduled: bool) -> None:
+    op.get_bind().execute(text(
+        "SELECT alter_job(job_id, scheduled => :scheduled) FROM timescaledb_information.jobs "
+        "WHERE proc_name = 'policy_compression' AND hypertable_name = 'transactions';"
+    ), {"scheduled": scheduled})
+
+
+def _decompress_chunks() -> None:
+    connection = op.get_bind()
+    chunks = [row[0] for row in connection.execute(text(
+        "SELECT format('%I.%I', chunk_schema, chunk_name) FROM timescaledb_information.chunks "
+        "WHERE hypertable_name = 'transactions' AND is_compressed;"
+    ))]
+    for chunk in chunks:
+        connection.execute(
+            text("SELECT decompress_chunk(CAST(:chunk AS regclass), if_compressed => TRUE);"),
+            {"chunk": chunk},
+        )
+
+
+def _backfill() -> None:
+    connection = op.get_bind()
+    bounds = connection.execute(text("SELECT MIN(id), MAX(id) FROM transactions;")).first()
+    if bounds is None or bounds[0] is None:
+        return
+    low, high = bounds
+    version = _timescale_version()
+    decompress = version is not None and version < UPDATE_COMPRESSED_MIN_VERSION
+    # Each batch commits on its own
+    with op.get_context().autocommit_block():
+        if decompress:
+            _set_compression_policy_scheduled(False)
+        try:
+            if decompress:
+                _decompress_chunks()
+            for start in range(low, high + 1, BACKFILL_BATCH_SIZE):
+                connection.execute(text(
+                    """
+                    UPDATE transactions t
+                    SET risk_level = s.risk_level,
+                        anomaly_score = s.anomaly_score,
+                        decision = s.decision
+                    FROM (
+                        SELECT DISTINCT ON (transaction_id)
+                            transaction_id, risk_level, anomaly_score, decision
+                        FROM scores
+                        WHERE transaction_id >= :start AND transaction_id < :stop
+                        ORDER BY transaction_id, id DESC
+                    ) s
+                    WHERE s.transaction_id = t.id
+                      AND t.id >= :start AND t.id < :stop
+                      AND t.risk_level IS NULL;
+                    """
+                ), {"start": start, "stop": start + BACKFILL_BATCH_SIZE})
+        finally:
+            if decompress:
+                _set_compression_policy_scheduled(True)
+
+
+def upgrade() -> None:
+    """Add denormalized score columns, backfill them, then index risk level."""
+    # The risklevel enum type already exists for scores.risk_level
+    op.execute("ALTER TABLE transactions ADD COLUMN IF NOT EXISTS risk_level risklevel;")
+    op.execute("ALTER TABLE transactions ADD COLUMN IF NOT EXISTS anomaly_score DOUBLE PRECISION;")
+    op.execute("ALTER TABLE transactions ADD COLUMN IF NOT EXISTS decision VARCHAR;")
+
+    _backfill()
+
+    # Built after the backfill so the batches do not maintain the index
+    op.execute(
+        'CREATE INDEX IF NOT EXISTS ix_transactions_risk_level_timestamp '
+        'ON transactions (risk_level, "timestamp");'
+    )
+
+
+def downgrade() -> None:
+    """Drop the denormalized score columns."""
+    op.execute("DROP INDEX IF EXISTS ix_transactions_risk_level_timestamp;")
+    op.execute("ALTER TABLE transactions DROP COLUMN IF EXISTS decision;")
+    op.execute("ALTER TABLE transactions DROP COLUMN IF EXISTS anomaly_score;")
+    op.execute("ALTER TABLE transactions DROP COLUMN IF EXISTS risk_level;")
@@ -0,0 +1,84 @@
+"""Continuous aggregates for dashboard transaction time series.
+
+Revision ID: 007_transaction_continuous_aggregates
+Revises: 006_denormalize_transaction_scores
+Create Date: 2026-10-19 00:00:00.000000
+
+Creates transactions_15m, transactions_1h and transactions_1d (total and
+high-risk counts per bucket) with refresh policies. The views are
+materialized-only: the API reads closed buckets from them and counts the open
+bucket from raw rows itself. Skipped when transactions is not a hypertable.
+"""
+from alembic import op
+from sqlalchemy import text
+
+
+# revision identifiers, used by Alembic.
+revision = "007_transaction_continuous_aggregates"
+down_revision = "006_denormalize_transaction_scores"
+branch_labels = None
+depends_on = None
+
+# (view, bucket width, policy start_offset, end_offset, schedule_interval)
+# start_offset covers the longest dashboard window (7 days) plus a bucket;
+# end_offset of one bucket keeps the open bucket out of the materialization.
+AGGREGATES = [
+    ("transactions_15m", "15 minutes", "8 days", "15 minutes", "5 minutes"),
+    ("transactions_1h", "1 hour", "8 days", "1 hour", "15 minutes"),
+    ("transactions_1d", "1 day", "9 days", "1 day", "1 hour"),
+]
+
+
+def _is_hypertable(table: str) -> bool:
+    connection = op.get_bind()
+    has_timescale = connection.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'timescaledb');"
+    )).scalar()
+    if not has_timescale:
+        return False
+    return connection.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM timescaledb_information.hypertables "
+        "WHERE hypertable_name = :table);"
+    ), {"table": table}).scalar()
+
+
+def upgrade() -> None:
+    """Create the continuous aggregates and their refresh policies."""
+    if not _is_hypertable("transactions"):
+        return
+
+    for view, width, start_offset, end_offset, schedule in AGGREGATES:
+        op.execute(f"""
+            CREATE MATERIALIZED VIEW IF NOT EXISTS {view}
+            WITH (timescaledb.continuous, timescaledb.materialized_only = true) AS
+            SELECT
+                time_bucket(INTERVAL '{width}', "timestamp") AS bucket,
+                COUNT(*) AS total,
+                COUNT(*) FILTER (WHERE risk_level IN ('HIGH', 'CRITICAL')) AS high_risk
+            FROM transactions
+            GROUP BY bucket
+            WITH NO DATA;
+        """)
+        op.execute(f"""
+            SELECT add_continuous_aggregate_policy('{view}',
+                start_offset => INTERVAL '{start_offset}',
+                end_offset => INTERVAL '{end_offset}',
+                schedule_interval => INTERVAL '{schedule}',
+                if_not_exists => TRUE
+            );
+        """)
+
+    # Materialize the dashboard window now rather than waiting for the policies;
+    # refresh_continuous_aggregate cannot run inside a transaction block.
+    with op.get_context().autocommit_block():
+        for view, width, start_offset, end_offset, _ in AGGREGATES:
+            op.execute(
+                f"CALL refresh_continuous_aggregate('{view}', "
+                f"NOW() - INTERVAL '{start_offset}', NOW() - INTERVAL '{end_offset}');"
+            )
+
+
+def downgrade() -> None:
+    """Drop the continuous aggregates (their policies are dropped with them)."""
+    for view, *_ in reversed(AGGREGATES):
+        op.execute(f"DROP MATERIALIZED VIEW IF EXISTS {view};")
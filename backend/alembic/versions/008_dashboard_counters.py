@@ -0,0 +1,37 @@
+"""Add metric_counters for incrementally maintained dashboard KPIs.
+
+Revision ID: 008_dashboard_counters
+Revises: 007_transaction_continuous_aggregates
+Create Date: 2026-10-19 00:00:00.000000
+
+Rows start empty; the application's reconciler fills them from the source
+tables on startup and keeps correcting drift afterwards.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "008_dashboard_counters"
+down_revision = "007_transaction_continuous_aggregates"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Create the counters table keyed by (scope, key)."""
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS metric_counters (
+            scope VARCHAR NOT NULL,
+            key VARCHAR NOT NULL,
+            value BIGINT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT NOW(),
+            PRIMARY KEY (scope, key)
+        );
+        """
+    )
+
+
+def downgrade() -> None:
+    """Drop the counters table."""
+    op.execute("DROP TABLE IF EXISTS metric_counters;")
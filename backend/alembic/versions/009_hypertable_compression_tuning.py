@@ -0,0 +1,114 @@
+"""Tune hypertable compression settings and chunk intervals.
+
+Revision ID: 009_hypertable_compression_tuning
+Revises: 008_dashboard_counters
+Create Date: 2026-10-19 00:00:00.000000
+
+Migration 002 segmented compressed transactions by transaction_id, which is
+unique per row: every compressed batch held a single row, so compression saved
+almost nothing and per-customer lookups had to decompress everything in range.
+Segmenting by customer_id groups each customer's rows into one batch ordered by
+time, which both compresses well and lets a customer lookup decompress only
+that customer's segment. transaction_id stays in the orderby because the
+unique (transaction_id, timestamp) index must be covered by the compression
+columns.
+
+Chunk intervals: a chunk including its indexes should fit in roughly a quarter
+of shared memory while hot. At our ingest rate a day of transactions is well
+within that, and daily chunks also line up with the dashboard's "today" range
+and with the 15m/1h/1d continuous aggregates. audit_log is far lower volume and
+keeps weekly chunks. New intervals apply to chunks created from now on.
+
+Compression settings cannot change while compressed chunks exist, and
+decompressing them all here would hold one transaction over the whole
+history. A table that already has compressed chunks keeps its old settings
+and a warning is logged; scripts/recompress_chunks.py then decompresses,
+re-tunes and recompresses it one chunk per transaction. Chunk intervals and
+policies are updated either way.
+"""
+import logging
+from alembic import op
+from sqlalchemy import text
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+
+# revision identifiers, used by Alembic.
+revision = "009_hypertable_compression_tuning"
+down_revision = "008_dashboard_counters"
+branch_labels = None
+depends_on = None
+
+# table -> (segmentby, orderby, chunk interval, compress after)
+COMPRESSION_SETTINGS = {
+    "transactions": ("customer_id", '"timestamp" DESC, transaction_id', "1 day", "30 days"),
+    "audit_log": ("actor_id", "created_at DESC", "7 days", "90 days"),
+    # scores is not a hypertable today; tuned here if it is ever converted
+    "scores": ("risk_level", "created_at DESC", "1 day", "30 days"),
+}
+
+PREVIOUS_SETTINGS = {
+    "transactions": ("transaction_id", '"timestamp" DESC', "7 days", "30 days"),
+    "audit_log": ("actor_id", "created_at DESC", "7 days", "90 days"),
+    "scores": (None, None, "7 days", None),
+}
+
+
+def _is_hypertable(table: str) -> bool:
+    connection = op.get_bind()
+    has_timescale = connection.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'timescaledb');"
+    )).scalar()
+    if not has_timescale:
+        return False
+    return connection.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM timescaledb_information.hypertables "
+        "WHERE hypertable_name = :table);"
+    ), {"table": table}).scalar()
+
+
+def _has_compressed_chunks(table: str) -> bool:
+    return op.get_bind().execute(text(
+        "SELECT EXISTS (SELECT 1 FROM timescaledb_information.chunks "
+        "WHERE hypertable_name = :table AND is_compressed);"
+    ), {"table": table}).scalar()
+
+
+def _apply(table: str, segmentby, orderby, chunk_interval: str, compress_after) -> None:
+    retune = not _has_compressed_chunks(table)
+    if not retune:
+        logger.warning(
+            f"{table} has compressed chunks; compression settings left unchanged. "
+            f"Run scripts/recompress_chunks.py --table {table} to apply them."
+        )
+    if segmentby:
+        if retune:
+            op.execute(
+                f"ALTER TABLE {table} SET ("
+                f"timescaledb.compress, "
+                f"timescaledb.compress_segmentby = '{segmentby}', "
+                f"timescaledb.compress_orderby = '{orderby}');"
+            )
+        op.execute(
+            f"SELECT add_compression_policy('{table}', INTERVAL '{compress_after}', "
+            f"if_not_exists => TRUE);"
+        )
+    else:
+        op.execute(f"SELECT remove_compression_policy('{table}', if_exists => TRUE);")
+        if retune:
+            op.execute(f"ALTER TABLE {table} SET (timescaledb.compress = false);")
+    op.execute(f"SELECT set_chunk_time_interval('{table}', INTERVAL '{chunk_interval}');")
+
+
+def upgrade() -> None:
+    """Segment compression by the common lookup key and resize chunks."""
+    for table, table_settings in COMPRESSION_SETTINGS.items():
+        if _is_hypertable(table):
+            _apply(table, *table_settings)
+
+
+def downgrade() -> None:
+    """Restore the compression settings and chunk intervals from 002."""
+    for table, table_settings in PREVIOUS_SETTINGS.items():
+        if _is_hypertable(table):
+            _apply(table, *table_settings)
@@ -0,0 +1,208 @@
+"""Native monthly range partitioning when TimescaleDB is unavailable.
+
+Revision ID: 010_native_partitioning
+Revises: 009_hypertable_compression_tuning
+Create Date: 2026-10-19 00:00:00.000000
+
+Runs only with TIMESERIES_BACKEND=partitioned (managed PostgreSQL without the
+timescaledb extension). transactions and audit_log are rebuilt as
+PARTITION BY RANGE tables on their time column with one partition per month,
+so time-bounded queries (dashboard ranges, velocity windows, exports) are
+pruned to the months they touch and old months can be detached or dropped
+whole.
+
+As with the hypertable conversion in 002, primary keys and unique constraints
+must include the partition key: the primary key becomes (id, time) and the
+transaction_id uniqueness moves to (transaction_id, "timestamp"). The
+foreign keys from scores and case_transactions are dropped for the same
+reason.
+
+The table is swapped for its new definition in the migration transaction,
+then rows are copied from the old one in id ranges that each commit, as in
+006, so no single statement or transaction spans the whole table. Until the
+copy finishes, reads see only part of the history; schedule it in a
+maintenance window. If the copy is interrupted, running the migration again
+resumes it (already-copied rows are skipped). Partitions up
+to PARTITION_MONTHS_AHEAD months ahead are created here, later ones by the
+partition maintainer at application startup; a DEFAULT partition catches
+anything outside the created ranges.
+
+001 and 002 require the timescaledb extension and are not changed for this
+backend. On a fresh database without it, stamp past them first:
+
+    alembic stamp 002_timescaledb_hypertables
+    alembic upgrade head
+"""
+import re
+from datetime import date, datetime
+from alembic import op
+from sqlalchemy import text
+from app.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision = "010_native_partitioning"
+down_revision = "009_hypertable_compression_tuning"
+branch_labels = None
+depends_on = None
+
+# table -> partition key
+PARTITIONED_TABLES = {
+    "transactions": "timestamp",
+    "audit_log": "created_at",
+}
+
+COPY_BATCH_SIZE = 50000
+
+
+def _add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _table_exists(table: str) -> bool:
+    return op.get_bind().execute(text(
+        "SELECT EXISTS (SELECT 1 FROM information_schema.tables "
+        "WHERE table_schema = 'public' AND table_name = :table);"
+    ), {"table": table}).scalar()
+
+
+def _is_partitioned(table: str) -> bool:
+    return op.get_bind().execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p "
+        "JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = :table);"
+    ), {"table": table}).scalar()
+
+
+def _is_hypertable(table: str) -> bool:
+    connection = op.get_bind()
+    has_timescale = connection.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'timescaledb');"
+    )).scalar()
+    if not has_timescale:
+        return False
+    return connection.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM timescaledb_information.hypertables "
+        "WHERE hypertable_name = :table);"
+    ), {"table": table}).scalar()
+
+
+def _secondary_indexes(source: str, table: str, time_column: str):
+    """CREATE INDEX statements recreating ``source``'s non-primary-key indexes on ``table``.
+
+    Unique indexes whose key columns (``pg_index.indkey``) do not include the
+    partition key cannot exist on a partitioned table; they are recreated as
+    plain indexes.
+    """
+    rows = op.get_bind().execute(text(
+        "SELECT pg_get_indexdef(i.indexrelid), i.indisunique, "
+        "a.attnum = ANY((i.indkey::int2[])[0:i.indnkeyatts - 1]) "
+        "FROM pg_index i "
+        "JOIN pg_class t ON t.oid = i.indrelid "
+        "JOIN pg_namespace n ON n.oid = t.relnamespace "
+        "JOIN pg_attribute a ON a.attrelid = t.oid AND a.attname = :column "
+        "WHERE n.nspname = 'public' AND t.relname = :table AND NOT i.indisprimary;"
+    ), {"table": source, "column": time_column}).all()
+    on_source = re.compile(rf" ON (?:public\.)?{re.escape(source)} ")
+    statements = []
+    for indexdef, unique, has_time_column in rows:
+        if unique and not has_time_column:
+            indexdef = indexdef.replace("CREATE UNIQUE INDEX", "CREATE INDEX", 1)
+        statements.append(on_source.sub(f" ON {table} ", indexdef, count=1))
+    return statements
+
+
+def _swap_in(table: str, time_column: str, partitioned: bool) -> None:
+    """Rename ``table`` aside and create its empty partitioned (or plain) replacement."""
+    connection = op.get_bind()
+    legacy = f"{table}_legacy"
+
+    op.execute(f'UPDATE {table} SET "{time_column}" = NOW() WHERE "{time_column}" IS NULL;')
+    op.execute(f'ALTER TABLE {table} ALTER COLUMN "{time_column}" SET NOT NULL;')
+    if table == "transactions":
+        op.execute("ALTER TABLE IF EXISTS scores DROP CONSTRAINT IF EXISTS scores_transaction_id_fkey;")
+        op.execute("ALTER TABLE IF EXISTS case_transactions DROP CONSTRAINT IF EXISTS case_transactions_transaction_id_fkey;")
+
+    op.execute(f"ALTER TABLE {table} RENAME TO {legacy};")
+    if partitioned:
+        op.execute(
+            f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+            f'PARTITION BY RANGE ("{time_column}");'
+        )
+        op.execute(f'ALTER TABLE {table} ADD PRIMARY KEY (id, "{time_column}");')
+
+        oldest = connection.execute(text(f'SELECT MIN("{time_column}") FROM {legacy};')).scalar()
+        today = datetime.utcnow().date()
+        month = date((oldest or today).year, (oldest or today).month, 1)
+        last = _add_months(date(today.year, today.month, 1), settings.partition_months_ahead)
+        while month <= last:
+            upper = _add_months(month, 1)
+            op.execute(
+                f"CREATE TABLE {table}_p{month:%Y_%m} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}');"
+            )
+            month = upper
+        op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT;")
+    else:
+        op.execute(f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING CONSTRAINTS);")
+        op.execute(f"ALTER TABLE {table} ADD PRIMARY KEY (id);")
+
+
+def _copy_rows(table: str) -> None:
+    """Copy ``{table}_legacy`` into ``table`` in id ranges, committing after each."""
+    connection = op.get_bind()
+    legacy = f"{table}_legacy"
+    bounds = connection.execute(text(f"SELECT MIN(id), MAX(id) FROM {legacy};")).first()
+    if bounds is None or bounds[0] is None:
+        return
+    low, high = bounds
+    # Each batch commits on its own; rows copied by an interrupted run are skipped
+    with op.get_context().autocommit_block():
+        for start in range(low, high + 1, COPY_BATCH_SIZE):
+            connection.execute(text(
+                f"INSERT INTO {table} SELECT * FROM {legacy} "
+                f"WHERE id >= :start AND id < :stop ON CONFLICT DO NOTHING;"
+            ), {"start": start, "stop": start + COPY_BATCH_SIZE})
+
+
+def _rebuild(table: str, time_column: str, partitioned: bool) -> None:
+    """Copy ``table`` into a new partitioned (or plain) table and swap it in.
+
+    Resumes the copy when ``{table}_legacy`` is left over from an interrupted run.
+    """
+    connection = op.get_bind()
+    legacy = f"{table}_legacy"
+    if not _table_exists(legacy):
+        _swap_in(table, time_column, partitioned)
+    _copy_rows(table)
+
+    indexes = _secondary_indexes(legacy, table, time_column)
+    sequence = connection.execute(text("SELECT pg_get_serial_sequence(:table, 'id');"), {"table": legacy}).scalar()
+    if sequence:
+        op.execute(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id;")
+    op.execute(f"DROP TABLE {legacy};")
+    for indexdef in indexes:
+        op.execute(indexdef + ";")
+    if table == "transactions":
+        op.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS ux_transactions_transaction_id_timestamp "
+            'ON transactions (transaction_id, "timestamp");'
+        )
+    op.execute(f"ANALYZE {table};")
+
+
+def upgrade() -> None:
+    """Rebuild transactions and audit_log as monthly range-partitioned tables."""
+    if settings.timeseries_backend != "partitioned":
+        return
+    for table, time_column in PARTITIONED_TABLES.items():
+        interrupted = _table_exists(f"{table}_legacy")
+        if interrupted or (_table_exists(table) and not _is_partitioned(table) and not _is_hypertable(table)):
+            _rebuild(table, time_column, partitioned=True)
+
+
+def downgrade() -> None:
+    """Rebuild partitioned transactions and audit_log as plain tables."""
+    for table, time_column in PARTITIONED_TABLES.items():
+        if _table_exists(f"{table}_legacy") or (_table_exists(table) and _is_partitioned(table)):
+            _rebuild(table, time_column, partitioned=False)
@@ -0,0 +1,28 @@
+"""Drop the single-column transactions timestamp index.
+
+Revision ID: 011_drop_redundant_timestamp_index
+Revises: 010_native_partitioning
+Create Date: 2026-10-19 00:00:00.000000
+
+ix_transactions_timestamp is a prefix of ix_transactions_timestamp_id (003),
+which serves every time-range scan it did, so it only costs writes and
+memory.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "011_drop_redundant_timestamp_index"
+down_revision = "010_native_partitioning"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Drop ix_transactions_timestamp."""
+    op.execute("DROP INDEX IF EXISTS ix_transactions_timestamp;")
+
+
+def downgrade() -> None:
+    """Recreate ix_transactions_timestamp."""
+    op.execute('CREATE INDEX IF NOT EXISTS ix_transactions_timestamp ON transactions ("timestamp");')
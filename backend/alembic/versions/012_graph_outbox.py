@@ -0,0 +1,44 @@
+"""Add graph_outbox for transactional Neo4j writes.
+
+Revision ID: 012_graph_outbox
+Revises: 011_drop_redundant_timestamp_index
+Create Date: 2026-10-19 00:00:00.000000
+
+Entity and link changes record their pending graph writes here in the same
+transaction; the outbox relay applies them to Neo4j and retries with backoff.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "012_graph_outbox"
+down_revision = "011_drop_redundant_timestamp_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Create the outbox table and the index the relay polls on."""
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS graph_outbox (
+            id SERIAL PRIMARY KEY,
+            event_type VARCHAR NOT NULL,
+            payload JSON NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT,
+            next_attempt_at TIMESTAMP NOT NULL DEFAULT NOW(),
+            created_at TIMESTAMP NOT NULL DEFAULT NOW()
+        );
+        """
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_graph_outbox_id ON graph_outbox (id);")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_graph_outbox_next_attempt_at "
+        "ON graph_outbox (next_attempt_at);"
+    )
+
+
+def downgrade() -> None:
+    """Drop the outbox table."""
+    op.execute("DROP TABLE IF EXISTS graph_outbox;")
@@ -0,0 +1,46 @@
+"""Spread each dashboard counter over several rows.
+
+Revision ID: 013_shard_metric_counters
+Revises: 012_graph_outbox
+Create Date: 2026-10-19 00:00:00.000000
+
+Every scored transaction used to upsert the single ("transactions_day", today)
+row, so concurrent ingests queued on its row lock. Counters now have a shard
+column in the primary key: ingest bumps a random shard, reconciliation writes
+shard 0, and readers sum the shards. Existing rows become shard 0.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "013_shard_metric_counters"
+down_revision = "012_graph_outbox"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Add shard to the counters' primary key."""
+    op.execute("ALTER TABLE metric_counters ADD COLUMN IF NOT EXISTS shard INTEGER NOT NULL DEFAULT 0;")
+    op.execute("ALTER TABLE metric_counters DROP CONSTRAINT IF EXISTS metric_counters_pkey;")
+    op.execute("ALTER TABLE metric_counters ADD PRIMARY KEY (scope, key, shard);")
+
+
+def downgrade() -> None:
+    """Fold the shards back into one row per counter."""
+    op.execute(
+        """
+        CREATE TEMPORARY TABLE metric_counters_folded AS
+        SELECT scope, key, SUM(value) AS value, MAX(updated_at) AS updated_at
+        FROM metric_counters GROUP BY scope, key;
+        """
+    )
+    op.execute("DELETE FROM metric_counters;")
+    op.execute("ALTER TABLE metric_counters DROP CONSTRAINT IF EXISTS metric_counters_pkey;")
+    op.execute("ALTER TABLE metric_counters DROP COLUMN shard;")
+    op.execute(
+        "INSERT INTO metric_counters (scope, key, value, updated_at) "
+        "SELECT scope, key, value, updated_at FROM metric_counters_folded;"
+    )
+    op.execute("DROP TABLE metric_counters_folded;")
+    op.execute("ALTER TABLE metric_counters ADD PRIMARY KEY (scope, key);")
@@ -0,0 +1,44 @@
+"""Key graph outbox events by the node or relationship they write.
+
+Revision ID: 014_graph_outbox_aggregate_key
+Revises: 013_shard_metric_counters
+Create Date: 2026-10-19 00:00:00.000000
+
+The relay holds back an event while an earlier event with the same
+aggregate_key is pending, so a retried event cannot overwrite newer state.
+Pending events are backfilled from their payloads.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "014_graph_outbox_aggregate_key"
+down_revision = "013_shard_metric_counters"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Add and backfill aggregate_key, indexed for the relay's ordering check."""
+    op.execute("ALTER TABLE graph_outbox ADD COLUMN IF NOT EXISTS aggregate_key VARCHAR;")
+    op.execute(
+        """
+        UPDATE graph_outbox SET aggregate_key = CASE event_type
+            WHEN 'entity' THEN 'entity:' || (payload->>'entity_id')
+            ELSE 'entity_link:' || (payload->>'from_entity_id') || ':'
+                || (payload->>'to_entity_id') || ':' || (payload->>'relationship_type')
+        END
+        WHERE aggregate_key IS NULL;
+        """
+    )
+    op.execute("ALTER TABLE graph_outbox ALTER COLUMN aggregate_key SET NOT NULL;")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_graph_outbox_aggregate_key "
+        "ON graph_outbox (aggregate_key);"
+    )
+
+
+def downgrade() -> None:
+    """Drop aggregate_key."""
+    op.execute("DROP INDEX IF EXISTS ix_graph_outbox_aggregate_key;")
+    op.execute("ALTER TABLE graph_outbox DROP COLUMN IF EXISTS aggregate_key;")
@@ -4,6 +4,8 @@ from datetime import datetime, timedelta
 from app.models import CaseStatus, RiskLevel, Transaction, Score, Case
 from sqlalchemy.orm import Session
 from app.scoring import FraudScoringEngine
+from app.cache import invalidate_tags_on_commit, case_tag
+from app.services.dashboard_counters import record_case_status
 
 
 class AnomalyAgent:
@@ -66,6 +68,21 @@ class ComplianceAgent:
             Transaction.timestamp >= cutoff_time
         ).count()
         
+        return self.evaluate_velocity(customer_id, count, time_window_hours)
+    
+    def evaluate_velocity(self, customer_id: str, count: int,
+                          time_window_hours: int = 24) -> Dict[str, Any]:
+        """Apply the velocity rules to a transaction count.
+        
+        Args:
+            customer_id: Customer ID
+            count: Customer's transactions in the window (from the database
+                or a velocity counter)
+            time_window_hours: Time window in hours
+        
+        Returns:
+            Velocity check results
+        """
         # Simple velocity rules
         thresholds = {
             24: 50,  # Max 50 transactions in 24h
@@ -206,6 +223,7 @@ class InvestigationAgent:
         
         db.add(case)
         db.flush()
+        record_case_status(db, None, case.status)
         
         # Link transaction to case
         from app.models import CaseTransaction
@@ -255,6 +273,7 @@ class InvestigationAgent:
             db: Database session
         """
         from app.models import Entity, CaseEntity
+        from app.services.graph_outbox import enqueue_entity
         
         entity_types = {
             "customer": transaction.customer_id,
@@ -281,8 +300,10 @@ class InvestigationAgent:
                 )
                 db.add(entity)
                 db.flush()
+                enqueue_entity(db, entity)
             
             # Link to case
+            invalidate_tags_on_commit(db, case_tag(case.id))
             case_entity = CaseEntity(
                 case_id=case.id,
                 entity_id=entity.id
@@ -308,9 +329,11 @@ class InvestigationAgent:
         
         old_status = case.status
         case.status = new_status
+        invalidate_tags_on_commit(db, case_tag(case.id))
         
         if new_status == CaseStatus.CLOSED:
             case.closed_at = datetime.utcnow()
+        record_case_status(db, old_status, new_status)
         
         # Log status change event
         from app.models import CaseEvent
@@ -1,9 +1,208 @@
-"""Audit logging utilities."""
-from typing import Optional, Dict, Any
+"""Audit logging utilities.
+
+Events can be written synchronously (inside the caller's session, committed
+before returning) or buffered: queued in memory and group-committed to
+``audit_log`` by a background writer in batched inserts. Buffered mode keeps
+audit writes off the hot path (e.g. scoring); sensitive actions should stay
+synchronous. The writer is drained on shutdown. A batch that fails to insert
+is retried, then written event by event so one bad event cannot take the
+rest of its batch with it; events that still fail are logged and counted.
+Submitting never blocks for more than ``audit_enqueue_timeout_ms``: when the
+queue stays full the event is logged and counted as dropped.
+"""
+import logging
+import queue
+import threading
+import time
+from typing import Optional, Dict, Any, Iterable, List, Callable
+from prometheus_client import Counter
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import BackgroundSessionLocal
 from app.models import AuditLog, User
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
+DURABILITY_SYNC = "sync"
+DURABILITY_BUFFERED = "buffered"
+
+audit_events_dropped = Counter(
+    "audit_events_dropped_total",
+    "Buffered audit events that could not be written and exist only in the application log",
+)
+
+# actor_id -> username. Usernames cannot change (User rejects it), so entries never go stale.
+_username_cache: Dict[int, str] = {}
+_username_cache_lock = threading.Lock()
+_USERNAME_CACHE_MAX = 10000
+
+
+def resolve_usernames(db: Session, actor_ids: Iterable[int]) -> Dict[int, str]:
+    """Resolve actor usernames, querying only ids missing from the cache."""
+    ids = {actor_id for actor_id in actor_ids if actor_id}
+    with _username_cache_lock:
+        resolved = {actor_id: _username_cache[actor_id] for actor_id in ids if actor_id in _username_cache}
+    missing = ids - resolved.keys()
+    if missing:
+        rows = db.query(User.id, User.username).filter(User.id.in_(missing)).all()
+        with _username_cache_lock:
+            if len(_username_cache) + len(rows) > _USERNAME_CACHE_MAX:
+                _username_cache.clear()
+            for user_id, username in rows:
+                _username_cache[user_id] = username
+                resolved[user_id] = username
+    return resolved
+
+
+class AuditWriter:
+    """Background group-commit writer for buffered audit events."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = BackgroundSessionLocal,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_queue_size: Optional[int] = None,
+        enqueue_timeout: Optional[float] = None,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size or settings.audit_batch_size
+        self.flush_interval = flush_interval if flush_interval is not None else settings.audit_flush_interval_ms / 1000.0
+        self.enqueue_timeout = (
+            enqueue_timeout if enqueue_timeout is not None else settings.audit_enqueue_timeout_ms / 1000.0
+        )
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(max_queue_size or settings.audit_queue_size)
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, event: Dict[str, Any]):
+        """Queue an event, dropping it if the queue is still full after ``enqueue_timeout``.
+
+        Called from request handlers (including async ones), so this must never
+        write or back off on the caller's thread.
+        """
+        self._ensure_started()
+        try:
+            self._queue.put(event, timeout=self.enqueue_timeout)
+        except queue.Full:
+            logger.warning("Audit queue full; dropping event")
+            self._drop([event])
+
+    def flush(self):
+        """Write every queued event now."""
+        while True:
+            batch = self._take(block=False)
+            if not batch:
+                return
+            self._write(batch)
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the background thread and drain the queue."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self.flush()
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _ensure_started(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            batch = self._take(block=True)
+            if batch:
+                self._write(batch)
+
+    def _take(self, block: bool) -> List[Dict[str, Any]]:
+        """Collect up to ``batch_size`` events, waiting at most ``flush_interval``."""
+        batch: List[Dict[str, Any]] = []
+        try:
+            batch.append(self._queue.get(timeout=self.flush_interval) if block else self._queue.get_nowait())
+        except queue.Empty:
+            return batch
+
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if block and remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, events: List[Dict[str, Any]]):
+        """Insert ``events``: as one batch with retries, then one by one."""
+        for attempt in range(settings.audit_write_retries + 1):
+            if attempt:
+                time.sleep(settings.audit_retry_backoff_ms / 1000.0 * 2 ** (attempt - 1))
+            try:
+                self._insert(events)
+                return
+            except Exception as e:
+                logger.warning(f"Failed writing {len(events)} audit events (attempt {attempt + 1}): {e}")
+        if len(events) == 1:
+            self._drop(events)
+            return
+        for event in events:
+            try:
+                self._insert([event])
+            except Exception as e:
+                logger.warning(f"Failed writing audit event: {e}")
+                self._drop([event])
+
+    def _insert(self, events: List[Dict[str, Any]]):
+        db = self.session_factory()
+        try:
+            usernames = resolve_usernames(db, (event["actor_id"] for event in events))
+            for event in events:
+                if event["actor_username"] is None and event["actor_id"]:
+                    event["actor_username"] = usernames.get(event["actor_id"])
+            db.execute(insert(AuditLog), events)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _drop(self, events: List[Dict[str, Any]]):
+        audit_events_dropped.inc(len(events))
+        # Keep the trail in the application log rather than dropping it silently
+        logger.error(f"Dropped {len(events)} audit events: {events}")
+
+
+_audit_writer: Optional[AuditWriter] = None
+_audit_writer_lock = threading.Lock()
+
+
+def get_audit_writer() -> AuditWriter:
+    """Get or create the process-wide audit writer."""
+    global _audit_writer
+    if _audit_writer is None:
+        with _audit_writer_lock:
+            if _audit_writer is None:
+                _audit_writer = AuditWriter()
+    return _audit_writer
+
+
+def shutdown_audit_writer():
+    """Drain buffered audit events (called on application shutdown)."""
+    if _audit_writer is not None:
+        _audit_writer.stop()
+
 
 def log_audit_event(
     db: Session,
@@ -15,10 +214,11 @@ def log_audit_event(
     after_state: Optional[Dict[str, Any]] = None,
     metadata: Optional[Dict[str, Any]] = None,
     ip_address: Optional[str] = None,
-    user_agent: Optional[str] = None
+    user_agent: Optional[str] = None,
+    durability: Optional[str] = None
 ):
     """Log an audit event.
-    
+
     Args:
         db: Database session
         action: Action performed (e.g., "create_case", "update_score")
@@ -30,26 +230,32 @@ def log_audit_event(
         metadata: Additional metadata
         ip_address: IP address of the request
         user_agent: User agent string
+        durability: "sync" to write and commit in ``db`` before returning,
+            "buffered" to hand the event to the background writer.
+            Defaults to ``settings.audit_default_durability``.
     """
-    actor_username = None
+    durability = durability or settings.audit_default_durability
+
+    event = {
+        "actor_id": actor_id,
+        "actor_username": None,
+        "action": action,
+        "resource_type": resource_type,
+        "resource_id": str(resource_id),
+        "before_state": before_state,
+        "after_state": after_state,
+        "audit_metadata": metadata,
+        "ip_address": ip_address,
+        "user_agent": user_agent,
+        "created_at": datetime.utcnow(),
+    }
+
+    if durability == DURABILITY_BUFFERED:
+        get_audit_writer().submit(event)
+        return
+
     if actor_id:
-        user = db.query(User).filter(User.id == actor_id).first()
-        if user:
-            actor_username = user.username
-    
-    audit_log = AuditLog(
-        actor_id=actor_id,
-        actor_username=actor_username,
-        action=action,
-        resource_type=resource_type,
-        resource_id=str(resource_id),
-        before_state=before_state,
-        after_state=after_state,
-        metadata=metadata,
-        ip_address=ip_address,
-        user_agent=user_agent
-    )
-    
-    db.add(audit_log)
-    db.commit()
+        event["actor_username"] = resolve_usernames(db, [actor_id]).get(actor_id)
 
+    db.add(AuditLog(**event))
+    db.commit()
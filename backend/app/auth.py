@@ -1,18 +1,68 @@
-"""Authentication and authorization."""
+"""Authentication and authorization.
+
+``get_current_user`` resolves a token to a ``Principal`` (user id, role,
+active flag) through a short-lived cache keyed by the token's subject and
+issue time: in-process first, then Redis, then the ``users`` table. Cached
+principals are invalidated when the user row is updated or deleted.
+
+bcrypt hashing and verification from async code run on a small dedicated
+executor (``run_password_hashing``) rather than the event loop, with a cap
+on queued work so a login storm is turned away instead of piling up.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Callable, Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from prometheus_client import Counter, Gauge, Histogram
+from pydantic import BaseModel
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from app.cache import (
+    CacheKeys, LocalCache, aget_cache, aset_cache, invalidate_tags_on_commit, register_local_cache, user_tag,
+)
+from app.database import get_lazy_db
 from app.models import User, UserRole
 from app.config import settings
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.api_prefix}/auth/login")
 
+password_hash_queue_time = Histogram(
+    "password_hash_queue_seconds",
+    "Time password hashing/verification waited for an executor thread",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+password_hash_duration = Histogram(
+    "password_hash_duration_seconds",
+    "Time spent hashing or verifying a password",
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0),
+)
+password_hash_rejected = Counter(
+    "password_hash_rejected_total",
+    "Password operations turned away because too many were already queued",
+)
+password_hash_pending = Gauge("password_hash_pending", "Password operations queued or running")
+
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers, thread_name_prefix="password-hash"
+)
+_password_pending = 0
+
+principal_cache = register_local_cache(LocalCache(settings.auth_principal_cache_size, tier="principal"))
+
+
+class Principal(BaseModel):
+    """The authenticated user, as much of it as authorization needs."""
+    id: int
+    username: str
+    role: UserRole
+    is_active: bool
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash."""
@@ -24,6 +74,51 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def run_password_hashing(fn: Callable[..., Any], *args: Any) -> Any:
+    """Run a bcrypt call on the password executor, off the event loop.
+    
+    At most ``PASSWORD_HASH_WORKERS`` calls run at once; beyond
+    ``PASSWORD_HASH_MAX_PENDING`` queued or running calls, new ones are
+    rejected with a 503 so logins cannot queue without bound.
+    """
+    global _password_pending
+    if _password_pending >= settings.password_hash_max_pending:
+        password_hash_rejected.inc()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many logins in progress, retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    
+    submitted = time.perf_counter()
+    
+    def run():
+        started = time.perf_counter()
+        password_hash_queue_time.observe(started - submitted)
+        try:
+            return fn(*args)
+        finally:
+            password_hash_duration.observe(time.perf_counter() - started)
+    
+    _password_pending += 1
+    password_hash_pending.inc()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_password_executor, run)
+    finally:
+        _password_pending -= 1
+        password_hash_pending.dec()
+
+
+def shutdown_password_executor():
+    """Stop the password executor's threads once queued work is done."""
+    _password_executor.shutdown(wait=True)
+
+
+async def averify_password(plain_password: str, hashed_password: str) -> bool:
+    """``verify_password`` on the password executor."""
+    return await run_password_hashing(verify_password, plain_password, hashed_password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token."""
     to_encode = data.copy()
@@ -31,27 +126,31 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(hours=settings.jwt_expiration_hours)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": datetime.utcnow()})
     encoded_jwt = jwt.encode(to_encode, settings.jwt_secret, algorithm=settings.jwt_algorithm)
     return encoded_jwt
 
 
-def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
+async def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
     """Authenticate a user."""
     user = db.query(User).filter(User.username == username).first()
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await averify_password(password, user.hashed_password):
         return None
     if not user.is_active:
         return None
     return user
 
 
+def principal_key(subject: str, issued_at: int) -> str:
+    return f"{CacheKeys.PRINCIPAL}:{subject}:{issued_at}"
+
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
+    db: Session = Depends(get_lazy_db)
+) -> Principal:
     """Get current authenticated user."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -66,15 +165,58 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.username == username).first()
-    if user is None:
+    principal = await load_principal(db, username, int(payload.get("iat") or 0))
+    if principal is None or not principal.is_active:
         raise credentials_exception
-    return user
+    return principal
+
+
+async def load_principal(db: Session, username: str, issued_at: int) -> Optional[Principal]:
+    """Principal for a token's subject: in-process cache, then Redis, then the database."""
+    key = principal_key(username, issued_at)
+    ttl = settings.auth_principal_cache_ttl
+    principal = principal_cache.get(key)
+    if principal is not None:
+        return principal
+    
+    cached = await aget_cache(key)
+    if cached is not None:
+        principal = Principal.model_validate(cached)
+    else:
+        user = db.query(User).filter(User.username == username).first()
+        if user is None:
+            return None
+        principal = Principal.model_validate(user, from_attributes=True)
+        await aset_cache(key, principal, ttl=ttl, tags=[user_tag(principal.id)])
+    principal_cache.set(key, principal, min(ttl, settings.cache_local_ttl))
+    return principal
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_principals(mapper, connection, target: User):
+    session = object_session(target)
+    if session is not None:
+        invalidate_tags_on_commit(session, user_tag(target.id))
+        session.info["principals_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _clear_committed_principals(session: Session):
+    # Local entries are keyed by token, not user; user changes are rare enough
+    # to drop them all (other workers get the tag invalidation)
+    if session.info.pop("principals_changed", False):
+        principal_cache.clear()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_principals(session: Session):
+    session.info.pop("principals_changed", None)
 
 
 def require_role(*allowed_roles: UserRole):
     """Dependency factory for role-based authorization."""
-    def role_checker(current_user: User = Depends(get_current_user)) -> User:
+    def role_checker(current_user: Principal = Depends(get_current_user)) -> Principal:
         if current_user.role not in allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
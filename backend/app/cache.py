@@ -1,41 +1,241 @@
-"""Redis cache service for performance optimization."""
+"""Redis cache service for performance optimization.
+
+Reads go through a small in-process L1 cache (TTL + LRU) before Redis. L1
+entries never outlive the Redis key they were read from, and writes and
+deletes are broadcast on a Redis pub/sub channel so other workers drop their
+L1 copy.
+
+Values are stored in the format of ``app.serialization`` (typed conversion,
+orjson, optional compression). L1 holds the decoded JSON bytes, which
+``get_cache_raw`` returns for endpoints to send without re-validation.
+
+Hits, misses, errors, Redis latency and stored value sizes are exported per
+key family (the ``CacheKeys`` prefix of the key, see ``key_family``).
+
+``async def`` code uses the ``a*`` functions, which run on ``redis.asyncio``
+and never block the event loop. Multi-key reads and writes (``amget_cache``,
+``amset_cache``, ``aincr_counters``) cost one pipelined round trip per call,
+however many keys they touch.
+"""
+import asyncio
+import concurrent.futures
+import fnmatch
 import json
 import logging
-from typing import Optional, Any, Dict
+import math
+import random
+import threading
+import time
+import uuid
+from collections import Counter as Tally, OrderedDict
+from typing import Optional, Any, Awaitable, Callable, Dict, Iterable, List, Type
 from functools import wraps
 import redis
+import redis.asyncio
+from pydantic import BaseModel
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+from sqlalchemy import event
+from sqlalchemy.orm import Session
 from app.config import settings
+from app.redis_connection import RedisConnectionManager
+from app.serialization import decode_payload, encode, loads, to_plain
 
 logger = logging.getLogger(__name__)
 
-# Global Redis client instance
-_redis_client: Optional[redis.Redis] = None
+# Global Redis connection manager (pool + circuit breaker)
+_redis_manager: Optional[RedisConnectionManager] = None
+_redis_manager_lock = threading.Lock()
 
+# Identifies this process's own invalidation messages
+INSTANCE_ID = uuid.uuid4().hex
 
-def get_redis_client() -> Optional[redis.Redis]:
-    """Get or create Redis client instance."""
-    global _redis_client
+cache_hits = Counter("cache_hits_total", "Cache hits", ["tier", "family"])
+cache_misses = Counter("cache_misses_total", "Cache misses", ["tier", "family"])
+cache_errors = Counter("cache_errors_total", "Failed Redis cache operations", ["family", "operation"])
+cache_latency = Histogram(
+    "cache_operation_seconds",
+    "Redis round trip time of cache operations; multi-key calls count once per family",
+    ["family", "operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+cache_value_bytes = Histogram(
+    "cache_value_bytes",
+    "Stored (serialized, possibly compressed) size of cached values",
+    ["family"],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+)
+cache_evictions = Counter(
+    "cache_evictions_total",
+    "Entries removed from the in-process cache (expired, capacity, invalidated)",
+    ["tier", "reason"],
+)
+
+
+class LocalCache:
+    """Thread-safe, size-bounded LRU cache with per-entry expiry."""
+
+    def __init__(self, max_size: int, tier: str = "local"):
+        self.max_size = max_size
+        self.tier = tier
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                cache_evictions.labels(tier=self.tier, reason="expired").inc()
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        if ttl <= 0 or self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                cache_evictions.labels(tier=self.tier, reason="capacity").inc()
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            if self._entries.pop(key, None) is None:
+                return False
+        cache_evictions.labels(tier=self.tier, reason="invalidated").inc()
+        return True
+
+    def delete_pattern(self, pattern: str) -> int:
+        with self._lock:
+            keys = [key for key in self._entries if fnmatch.fnmatchcase(key, pattern)]
+            for key in keys:
+                del self._entries[key]
+        if keys:
+            cache_evictions.labels(tier=self.tier, reason="invalidated").inc(len(keys))
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_cache = LocalCache(settings.cache_local_max_size if settings.cache_local_enabled else 0)
+
+# In-process caches that drop keys on invalidation (local_cache plus registered ones)
+_local_caches: List[LocalCache] = [local_cache]
+
+
+def register_local_cache(extra: LocalCache) -> LocalCache:
+    """Have ``extra`` follow invalidations like ``local_cache``.
+    
+    For modules that keep decoded objects in their own in-process tier under
+    cache keys, so other workers' writes and tag invalidations reach it.
+    """
+    _local_caches.append(extra)
+    return extra
+
+
+def _redis_stat(name: str) -> float:
+    client = get_redis_client()
+    if client is None:
+        return 0
+    try:
+        return client.info("stats").get(name, 0)
+    except Exception:
+        return 0
+
+
+# Server-side Redis evictions/expirations, read from INFO on scrape
+redis_evicted_keys = Gauge("cache_redis_evicted_keys", "Keys evicted by Redis (maxmemory policy)")
+redis_evicted_keys.set_function(lambda: _redis_stat("evicted_keys"))
+redis_expired_keys = Gauge("cache_redis_expired_keys", "Keys expired by Redis")
+redis_expired_keys.set_function(lambda: _redis_stat("expired_keys"))
+
+
+def get_redis_manager() -> Optional[RedisConnectionManager]:
+    """Get the process-wide Redis connection manager, if Redis is configured."""
+    global _redis_manager
     
     if not settings.redis_enabled or not settings.redis_url:
         return None
     
-    if _redis_client is None:
-        try:
-            _redis_client = redis.from_url(
-                settings.redis_url,
-                decode_responses=True,
-                socket_connect_timeout=5,
-                socket_timeout=5,
-                retry_on_timeout=True
-            )
-            # Test connection
-            _redis_client.ping()
-            logger.info("Redis connection established")
-        except Exception as e:
-            logger.warning(f"Redis connection failed: {e}. Cache disabled.")
-            _redis_client = None
+    if _redis_manager is None:
+        with _redis_manager_lock:
+            if _redis_manager is None:
+                _redis_manager = RedisConnectionManager()
+    return _redis_manager
+
+
+def get_redis_client() -> Optional[redis.Redis]:
+    """Get the Redis client, or None if Redis is disabled or unreachable.
+    
+    Never blocks on a dead Redis: while the circuit breaker is open this
+    returns None at once and reconnects happen in the background.
+    """
+    manager = get_redis_manager()
+    return manager.client() if manager else None
+
+
+def get_async_redis_client() -> Optional[redis.asyncio.Redis]:
+    """Get the asyncio Redis client, or None if Redis is disabled or unreachable."""
+    manager = get_redis_manager()
+    return manager.async_client() if manager else None
+
+
+def close_redis():
+    """Stop reconnect attempts and close pooled Redis connections."""
+    if _redis_manager is not None:
+        _redis_manager.close()
+
+
+async def aclose_redis():
+    """Close pooled asyncio Redis connections."""
+    if _redis_manager is not None:
+        await _redis_manager.aclose()
+
+
+def _redis_ok():
+    if _redis_manager is not None:
+        _redis_manager.record_success()
+
+
+def _redis_failed(error: BaseException):
+    if _redis_manager is not None:
+        _redis_manager.record_failure(error)
+
+
+def key_family(key: str) -> str:
+    """The ``CacheKeys`` prefix ``key`` belongs to (longest match), or "other".
     
-    return _redis_client
+    Used as a metric label, so the set of values stays small and fixed.
+    """
+    for family in _KEY_FAMILIES:
+        if key.startswith(family) and key[len(family):len(family) + 1] in ("", ":"):
+            return family
+    return "other"
+
+
+def _families(keys: Iterable[str]) -> "Tally[str]":
+    return Tally(key_family(key) for key in keys)
+
+
+def _observe_latency(operation: str, families: Iterable[str], began: float):
+    elapsed = time.perf_counter() - began
+    for family in families:
+        cache_latency.labels(family=family, operation=operation).observe(elapsed)
+
+
+def _count_errors(operation: str, families: Iterable[str]):
+    for family in families:
+        cache_errors.labels(family=family, operation=operation).inc()
 
 
 def cache_key(prefix: str, *args, **kwargs) -> str:
@@ -49,35 +249,91 @@ def cache_key(prefix: str, *args, **kwargs) -> str:
     return ":".join(key_parts)
 
 
-def get_cache(key: str) -> Optional[Any]:
-    """Get value from cache."""
+def get_cache_raw(key: str) -> Optional[bytes]:
+    """Get the cached value's JSON bytes, ready to be sent as a response body."""
     client = get_redis_client()
     if not client:
         return None
     
+    family = key_family(key)
+    payload = local_cache.get(key)
+    if payload is not None:
+        cache_hits.labels(tier="local", family=family).inc()
+        return payload
+    cache_misses.labels(tier="local", family=family).inc()
+    
     try:
-        value = client.get(key)
-        if value:
-            return json.loads(value)
+        # Value and remaining TTL in one round trip, so L1 expires with Redis
+        began = time.perf_counter()
+        pipe = client.pipeline(transaction=False)
+        pipe.get(key)
+        pipe.pttl(key)
+        stored, pttl = pipe.execute()
+        _observe_latency("get", [family], began)
+        _redis_ok()
+        # Entries in an unknown (pre-typed JSON) format count as misses
+        payload = decode_payload(stored) if stored else None
+        if payload is not None:
+            cache_hits.labels(tier="redis", family=family).inc()
+            if pttl and pttl > 0:
+                local_cache.set(key, payload, min(pttl / 1000, settings.cache_local_ttl))
+            return payload
+        cache_misses.labels(tier="redis", family=family).inc()
     except Exception as e:
         logger.warning(f"Cache get error for key {key}: {e}")
+        _count_errors("get", [family])
+        _redis_failed(e)
     
     return None
 
 
-def set_cache(key: str, value: Any, ttl: Optional[int] = None) -> bool:
-    """Set value in cache with optional TTL."""
+def get_cache(key: str) -> Optional[Any]:
+    """Get value from cache."""
+    payload = get_cache_raw(key)
+    if payload is None:
+        return None
+    return loads(payload)
+
+
+def set_cache(
+    key: str,
+    value: Any,
+    ttl: Optional[int] = None,
+    schema: Optional[Type[BaseModel]] = None,
+    tags: Iterable[str] = (),
+) -> bool:
+    """Set value in cache with optional TTL.
+    
+    Pydantic models are stored via ``model_dump``; pass ``schema`` to store ORM
+    objects (or lists of them) as that response schema. The key is registered
+    under each of ``tags`` so ``invalidate_tags`` can delete it.
+    """
     client = get_redis_client()
     if not client:
         return False
     
+    family = key_family(key)
     try:
         ttl = ttl or settings.redis_cache_ttl
-        serialized = json.dumps(value, default=str)
-        client.setex(key, ttl, serialized)
+        serialized = encode(value, schema)
+        cache_value_bytes.labels(family=family).observe(len(serialized))
+        began = time.perf_counter()
+        pipe = client.pipeline(transaction=False)
+        pipe.setex(key, ttl, serialized)
+        for tag in tags:
+            # Tag sets outlive their members; expired members are harmless
+            pipe.sadd(tag_key(tag), key)
+            pipe.expire(tag_key(tag), max(ttl, settings.cache_tag_ttl))
+        pipe.execute()
+        _observe_latency("set", [family], began)
+        _redis_ok()
+        local_cache.set(key, decode_payload(serialized), min(ttl, settings.cache_local_ttl))
+        publish_invalidation(keys=[key])
         return True
     except Exception as e:
         logger.warning(f"Cache set error for key {key}: {e}")
+        _count_errors("set", [family])
+        _redis_failed(e)
     
     return False
 
@@ -90,67 +346,701 @@ def delete_cache(key: str) -> bool:
     
     try:
         client.delete(key)
+        local_cache.delete(key)
+        publish_invalidation(keys=[key])
         return True
     except Exception as e:
         logger.warning(f"Cache delete error for key {key}: {e}")
+        _count_errors("delete", [key_family(key)])
+        _redis_failed(e)
     
     return False
 
 
-def delete_cache_pattern(pattern: str) -> int:
-    """Delete all keys matching pattern."""
+def delete_cache_pattern(pattern: str, batch_size: int = 500) -> int:
+    """Delete all keys matching pattern.
+    
+    Walks the keyspace incrementally with SCAN (never KEYS, which blocks Redis
+    for the whole scan); prefer ``invalidate_tags`` where keys can be tagged.
+    """
     client = get_redis_client()
     if not client:
         return 0
     
     try:
-        keys = client.keys(pattern)
-        if keys:
-            return client.delete(*keys)
-        return 0
+        local_cache.delete_pattern(pattern)
+        publish_invalidation(pattern=pattern)
+        deleted = 0
+        batch = []
+        for key in client.scan_iter(match=pattern, count=batch_size):
+            batch.append(key)
+            if len(batch) >= batch_size:
+                deleted += client.unlink(*batch)
+                batch = []
+        if batch:
+            deleted += client.unlink(*batch)
+        return deleted
     except Exception as e:
         logger.warning(f"Cache delete pattern error for {pattern}: {e}")
+        _count_errors("delete", [key_family(pattern)])
+        _redis_failed(e)
+    
+    return 0
+
+
+def tag_key(tag: str) -> str:
+    return f"{CacheKeys.TAG}:{tag}"
+
+
+def entity_tag(entity_id: int) -> str:
+    """Tag for cached values that include the entity with this primary key."""
+    return f"{CacheKeys.ENTITY}:{entity_id}"
+
+
+def user_tag(user_id: int) -> str:
+    """Tag for cached values derived from the user with this primary key."""
+    return f"user:{user_id}"
+
+
+def case_tag(case_id: int) -> str:
+    """Tag for cached values that include the case with this primary key."""
+    return f"{CacheKeys.CASE}:{case_id}"
+
+
+def invalidate_tags(*tags: str) -> int:
+    """Delete every key registered under any of ``tags``, and the tag sets."""
+    client = get_redis_client()
+    if not client or not tags:
+        return 0
+    
+    try:
+        pipe = client.pipeline(transaction=False)
+        for tag in tags:
+            pipe.smembers(tag_key(tag))
+        members = pipe.execute()
+        keys = sorted({
+            key.decode() if isinstance(key, bytes) else key
+            for tag_members in members for key in tag_members
+        })
+        client.unlink(*keys, *[tag_key(tag) for tag in tags])
+        for key in keys:
+            for local in _local_caches:
+                local.delete(key)
+        if keys:
+            publish_invalidation(keys=keys)
+        return len(keys)
+    except Exception as e:
+        logger.warning(f"Cache tag invalidation error for {tags}: {e}")
+        _count_errors("delete", [CacheKeys.TAG])
+        _redis_failed(e)
     
     return 0
 
 
-def cached(ttl: Optional[int] = None, key_prefix: Optional[str] = None):
-    """Decorator to cache function results."""
+def invalidate_tags_on_commit(db: Session, *tags: str):
+    """Invalidate ``tags`` once ``db`` commits (dropped on rollback).
+    
+    Invalidating before the commit would let a concurrent reader re-cache the
+    old rows in between.
+    """
+    db.info.setdefault("cache_tags", set()).update(tags)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_tags(session: Session):
+    tags = session.info.pop("cache_tags", None)
+    if tags:
+        invalidate_tags(*tags)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_tags(session: Session):
+    session.info.pop("cache_tags", None)
+
+
+def publish_invalidation(keys: Optional[List[str]] = None, pattern: Optional[str] = None):
+    """Tell other workers to drop ``keys`` / keys matching ``pattern`` from their L1."""
+    client = get_redis_client()
+    if client is None:
+        return
+    try:
+        client.publish(settings.cache_invalidation_channel, _invalidation_message(keys, pattern))
+    except Exception as e:
+        logger.warning(f"Cache invalidation publish error: {e}")
+        _redis_failed(e)
+
+
+def _invalidation_message(keys: Optional[List[str]] = None, pattern: Optional[str] = None) -> str:
+    return json.dumps({"origin": INSTANCE_ID, "keys": keys or [], "pattern": pattern})
+
+
+def apply_invalidation(data: Any) -> int:
+    """Apply an invalidation message from another worker to the local cache."""
+    try:
+        message = json.loads(data)
+    except (TypeError, ValueError):
+        return 0
+    if message.get("origin") == INSTANCE_ID:
+        return 0
+    removed = 0
+    for local in _local_caches:
+        removed += sum(local.delete(key) for key in message.get("keys") or [])
+        if message.get("pattern"):
+            removed += local.delete_pattern(message["pattern"])
+    return removed
+
+
+class CacheInvalidationListener:
+    """Background thread applying pub/sub invalidations to the local cache."""
+
+    def __init__(self, poll_timeout: float = 1.0, retry_interval: float = 5.0):
+        self.poll_timeout = poll_timeout
+        self.retry_interval = retry_interval
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="cache-invalidation", daemon=True)
+        self._thread.start()
+        logger.info("Cache invalidation listener started")
+
+    def stop(self, timeout: float = 10.0):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+        logger.info("Cache invalidation listener stopped")
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            client = get_redis_client()
+            if client is None:
+                self._stop_event.wait(self.retry_interval)
+                continue
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(settings.cache_invalidation_channel)
+                while not self._stop_event.is_set():
+                    message = pubsub.get_message(timeout=self.poll_timeout)
+                    if message and message["type"] == "message":
+                        apply_invalidation(message["data"])
+            except Exception as e:
+                # Messages may have been missed while disconnected
+                for local in _local_caches:
+                    local.clear()
+                _redis_failed(e)
+                logger.warning(f"Cache invalidation listener error: {e}")
+                self._stop_event.wait(self.retry_interval)
+            finally:
+                pubsub.close()
+
+
+_invalidation_listener: Optional[CacheInvalidationListener] = None
+
+
+def start_invalidation_listener() -> CacheInvalidationListener:
+    """Start the process-wide cache invalidation listener."""
+    global _invalidation_listener
+    if _invalidation_listener is None:
+        _invalidation_listener = CacheInvalidationListener()
+    _invalidation_listener.start()
+    return _invalidation_listener
+
+
+def stop_invalidation_listener():
+    """Stop the process-wide cache invalidation listener, if running."""
+    if _invalidation_listener is not None:
+        _invalidation_listener.stop()
+
+
+async def amget_cache_raw(keys: Iterable[str]) -> Dict[str, bytes]:
+    """JSON bytes for each of ``keys`` that is cached; missing keys are left out.
+    
+    L1 is checked first. The rest are read with a single MGET, pipelined with
+    their PTTLs so the L1 copies expire with Redis: one round trip in total.
+    """
+    keys = list(dict.fromkeys(keys))
+    client = get_async_redis_client()
+    if not client or not keys:
+        return {}
+    
+    found: Dict[str, bytes] = {}
+    remote = []
+    for key in keys:
+        payload = local_cache.get(key)
+        if payload is None:
+            remote.append(key)
+        else:
+            found[key] = payload
+    for family, count in _families(found).items():
+        cache_hits.labels(tier="local", family=family).inc(count)
+    if not remote:
+        return found
+    remote_families = _families(remote)
+    for family, count in remote_families.items():
+        cache_misses.labels(tier="local", family=family).inc(count)
+    
+    try:
+        began = time.perf_counter()
+        pipe = client.pipeline(transaction=False)
+        pipe.mget(remote)
+        for key in remote:
+            pipe.pttl(key)
+        stored, *pttls = await pipe.execute()
+        _observe_latency("get", remote_families, began)
+        _redis_ok()
+    except Exception as e:
+        logger.warning(f"Cache mget error for {len(remote)} keys: {e}")
+        _count_errors("get", remote_families)
+        _redis_failed(e)
+        return found
+    
+    hits = Tally()
+    for key, value, pttl in zip(remote, stored, pttls):
+        payload = decode_payload(value) if value else None
+        if payload is None:
+            continue
+        found[key] = payload
+        hits[key_family(key)] += 1
+        if pttl and pttl > 0:
+            local_cache.set(key, payload, min(pttl / 1000, settings.cache_local_ttl))
+    for family, count in remote_families.items():
+        cache_hits.labels(tier="redis", family=family).inc(hits[family])
+        cache_misses.labels(tier="redis", family=family).inc(count - hits[family])
+    return found
+
+
+async def amget_cache(keys: Iterable[str]) -> Dict[str, Any]:
+    """Cached values for ``keys``; missing keys are left out."""
+    return {key: loads(payload) for key, payload in (await amget_cache_raw(keys)).items()}
+
+
+async def aget_cache_raw(key: str) -> Optional[bytes]:
+    """Async ``get_cache_raw``."""
+    return (await amget_cache_raw([key])).get(key)
+
+
+async def aget_cache(key: str) -> Optional[Any]:
+    """Async ``get_cache``."""
+    payload = await aget_cache_raw(key)
+    if payload is None:
+        return None
+    return loads(payload)
+
+
+async def amset_cache(
+    values: Dict[str, Any],
+    ttl: Optional[int] = None,
+    schema: Optional[Type[BaseModel]] = None,
+    tags: Optional[Dict[str, Iterable[str]]] = None,
+) -> bool:
+    """Store every key/value in ``values`` in one pipelined round trip.
+    
+    ``schema`` and ``ttl`` apply to all values; ``tags`` maps keys to the tags
+    they are registered under. Other workers are told to drop their L1 copies
+    with a single invalidation message.
+    """
+    client = get_async_redis_client()
+    if not client or not values:
+        return False
+    
+    families = _families(values)
+    try:
+        ttl = ttl or settings.redis_cache_ttl
+        serialized = {key: encode(value, schema) for key, value in values.items()}
+        for key, stored in serialized.items():
+            cache_value_bytes.labels(family=key_family(key)).observe(len(stored))
+        began = time.perf_counter()
+        pipe = client.pipeline(transaction=False)
+        for key, stored in serialized.items():
+            pipe.setex(key, ttl, stored)
+        for key, key_tags in (tags or {}).items():
+            for tag in key_tags:
+                pipe.sadd(tag_key(tag), key)
+                pipe.expire(tag_key(tag), max(ttl, settings.cache_tag_ttl))
+        pipe.publish(settings.cache_invalidation_channel, _invalidation_message(list(serialized)))
+        await pipe.execute()
+        _observe_latency("set", families, began)
+        _redis_ok()
+        for key, stored in serialized.items():
+            local_cache.set(key, decode_payload(stored), min(ttl, settings.cache_local_ttl))
+        return True
+    except Exception as e:
+        logger.warning(f"Cache mset error for {len(values)} keys: {e}")
+        _count_errors("set", families)
+        _redis_failed(e)
+    
+    return False
+
+
+async def aset_cache(
+    key: str,
+    value: Any,
+    ttl: Optional[int] = None,
+    schema: Optional[Type[BaseModel]] = None,
+    tags: Iterable[str] = (),
+) -> bool:
+    """Async ``set_cache``."""
+    return await amset_cache({key: value}, ttl, schema, {key: tags})
+
+
+def _queue_increments(pipe, increments: Dict[str, int], ttl: int):
+    for key, amount in increments.items():
+        pipe.incrby(key, amount)
+        pipe.expire(key, ttl)
+
+
+def incr_counters(increments: Dict[str, int], ttl: int) -> Dict[str, int]:
+    """Sync ``aincr_counters``, for threads and scripts."""
+    client = get_redis_client()
+    if not client or not increments:
+        return {}
+    
+    families = _families(increments)
+    try:
+        began = time.perf_counter()
+        pipe = client.pipeline(transaction=False)
+        _queue_increments(pipe, increments, ttl)
+        results = pipe.execute()
+        _observe_latency("incr", families, began)
+        _redis_ok()
+        return dict(zip(increments, results[::2]))
+    except Exception as e:
+        logger.warning(f"Cache counter update error for {len(increments)} keys: {e}")
+        _count_errors("incr", families)
+        _redis_failed(e)
+    
+    return {}
+
+
+async def aincr_counters(increments: Dict[str, int], ttl: int) -> Dict[str, int]:
+    """Add to integer counters in one pipelined round trip; returns their new values.
+    
+    Every counter's expiry is reset to ``ttl``. Returns an empty dict when
+    Redis is unavailable.
+    """
+    client = get_async_redis_client()
+    if not client or not increments:
+        return {}
+    
+    families = _families(increments)
+    try:
+        began = time.perf_counter()
+        pipe = client.pipeline(transaction=False)
+        _queue_increments(pipe, increments, ttl)
+        results = await pipe.execute()
+        _observe_latency("incr", families, began)
+        _redis_ok()
+        return dict(zip(increments, results[::2]))
+    except Exception as e:
+        logger.warning(f"Cache counter update error for {len(increments)} keys: {e}")
+        _count_errors("incr", families)
+        _redis_failed(e)
+    
+    return {}
+
+
+async def aget_counters(keys: Iterable[str]) -> Optional[Dict[str, int]]:
+    """Current values of integer counters in one MGET; absent counters read as 0.
+    
+    Returns None when Redis is unavailable, so callers can tell "no counts"
+    from "no counters".
+    """
+    keys = list(dict.fromkeys(keys))
+    client = get_async_redis_client()
+    if not client:
+        return None
+    if not keys:
+        return {}
+    
+    families = _families(keys)
+    try:
+        began = time.perf_counter()
+        pipe = client.pipeline(transaction=False)
+        pipe.mget(keys)
+        values, = await pipe.execute()
+        _observe_latency("get", families, began)
+        _redis_ok()
+        return {key: int(value or 0) for key, value in zip(keys, values)}
+    except Exception as e:
+        logger.warning(f"Cache counter read error for {len(keys)} keys: {e}")
+        _count_errors("get", families)
+        _redis_failed(e)
+    
+    return None
+
+
+cache_recomputes = Counter(
+    "cache_recomputes_total",
+    "Cached values recomputed, by reason (miss, expired, early)",
+    ["reason"],
+)
+cache_stale_served = Counter(
+    "cache_stale_served_total",
+    "Requests served a stale value while another caller recomputed it",
+)
+
+_sync_flights: Dict[str, concurrent.futures.Future] = {}
+_sync_flights_lock = threading.Lock()
+_async_flights: Dict[str, asyncio.Future] = {}
+
+
+def _as_entry(entry: Any) -> Optional[Dict[str, Any]]:
+    if isinstance(entry, dict) and entry.keys() == {"value", "fresh_until", "delta"}:
+        return entry
+    return None
+
+
+def _read_entry(key: str) -> Optional[Dict[str, Any]]:
+    """Cached envelope ``{"value", "fresh_until", "delta"}`` for ``key``, if any."""
+    return _as_entry(get_cache(key))
+
+
+async def _aread_entry(key: str) -> Optional[Dict[str, Any]]:
+    """Async ``_read_entry``."""
+    return _as_entry(await aget_cache(key))
+
+
+def _refresh_reason(entry: Optional[Dict[str, Any]], beta: float) -> Optional[str]:
+    """Why ``entry`` needs recomputing, or None if it can be served as is.
+
+    Besides expiry, entries are refreshed early with a probability that grows
+    as expiry nears and with how long the value takes to compute (XFetch), so
+    one caller usually refreshes before the TTL boundary instead of every
+    caller at once after it.
+    """
+    if entry is None:
+        return "miss"
+    now = time.time()
+    if now >= entry["fresh_until"]:
+        return "expired"
+    if beta > 0 and now - entry["delta"] * beta * math.log(1.0 - random.random()) >= entry["fresh_until"]:
+        return "early"
+    return None
+
+
+def _new_entry(value: Any, ttl: int, delta: float) -> Dict[str, Any]:
+    return {"value": to_plain(value), "fresh_until": time.time() + ttl, "delta": delta}
+
+
+def _store_entry(key: str, value: Any, ttl: int, stale_ttl: int, delta: float):
+    set_cache(key, _new_entry(value, ttl, delta), ttl + stale_ttl)
+
+
+async def _astore_entry(key: str, value: Any, ttl: int, stale_ttl: int, delta: float):
+    await aset_cache(key, _new_entry(value, ttl, delta), ttl + stale_ttl)
+
+
+def _try_lock(key: str):
+    """Cross-worker recompute lock: (acquired, lock). Without Redis, always acquired."""
+    client = get_redis_client()
+    if client is None:
+        return True, None
+    lock = client.lock(f"lock:{key}", timeout=settings.cache_lock_timeout, blocking=False)
+    try:
+        return lock.acquire(), lock
+    except Exception as e:
+        logger.warning(f"Cache lock error for key {key}: {e}")
+        _redis_failed(e)
+        return True, None
+
+
+async def _atry_lock(key: str):
+    """Async ``_try_lock`` on a redis.asyncio lock."""
+    client = get_async_redis_client()
+    if client is None:
+        return True, None
+    lock = client.lock(f"lock:{key}", timeout=settings.cache_lock_timeout, blocking=False)
+    try:
+        return await lock.acquire(), lock
+    except Exception as e:
+        logger.warning(f"Cache lock error for key {key}: {e}")
+        _redis_failed(e)
+        return True, None
+
+
+def _release_lock(lock):
+    if lock is None:
+        return
+    try:
+        lock.release()
+    except Exception:
+        # Expired and possibly taken over; the value was stored anyway
+        pass
+
+
+async def _arelease_lock(lock):
+    if lock is None:
+        return
+    try:
+        await lock.release()
+    except Exception:
+        pass
+
+
+def get_or_compute(
+    key: str,
+    compute: Callable[[], Any],
+    ttl: int,
+    stale_ttl: int = 0,
+    beta: Optional[float] = None,
+) -> Any:
+    """Cached value for ``key`` with single-flight recompute and stale-while-revalidate.
+
+    At most one caller per process (in-process future) and per cluster (Redis
+    lock) recomputes a key. While it does, other callers get the previous
+    value if it is within ``stale_ttl`` of expiry, or wait for the new one.
+    """
+    beta = settings.cache_early_refresh_beta if beta is None else beta
+    entry = _read_entry(key)
+    reason = _refresh_reason(entry, beta)
+    if reason is None:
+        return entry["value"]
+
+    with _sync_flights_lock:
+        flight = _sync_flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _sync_flights[key] = concurrent.futures.Future()
+    if not leader:
+        if entry is not None:
+            cache_stale_served.inc()
+            return entry["value"]
+        return flight.result()
+
+    try:
+        acquired, lock = _try_lock(key)
+        if not acquired:
+            if entry is not None:
+                cache_stale_served.inc()
+                flight.set_result(entry["value"])
+                return entry["value"]
+            # Another worker is computing a missing key: wait for it
+            deadline = time.monotonic() + settings.cache_lock_timeout
+            while time.monotonic() < deadline:
+                time.sleep(0.05)
+                waited = _read_entry(key)
+                if waited is not None:
+                    flight.set_result(waited["value"])
+                    return waited["value"]
+        try:
+            cache_recomputes.labels(reason=reason).inc()
+            began = time.monotonic()
+            value = compute()
+            _store_entry(key, value, ttl, stale_ttl, time.monotonic() - began)
+        finally:
+            _release_lock(lock if acquired else None)
+        flight.set_result(value)
+        return value
+    except BaseException as e:
+        if not flight.done():
+            flight.set_exception(e)
+        raise
+    finally:
+        with _sync_flights_lock:
+            _sync_flights.pop(key, None)
+
+
+async def aget_or_compute(
+    key: str,
+    compute: Callable[[], Awaitable[Any]],
+    ttl: int,
+    stale_ttl: int = 0,
+    beta: Optional[float] = None,
+) -> Any:
+    """Async version of ``get_or_compute`` for coroutine producers."""
+    beta = settings.cache_early_refresh_beta if beta is None else beta
+    entry = await _aread_entry(key)
+    reason = _refresh_reason(entry, beta)
+    if reason is None:
+        return entry["value"]
+
+    flight = _async_flights.get(key)
+    if flight is not None:
+        if entry is not None:
+            cache_stale_served.inc()
+            return entry["value"]
+        return await asyncio.shield(flight)
+    flight = _async_flights[key] = asyncio.get_running_loop().create_future()
+
+    try:
+        acquired, lock = await _atry_lock(key)
+        if not acquired:
+            if entry is not None:
+                cache_stale_served.inc()
+                flight.set_result(entry["value"])
+                return entry["value"]
+            deadline = time.monotonic() + settings.cache_lock_timeout
+            while time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+                waited = await _aread_entry(key)
+                if waited is not None:
+                    flight.set_result(waited["value"])
+                    return waited["value"]
+        try:
+            cache_recomputes.labels(reason=reason).inc()
+            began = time.monotonic()
+            value = await compute()
+            await _astore_entry(key, value, ttl, stale_ttl, time.monotonic() - began)
+        finally:
+            await _arelease_lock(lock if acquired else None)
+        flight.set_result(value)
+        return value
+    except BaseException as e:
+        if not flight.done():
+            flight.set_exception(e)
+            # Nobody may be waiting; don't log "exception never retrieved"
+            flight.exception()
+        raise
+    finally:
+        _async_flights.pop(key, None)
+
+
+def cached(
+    ttl: Optional[int] = None,
+    key_prefix: Optional[str] = None,
+    stale_ttl: int = 0,
+    key_builder: Optional[Callable[..., str]] = None,
+    beta: Optional[float] = None,
+):
+    """Decorator to cache function results.
+    
+    Concurrent misses are computed once (see ``get_or_compute``); with
+    ``stale_ttl`` the previous result is served for that long past ``ttl``
+    while it is being recomputed. ``key_builder`` receives the call's
+    arguments and returns the cache key, for functions whose arguments
+    include things like sessions or users that must not be part of it.
+    """
     def decorator(func):
+        def build_key(*args, **kwargs) -> str:
+            if key_builder is not None:
+                return key_builder(*args, **kwargs)
+            prefix = key_prefix or f"{func.__module__}.{func.__name__}"
+            return cache_key(prefix, *args, **kwargs)
+        
         @wraps(func)
         async def async_wrapper(*args, **kwargs):
-            # Generate cache key
-            prefix = key_prefix or f"{func.__module__}.{func.__name__}"
-            cache_key_str = cache_key(prefix, *args, **kwargs)
-            
-            # Try to get from cache
-            cached_value = get_cache(cache_key_str)
-            if cached_value is not None:
-                return cached_value
-            
-            # Call function and cache result
-            result = await func(*args, **kwargs)
-            set_cache(cache_key_str, result, ttl)
-            return result
+            return await aget_or_compute(
+                build_key(*args, **kwargs),
+                lambda: func(*args, **kwargs),
+                ttl or settings.redis_cache_ttl,
+                stale_ttl,
+                beta,
+            )
         
         @wraps(func)
         def sync_wrapper(*args, **kwargs):
-            # Generate cache key
-            prefix = key_prefix or f"{func.__module__}.{func.__name__}"
-            cache_key_str = cache_key(prefix, *args, **kwargs)
-            
-            # Try to get from cache
-            cached_value = get_cache(cache_key_str)
-            if cached_value is not None:
-                return cached_value
-            
-            # Call function and cache result
-            result = func(*args, **kwargs)
-            set_cache(cache_key_str, result, ttl)
-            return result
+            return get_or_compute(
+                build_key(*args, **kwargs),
+                lambda: func(*args, **kwargs),
+                ttl or settings.redis_cache_ttl,
+                stale_ttl,
+                beta,
+            )
         
         # Return appropriate wrapper based on function type
-        import asyncio
         if asyncio.iscoroutinefunction(func):
             return async_wrapper
         return sync_wrapper
@@ -169,4 +1059,80 @@ class CacheKeys:
     TRANSACTION = "transaction"
     CASE = "case"
     CASE_REPORT = "case:report"
+    CUSTOMER_FEATURES = "features:customer"
+    PRINCIPAL = "principal"
+    VELOCITY = "velocity"
+    TAG = "tag"
+
+
+# Longest first, so "entity:network:1" is not counted under "entity"
+_KEY_FAMILIES = sorted(
+    (value for name, value in vars(CacheKeys).items() if name.isupper()), key=len, reverse=True
+)
+
+
+def key_family_stats(max_keys: int = 10000, batch_size: int = 500) -> Optional[Dict[str, Any]]:
+    """Redis memory, key count and this worker's hit ratio per key family.
+    
+    Walks up to ``max_keys`` keys with SCAN and sizes them with pipelined
+    ``MEMORY USAGE`` calls, ``batch_size`` at a time; ``complete`` says whether
+    the whole keyspace was covered. Families are sorted by memory, largest
+    first. Returns None when Redis is unavailable.
+    """
+    client = get_redis_client()
+    if client is None:
+        return None
+    
+    memory: "Tally[str]" = Tally()
+    keys: "Tally[str]" = Tally()
+    scanned = 0
+    complete = True
+    try:
+        batch = []
+        for key in client.scan_iter(count=batch_size):
+            if scanned >= max_keys:
+                complete = False
+                break
+            batch.append(key.decode() if isinstance(key, bytes) else key)
+            scanned += 1
+            if len(batch) >= batch_size:
+                _add_memory_usage(client, batch, memory, keys)
+                batch = []
+        if batch:
+            _add_memory_usage(client, batch, memory, keys)
+    except Exception as e:
+        logger.warning(f"Cache key family scan error: {e}")
+        _redis_failed(e)
+        return None
+    
+    families = []
+    for family in set(keys) | set(_KEY_FAMILIES):
+        hits = sum(_sample_value("cache_hits_total", tier, family) for tier in ("local", "redis"))
+        misses = _sample_value("cache_misses_total", "redis", family)
+        families.append({
+            "family": family,
+            "keys": keys[family],
+            "memory_bytes": memory[family],
+            "avg_bytes": memory[family] / keys[family] if keys[family] else 0,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / (hits + misses) if hits + misses else None,
+        })
+    families.sort(key=lambda item: (item["memory_bytes"], item["keys"]), reverse=True)
+    return {"keys_scanned": scanned, "complete": complete, "families": families}
+
+
+def _add_memory_usage(client: redis.Redis, batch: List[str], memory: "Tally[str]", keys: "Tally[str]"):
+    pipe = client.pipeline(transaction=False)
+    for key in batch:
+        pipe.memory_usage(key)
+    for key, used in zip(batch, pipe.execute()):
+        # None: the key expired between SCAN and MEMORY USAGE
+        if used is not None:
+            family = key_family(key)
+            memory[family] += used
+            keys[family] += 1
+
 
+def _sample_value(name: str, tier: str, family: str) -> float:
+    return REGISTRY.get_sample_value(name, {"tier": tier, "family": family}) or 0.0
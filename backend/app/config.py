@@ -4,6 +4,10 @@ from pydantic import Field
 from typing import Optional
 import os
 
+# backend/ directory; relative data paths that must not depend on the working
+# directory are resolved against it
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 
 class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
@@ -16,17 +20,67 @@ class Settings(BaseSettings):
     
     # Database - explicitly map DATABASE_URL env var
     database_url: str = Field(..., validation_alias="DATABASE_URL")
+    # Analytics reads (dashboards, exports) go here when set
+    database_read_replica_url: Optional[str] = Field(None, validation_alias="DATABASE_READ_REPLICA_URL")
+    
+    # Connection pool per workload: OLTP (API requests, scoring), analytics
+    # (dashboards, exports) and background jobs (relays, writers, maintenance)
+    db_oltp_pool_size: int = Field(10, validation_alias="DB_OLTP_POOL_SIZE")
+    db_oltp_max_overflow: int = Field(20, validation_alias="DB_OLTP_MAX_OVERFLOW")
+    db_oltp_pool_timeout: float = Field(10.0, validation_alias="DB_OLTP_POOL_TIMEOUT")  # Seconds
+    db_analytics_pool_size: int = Field(5, validation_alias="DB_ANALYTICS_POOL_SIZE")
+    db_analytics_max_overflow: int = Field(5, validation_alias="DB_ANALYTICS_MAX_OVERFLOW")
+    db_analytics_pool_timeout: float = Field(30.0, validation_alias="DB_ANALYTICS_POOL_TIMEOUT")  # Seconds
+    db_background_pool_size: int = Field(5, validation_alias="DB_BACKGROUND_POOL_SIZE")
+    db_background_max_overflow: int = Field(5, validation_alias="DB_BACKGROUND_MAX_OVERFLOW")
+    db_background_pool_timeout: float = Field(30.0, validation_alias="DB_BACKGROUND_POOL_TIMEOUT")  # Seconds
     
     # Redis - optional, defaults to None if not provided
     redis_url: Optional[str] = Field(None, validation_alias="REDIS_URL")
     redis_enabled: bool = Field(True, validation_alias="REDIS_ENABLED")
     redis_cache_ttl: int = Field(3600, validation_alias="REDIS_CACHE_TTL")  # Default 1 hour
+    # Connection pool and circuit breaker: after redis_failure_threshold
+    # consecutive connection errors cache calls skip Redis until a background
+    # reconnect (exponential backoff) succeeds
+    redis_max_connections: int = Field(50, validation_alias="REDIS_MAX_CONNECTIONS")
+    redis_connect_timeout: float = Field(1.0, validation_alias="REDIS_CONNECT_TIMEOUT")  # Seconds
+    redis_socket_timeout: float = Field(1.0, validation_alias="REDIS_SOCKET_TIMEOUT")  # Seconds
+    redis_failure_threshold: int = Field(3, validation_alias="REDIS_FAILURE_THRESHOLD")
+    redis_reconnect_initial_backoff: float = Field(1.0, validation_alias="REDIS_RECONNECT_INITIAL_BACKOFF")  # Seconds
+    redis_reconnect_max_backoff: float = Field(60.0, validation_alias="REDIS_RECONNECT_MAX_BACKOFF")  # Seconds
+    # In-process L1 cache in front of Redis; entries never outlive the Redis
+    # key and are dropped on other workers via pub/sub when keys change
+    cache_local_enabled: bool = Field(True, validation_alias="CACHE_LOCAL_ENABLED")
+    cache_local_max_size: int = Field(10000, validation_alias="CACHE_LOCAL_MAX_SIZE")
+    cache_local_ttl: int = Field(60, validation_alias="CACHE_LOCAL_TTL")  # Seconds, upper bound
+    cache_invalidation_channel: str = Field("cache:invalidate", validation_alias="CACHE_INVALIDATION_CHANNEL")
+    # Cached values at least this large are zlib-compressed (0 disables)
+    cache_compress_min_bytes: int = Field(4096, validation_alias="CACHE_COMPRESS_MIN_BYTES")
+    # Tag sets (for invalidate_tags) live at least this long after their last write
+    cache_tag_ttl: int = Field(86400, validation_alias="CACHE_TAG_TTL")  # Seconds
+    # Stampede protection: longest a recompute may hold a key's lock, and the
+    # XFetch early-refresh factor (0 disables early refresh)
+    cache_lock_timeout: int = Field(30, validation_alias="CACHE_LOCK_TIMEOUT")  # Seconds
+    cache_early_refresh_beta: float = Field(1.0, validation_alias="CACHE_EARLY_REFRESH_BETA")
+    # bcrypt runs on its own executor with this many threads; logins beyond
+    # password_hash_max_pending queued or running get a 503
+    password_hash_workers: int = Field(2, validation_alias="PASSWORD_HASH_WORKERS")
+    password_hash_max_pending: int = Field(32, validation_alias="PASSWORD_HASH_MAX_PENDING")
+    # Authenticated principals (user id, role, active flag) per token; dropped
+    # on user updates. The in-process tier is bounded by cache_local_ttl
+    auth_principal_cache_ttl: int = Field(60, validation_alias="AUTH_PRINCIPAL_CACHE_TTL")  # Seconds
+    auth_principal_cache_size: int = Field(10000, validation_alias="AUTH_PRINCIPAL_CACHE_SIZE")
+    # Per-customer historical stats used by batch scoring are cached this long
+    feature_store_ttl: int = Field(300, validation_alias="FEATURE_STORE_TTL")  # Seconds
     
     # Neo4j - optional, defaults to None if not provided
     neo4j_uri: Optional[str] = Field(None, validation_alias="NEO4J_URI")
     neo4j_user: Optional[str] = Field(None, validation_alias="NEO4J_USER")
     neo4j_password: Optional[str] = Field(None, validation_alias="NEO4J_PASSWORD")
     neo4j_enabled: bool = Field(False, validation_alias="NEO4J_ENABLED")
+    graph_outbox_batch_size: int = Field(500, validation_alias="GRAPH_OUTBOX_BATCH_SIZE")
+    graph_outbox_poll_interval: float = Field(1.0, validation_alias="GRAPH_OUTBOX_POLL_INTERVAL")  # Seconds
+    graph_outbox_max_backoff: int = Field(300, validation_alias="GRAPH_OUTBOX_MAX_BACKOFF")  # Seconds
     
     # JWT - explicitly map JWT_SECRET env var
     jwt_secret: str = Field(..., validation_alias="JWT_SECRET")
@@ -43,9 +97,53 @@ class Settings(BaseSettings):
     feature_scaler_path: str = "models/feature_scaler.pkl"
     anomaly_threshold_percentile: float = 95.0
     classifier_model_path: Optional[str] = None
+    # Progress of resumable Neo4j resyncs; relative paths are under BACKEND_DIR
+    graph_sync_checkpoint_path: str = Field(
+        "models/graph_sync_checkpoint.json", validation_alias="GRAPH_SYNC_CHECKPOINT_PATH"
+    )
     
     # Monitoring
     metrics_enabled: bool = True
+    
+    # Audit logging: "sync" commits each event in the caller's session,
+    # "buffered" group-commits events from a background writer
+    audit_default_durability: str = Field("sync", validation_alias="AUDIT_DEFAULT_DURABILITY")
+    audit_flush_interval_ms: int = Field(50, validation_alias="AUDIT_FLUSH_INTERVAL_MS")
+    audit_batch_size: int = Field(500, validation_alias="AUDIT_BATCH_SIZE")
+    audit_queue_size: int = Field(10000, validation_alias="AUDIT_QUEUE_SIZE")
+    # How long submit waits for queue space before dropping (and counting) an event
+    audit_enqueue_timeout_ms: int = Field(5, validation_alias="AUDIT_ENQUEUE_TIMEOUT_MS")
+    # A failed batch is retried this many times (backoff doubling from
+    # audit_retry_backoff_ms) before its events are written one by one
+    audit_write_retries: int = Field(2, validation_alias="AUDIT_WRITE_RETRIES")
+    audit_retry_backoff_ms: int = Field(100, validation_alias="AUDIT_RETRY_BACKOFF_MS")
+
+    # Dashboard time series: read closed buckets from TimescaleDB continuous
+    # aggregates when present (set false to always query raw rows)
+    timeseries_continuous_aggregates: bool = Field(True, validation_alias="TIMESERIES_CONTINUOUS_AGGREGATES")
+
+    # Time-series storage for transactions/audit_log: "timescale" (hypertables),
+    # "partitioned" (native monthly range partitions, for PostgreSQL without
+    # TimescaleDB) or "plain". Read by migrations and at startup.
+    timeseries_backend: str = Field("timescale", validation_alias="TIMESERIES_BACKEND")
+    partition_months_ahead: int = Field(3, validation_alias="PARTITION_MONTHS_AHEAD")
+    partition_maintenance_interval: int = Field(21600, validation_alias="PARTITION_MAINTENANCE_INTERVAL")  # Seconds
+
+    # Dashboard KPI counters are recomputed from source tables this often,
+    # covering this many most recent days; the all-time risk-level counts are
+    # recomputed every dashboard_counter_totals_interval
+    dashboard_counter_reconcile_interval: int = Field(300, validation_alias="DASHBOARD_COUNTER_RECONCILE_INTERVAL")  # Seconds
+    dashboard_counter_reconcile_days: int = Field(2, validation_alias="DASHBOARD_COUNTER_RECONCILE_DAYS")
+    # Rows each counter is spread over so concurrent ingests don't queue on one row lock
+    dashboard_counter_shards: int = Field(16, validation_alias="DASHBOARD_COUNTER_SHARDS")
+    dashboard_counter_totals_interval: int = Field(3600, validation_alias="DASHBOARD_COUNTER_TOTALS_INTERVAL")  # Seconds
+
+    # Cold-tier archive: chunks older than archive_after_days are exported to
+    # Parquet under archive_uri (local path or e.g. s3://bucket/prefix) and
+    # dropped. Unset disables the archive
+    archive_uri: Optional[str] = Field(None, validation_alias="ARCHIVE_URI")
+    archive_after_days: int = Field(365, validation_alias="ARCHIVE_AFTER_DAYS")
+    archive_chunk_size: int = Field(10000, validation_alias="ARCHIVE_CHUNK_SIZE")
 
     # Demo data
     demo_data_enabled: bool = Field(True, validation_alias="DEMO_DATA_ENABLED")
@@ -1,17 +1,114 @@
-"""Database connection and session management."""
-from sqlalchemy import create_engine
+"""Database connection and session management.
+
+Each workload has its own engine and connection pool, so a burst in one (a
+dashboard storm, a large export) cannot starve another (transaction scoring):
+
+- ``oltp``: API requests and scoring (``engine``, ``SessionLocal``, ``get_db``)
+- ``analytics``: dashboards and exports, on the read replica when
+  configured (``AnalyticsSessionLocal``, ``get_lazy_analytics_db``)
+- ``background``: relays, writers and maintenance threads (``BackgroundSessionLocal``)
+
+Routers take sessions from ``get_lazy_db`` / ``get_lazy_analytics_db``: the
+session is only created when the handler first touches it, so requests served
+from the cache never check out a connection.
+"""
+import time
+from typing import Any, Callable, Optional
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
+from starlette.concurrency import run_in_threadpool
 from app.config import settings
 
-engine = create_engine(
-    settings.database_url,
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
+pool_checkout_wait = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting to check out a pooled connection",
+    ["pool"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0),
+)
+pool_checkout_timeouts = Counter(
+    "db_pool_checkout_timeouts_total",
+    "Checkouts that gave up waiting for a connection",
+    ["pool"],
+)
+pool_connections_opened = Counter(
+    "db_pool_connections_opened_total",
+    "New DBAPI connections opened by the pool",
+    ["pool"],
+)
+pool_checked_out = Gauge("db_pool_checked_out", "Connections currently checked out", ["pool"])
+pool_overflow = Gauge("db_pool_overflow", "Connections open beyond pool_size", ["pool"])
+pool_size = Gauge("db_pool_size", "Configured pool size", ["pool"])
+lazy_sessions = Counter(
+    "db_lazy_sessions_total",
+    "Request sessions handed out lazily, by whether the handler used them",
+    ["pool", "used"],
+)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records checkout wait time and timeouts per workload."""
+
+    pool_name = "default"
+
+    def _do_get(self):
+        began = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            pool_checkout_timeouts.labels(pool=self.pool_name).inc()
+            raise
+        finally:
+            pool_checkout_wait.labels(pool=self.pool_name).observe(time.perf_counter() - began)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.pool_name = self.pool_name
+        return pool
+
+
+def create_workload_engine(name: str, url: str, size: int, max_overflow: int, timeout: float):
+    """Engine with its own instrumented pool, labelled ``name`` in metrics."""
+    workload_engine = create_engine(
+        url,
+        pool_pre_ping=True,
+        poolclass=InstrumentedQueuePool,
+        pool_size=size,
+        max_overflow=max_overflow,
+        pool_timeout=timeout,
+    )
+    workload_engine.pool.pool_name = name
+
+    @event.listens_for(workload_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        pool_connections_opened.labels(pool=name).inc()
+
+    # Read from whichever pool the engine currently holds (dispose() replaces it)
+    pool_checked_out.labels(pool=name).set_function(lambda: workload_engine.pool.checkedout())
+    pool_overflow.labels(pool=name).set_function(lambda: max(0, workload_engine.pool.overflow()))
+    pool_size.labels(pool=name).set(size)
+    return workload_engine
+
+
+engine = create_workload_engine(
+    "oltp", settings.database_url,
+    settings.db_oltp_pool_size, settings.db_oltp_max_overflow, settings.db_oltp_pool_timeout,
+)
+analytics_engine = create_workload_engine(
+    "analytics", settings.database_read_replica_url or settings.database_url,
+    settings.db_analytics_pool_size, settings.db_analytics_max_overflow, settings.db_analytics_pool_timeout,
+)
+background_engine = create_workload_engine(
+    "background", settings.database_url,
+    settings.db_background_pool_size, settings.db_background_max_overflow, settings.db_background_pool_timeout,
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AnalyticsSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=analytics_engine)
+BackgroundSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=background_engine)
 
 Base = declarative_base()
 
@@ -24,3 +121,52 @@ def get_db():
     finally:
         db.close()
 
+
+class LazySession:
+    """Stand-in for a ``Session`` that creates the real one on first use.
+    
+    Attribute access is forwarded to the real session, so handlers use it
+    exactly like a ``Session``.
+    """
+    
+    def __init__(self, factory: Callable[[], Session]):
+        self._factory = factory
+        self._session: Optional[Session] = None
+    
+    @property
+    def started(self) -> bool:
+        return self._session is not None
+    
+    def __getattr__(self, name: str) -> Any:
+        if self._session is None:
+            self._session = self._factory()
+        return getattr(self._session, name)
+    
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+
+
+async def _close_lazy(db: LazySession, pool: str):
+    lazy_sessions.labels(pool=pool, used=str(db.started).lower()).inc()
+    if db.started:
+        # Closing returns the connection (a rollback round trip): not on the event loop
+        await run_in_threadpool(db.close)
+
+
+async def get_lazy_db():
+    """Dependency for a session that is only opened if the handler uses it."""
+    db = LazySession(SessionLocal)
+    try:
+        yield db
+    finally:
+        await _close_lazy(db, "oltp")
+
+
+async def get_lazy_analytics_db():
+    """Dependency for a lazily opened analytics session (read replica when configured)."""
+    db = LazySession(AnalyticsSessionLocal)
+    try:
+        yield db
+    finally:
+        await _close_lazy(db, "analytics")
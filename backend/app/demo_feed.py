@@ -14,7 +14,8 @@ from typing import Dict, List, Optional, Tuple
 
 import httpx
 
-from app.database import SessionLocal
+from app.cache import invalidate_tags_on_commit, entity_tag
+from app.database import BackgroundSessionLocal
 from app.models import (
     Transaction,
     Score,
@@ -25,7 +26,9 @@ from app.models import (
     CaseTransaction,
     CaseStatus,
 )
-from app.services.entity_sync import sync_entity_to_graph, sync_entity_link_to_graph
+from app.services.dashboard_counters import record_case_status, record_transactions
+from app.services.feature_store import record_velocity
+from app.services.graph_outbox import enqueue_entity, enqueue_entity_link
 
 logger = logging.getLogger(__name__)
 
@@ -318,7 +321,7 @@ def ensure_entity(
         )
         db.add(entity)
         db.flush()
-        sync_entity_to_graph(entity)
+        enqueue_entity(db, entity)
 
     cache[cache_key] = entity
     return entity
@@ -351,7 +354,9 @@ def ensure_link(
         )
         db.add(link)
         db.flush()
-        sync_entity_link_to_graph(link, db)
+        enqueue_entity_link(db, link, from_entity, to_entity)
+        # Cached networks of both entities now miss this link
+        invalidate_tags_on_commit(db, entity_tag(from_entity.id), entity_tag(to_entity.id))
 
     cache[cache_key] = link
 
@@ -378,6 +383,7 @@ def create_case_for_transaction(
     )
     db.add(case)
     db.flush()
+    record_case_status(db, None, case.status)
 
     db.add(
         CaseTransaction(
@@ -396,10 +402,11 @@ def insert_transactions(
     rng: random.Random,
 ) -> int:
     """Insert transactions and associated scores into the database."""
-    db = SessionLocal()
+    db = BackgroundSessionLocal()
     created = 0
     entity_cache: Dict[str, Entity] = {}
     link_cache: Dict[str, EntityLink] = {}
+    ingested: List[Transaction] = []
 
     try:
         for payload in payloads:
@@ -419,6 +426,10 @@ def insert_transactions(
                 feature_contributions=score_payload["feature_contributions"],
             )
             db.add(score)
+            transaction.risk_level = score.risk_level
+            transaction.anomaly_score = score.anomaly_score
+            transaction.decision = score.decision
+            ingested.append(transaction)
 
             if create_cases:
                 create_case_for_transaction(db, transaction, score, case_rate, rng)
@@ -448,7 +459,9 @@ def insert_transactions(
 
             created += 1
 
+        record_transactions(db, ingested)
         db.commit()
+        record_velocity(ingested)
         logger.info("Inserted %s transactions", created)
     except Exception as exc:
         db.rollback()
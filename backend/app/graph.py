@@ -123,6 +123,68 @@ class GraphService:
             "metadata": _serialize_metadata(metadata)
         })
     
+    def sync_entities_batch(self, entities: List[Dict[str, Any]]):
+        """Create or update many entity nodes in a single round trip.
+
+        Each item needs ``entity_id``, ``entity_type``, ``name`` and ``metadata``.
+        """
+        if not self.driver or not entities:
+            return
+
+        query = """
+        UNWIND $rows AS row
+        MERGE (e:Entity {entity_id: row.entity_id})
+        SET e.entity_type = row.entity_type,
+            e.name = row.name,
+            e.metadata = row.metadata,
+            e.updated_at = datetime()
+        """
+
+        rows = [
+            {
+                "entity_id": item["entity_id"],
+                "entity_type": item.get("entity_type") or "",
+                "name": item.get("name") or "",
+                "metadata": _serialize_metadata(item.get("metadata")),
+            }
+            for item in entities
+        ]
+        self._execute_write(query, {"rows": rows})
+
+    def sync_entity_links_batch(self, links: List[Dict[str, Any]]):
+        """Create or update many relationships in a single round trip.
+
+        Each item needs ``from_entity_id``, ``to_entity_id``, ``relationship_type``
+        and ``metadata``. Missing endpoint nodes are created, as in ``sync_entity_link``.
+        """
+        if not self.driver or not links:
+            return
+
+        query = """
+        UNWIND $rows AS row
+        MERGE (from:Entity {entity_id: row.from_id})
+        MERGE (to:Entity {entity_id: row.to_id})
+        MERGE (from)-[r:RELATES_TO {type: row.rel_type}]->(to)
+        SET r.metadata = row.metadata,
+            r.created_at = coalesce(r.created_at, datetime())
+        """
+
+        rows = [
+            {
+                "from_id": item["from_entity_id"],
+                "to_id": item["to_entity_id"],
+                "rel_type": item.get("relationship_type") or "RELATES_TO",
+                "metadata": _serialize_metadata(item.get("metadata")),
+            }
+            for item in links
+        ]
+        self._execute_write(query, {"rows": rows})
+
+    def _execute_write(self, query: str, parameters: Dict[str, Any]):
+        """Run a write query, raising on failure so batch callers can retry."""
+        with self.driver.session() as session:
+            session.execute_write(lambda tx: tx.run(query, parameters).consume())
+
     def get_entity_network(self, entity_id: str, max_depth: int = 2) -> Dict:
         """Get entity network graph up to max_depth hops."""
         if not self.driver:
@@ -9,11 +9,20 @@ from app.routers import dashboard_metrics
 from app.routers import demo_feed
 from app.routers import app_control
 from app.routers import demo_data
+from app.routers import exports
+from app.routers import cache_admin
 from app.app_control import app_status
+from app.auth import shutdown_password_executor
 from fastapi import Request, HTTPException
 from app.database import engine, Base
-from app.cache import get_redis_client
+from app.cache import (
+    get_redis_client, close_redis, aclose_redis, start_invalidation_listener, stop_invalidation_listener,
+)
 from app.graph import get_graph_driver
+from app.services.graph_outbox import start_outbox_relay, stop_outbox_relay
+from app.services.dashboard_counters import start_counter_reconciler, stop_counter_reconciler
+from app.services.partitions import BACKEND_PARTITIONED, start_partition_maintainer, stop_partition_maintainer
+from app.audit import shutdown_audit_writer
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +37,8 @@ async def lifespan(app: FastAPI):
     redis_client = get_redis_client()
     if redis_client:
         logger.info("Redis cache enabled")
+        # Drop local cache entries when other workers change keys
+        start_invalidation_listener()
     else:
         logger.info("Redis cache disabled (not configured)")
     
@@ -38,10 +49,29 @@ async def lifespan(app: FastAPI):
     else:
         logger.info("Neo4j graph database disabled (not configured)")
     
+    # Relay queued graph writes; it reconnects on its own if Neo4j is down
+    if settings.neo4j_enabled:
+        start_outbox_relay()
+    
+    # Keep incrementally maintained dashboard counters in line with the tables
+    start_counter_reconciler()
+    
+    # Create upcoming monthly partitions before rows need them
+    if settings.timeseries_backend == BACKEND_PARTITIONED:
+        start_partition_maintainer()
+    
     yield
     
     # Shutdown
     logger.info("Shutting down services...")
+    shutdown_audit_writer()
+    stop_outbox_relay()
+    stop_counter_reconciler()
+    stop_partition_maintainer()
+    stop_invalidation_listener()
+    shutdown_password_executor()
+    await aclose_redis()
+    close_redis()
     if graph_driver:
         graph_driver.close()
         logger.info("Neo4j connection closed")
@@ -91,6 +121,8 @@ app.include_router(dashboard_metrics.router, prefix=settings.api_prefix)
 app.include_router(demo_feed.router, prefix=settings.api_prefix)
 app.include_router(app_control.router, prefix=settings.api_prefix)
 app.include_router(demo_data.router, prefix=settings.api_prefix)
+app.include_router(exports.router, prefix=settings.api_prefix)
+app.include_router(cache_admin.router, prefix=settings.api_prefix)
 
 
 @app.get("/healthz")
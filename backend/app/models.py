@@ -1,6 +1,6 @@
 """SQLAlchemy database models."""
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Text, JSON, Enum as SQLEnum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime, Boolean, ForeignKey, Text, JSON, Index, Enum as SQLEnum
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 from datetime import datetime
 import enum
@@ -50,12 +50,29 @@ class Transaction(Base):
     ip_address = Column(String)
     geo_country = Column(String(2))
     geo_city = Column(String)
-    timestamp = Column(DateTime, nullable=False, index=True)
+    timestamp = Column(DateTime, nullable=False)
     created_at = Column(DateTime, server_default=func.now())
+    # Copied from the score at scoring time so aggregations avoid joining scores
+    risk_level = Column(SQLEnum(RiskLevel))
+    anomaly_score = Column(Float)
+    decision = Column(String)
     
     # Relationships
     score = relationship("Score", back_populates="transaction", uselist=False)
     case_transactions = relationship("CaseTransaction", back_populates="transaction")
+    
+    __table_args__ = (
+        # Keyset pagination: (sort key, id), optionally scoped by a filter column.
+        # The customer index also serves velocity and previous-transaction lookups.
+        Index("ix_transactions_timestamp_id", "timestamp", "id"),
+        Index("ix_transactions_merchant_timestamp_id", "merchant_id", "timestamp", "id"),
+        Index("ix_transactions_customer_timestamp_id", "customer_id", "timestamp", "id"),
+        # Per-device / per-account history, newest first
+        Index("ix_transactions_device_timestamp", "device_id", timestamp.desc()),
+        Index("ix_transactions_account_timestamp", "account_id", timestamp.desc()),
+        # Risk-filtered listings and high-risk counts over a time range
+        Index("ix_transactions_risk_level_timestamp", "risk_level", "timestamp"),
+    )
 
 
 class Score(Base):
@@ -74,6 +91,16 @@ class Score(Base):
     
     # Relationships
     transaction = relationship("Transaction", back_populates="score")
+    
+    __table_args__ = (
+        # Only ~high/critical scores drive dashboards and alerting; keep that index small
+        Index(
+            "ix_scores_high_risk_transaction_id",
+            "transaction_id",
+            postgresql_where=risk_level.in_([RiskLevel.HIGH, RiskLevel.CRITICAL]),
+            sqlite_where=risk_level.in_([RiskLevel.HIGH, RiskLevel.CRITICAL]),
+        ),
+    )
 
 
 class Entity(Base):
@@ -110,6 +137,33 @@ class EntityLink(Base):
     to_entity = relationship("Entity", foreign_keys=[to_entity_id], back_populates="links_to")
 
 
+class GraphOutbox(Base):
+    """Pending Neo4j writes, recorded in the same transaction as the entity/link change."""
+    __tablename__ = "graph_outbox"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    event_type = Column(String, nullable=False)  # entity, entity_link
+    # The node or relationship written; events for one key are relayed in id order
+    aggregate_key = Column(String, nullable=False, index=True)
+    payload = Column(JSON, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text)
+    next_attempt_at = Column(DateTime, server_default=func.now(), nullable=False, index=True)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+
+class MetricCounter(Base):
+    """Incrementally maintained dashboard counter, e.g. ("transactions_day", "2026-01-31")."""
+    __tablename__ = "metric_counters"
+    
+    scope = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    # Rows of one counter are summed; see dashboard_counters
+    shard = Column(Integer, primary_key=True, default=0)
+    value = Column(BigInteger, default=0, nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
 class Case(Base):
     """Case model for investigations."""
     __tablename__ = "cases"
@@ -131,6 +185,12 @@ class Case(Base):
     events = relationship("CaseEvent", back_populates="case", order_by="CaseEvent.created_at")
     case_transactions = relationship("CaseTransaction", back_populates="case")
     case_entities = relationship("CaseEntity", back_populates="case")
+    
+    # Keyset pagination indexes
+    __table_args__ = (
+        Index("ix_cases_created_at_id", "created_at", "id"),
+        Index("ix_cases_status_created_at_id", "status", "created_at", "id"),
+    )
 
 
 class CaseEvent(Base):
@@ -157,7 +217,7 @@ class CaseTransaction(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     case_id = Column(Integer, ForeignKey("cases.id"), nullable=False)
-    transaction_id = Column(Integer, ForeignKey("transactions.id"), nullable=False)
+    transaction_id = Column(Integer, ForeignKey("transactions.id"), nullable=False, index=True)
     added_at = Column(DateTime, server_default=func.now())
     added_by_id = Column(Integer, ForeignKey("users.id"))
     
@@ -198,6 +258,13 @@ class User(Base):
     # Relationships
     owned_cases = relationship("Case", back_populates="owner")
     case_events = relationship("CaseEvent", back_populates="created_by")
+    
+    @validates("username")
+    def validate_username(self, key, username):
+        # Audit rows and the audit username cache rely on usernames never changing
+        if self.username is not None and username != self.username:
+            raise ValueError("Usernames cannot be changed")
+        return username
 
 
 class AuditLog(Base):
@@ -0,0 +1,49 @@
+"""Keyset (cursor) pagination helpers.
+
+A cursor is an opaque, URL-safe token holding the ``(sort_value, id)`` of the
+last row on the previous page. The next page is fetched with a row-value
+comparison, ``(sort_column, id) < (sort_value, id)``, which a composite
+``(sort_column, id)`` index turns into a range scan starting right where the
+previous page ended, so page 10,000 costs the same as page 1.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort_value: datetime, row_id: int) -> str:
+    """Encode the position of a row as an opaque cursor."""
+    raw = json.dumps([sort_value.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor produced by ``encode_cursor``."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def apply_keyset(query: Query, sort_column, id_column, cursor: Optional[str]) -> Query:
+    """Order newest-first by ``(sort_column, id_column)`` and seek past ``cursor``."""
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        query = query.filter(tuple_(sort_column, id_column) < tuple_(sort_value, row_id))
+    return query.order_by(sort_column.desc(), id_column.desc())
+
+
+def next_cursor(rows: List[Any], limit: int, sort_attr: str) -> Optional[str]:
+    """Cursor for the page after ``rows``, or None when this was the last page."""
+    if len(rows) < limit or not rows:
+        return None
+    last = rows[-1]
+    return encode_cursor(getattr(last, sort_attr), last.id)
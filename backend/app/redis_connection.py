@@ -0,0 +1,171 @@
+"""Redis connection management with a circuit breaker.
+
+Requests never wait on a dead Redis: after ``REDIS_FAILURE_THRESHOLD``
+consecutive connection errors the circuit opens and ``client()`` returns None
+immediately (callers treat that as a cache miss). A background thread probes
+Redis with exponential backoff and closes the circuit once a ping succeeds.
+Connections come from one explicit, bounded ``ConnectionPool`` with short
+connect/read timeouts. The asyncio client used by ``async def`` handlers has a
+pool of its own but shares the circuit breaker.
+"""
+import logging
+import threading
+from typing import Optional
+import redis
+import redis.asyncio
+from prometheus_client import Counter, Gauge
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_HALF_OPEN = "half_open"
+CIRCUIT_OPEN = "open"
+
+_STATE_VALUES = {CIRCUIT_CLOSED: 0, CIRCUIT_HALF_OPEN: 1, CIRCUIT_OPEN: 2}
+
+circuit_state = Gauge("redis_circuit_state", "Redis circuit breaker state (0 closed, 1 half-open, 2 open)")
+circuit_transitions = Counter(
+    "redis_circuit_transitions_total",
+    "Redis circuit breaker state changes, by new state",
+    ["state"],
+)
+connection_failures = Counter("redis_connection_failures_total", "Redis connection and timeout errors")
+
+# Errors that say Redis is unreachable, as opposed to a bad command
+CONNECTION_ERRORS = (redis.ConnectionError, redis.TimeoutError, OSError)
+
+
+class RedisConnectionManager:
+    """Owns the Redis connection pool and the circuit breaker around it."""
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        failure_threshold: Optional[int] = None,
+        initial_backoff: Optional[float] = None,
+        max_backoff: Optional[float] = None,
+    ):
+        self.url = url or settings.redis_url
+        self.failure_threshold = failure_threshold or settings.redis_failure_threshold
+        self.initial_backoff = initial_backoff or settings.redis_reconnect_initial_backoff
+        self.max_backoff = max_backoff or settings.redis_reconnect_max_backoff
+        self.state = CIRCUIT_CLOSED
+        self._client: Optional[redis.Redis] = None
+        self._async_client: Optional[redis.asyncio.Redis] = None
+        self._failures = 0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._reconnect_thread: Optional[threading.Thread] = None
+        circuit_state.set(_STATE_VALUES[self.state])
+
+    def _pool_options(self) -> dict:
+        return {
+            "max_connections": settings.redis_max_connections,
+            "socket_connect_timeout": settings.redis_connect_timeout,
+            "socket_timeout": settings.redis_socket_timeout,
+            "health_check_interval": 30,
+        }
+
+    def _connect(self) -> redis.Redis:
+        pool = redis.ConnectionPool.from_url(self.url, **self._pool_options())
+        client = redis.Redis(connection_pool=pool)
+        try:
+            client.ping()
+        except Exception:
+            pool.disconnect()
+            raise
+        return client
+
+    def client(self) -> Optional[redis.Redis]:
+        """The Redis client, or None while the circuit is open."""
+        if self.state != CIRCUIT_CLOSED:
+            return None
+        if self._client is None:
+            with self._lock:
+                if self._client is None and self.state == CIRCUIT_CLOSED:
+                    try:
+                        self._client = self._connect()
+                        logger.info("Redis connection established")
+                    except Exception as e:
+                        connection_failures.inc()
+                        logger.warning(f"Redis connection failed: {e}. Cache disabled until it recovers.")
+                        self._open()
+        return self._client if self.state == CIRCUIT_CLOSED else None
+
+    def async_client(self) -> Optional[redis.asyncio.Redis]:
+        """The asyncio Redis client, or None while the circuit is open.
+
+        Connections are opened lazily by the pool; the first call goes through
+        ``client()`` so an unreachable Redis opens the circuit as usual.
+        """
+        if self.client() is None:
+            return None
+        if self._async_client is None:
+            with self._lock:
+                if self._async_client is None:
+                    pool = redis.asyncio.ConnectionPool.from_url(self.url, **self._pool_options())
+                    self._async_client = redis.asyncio.Redis(connection_pool=pool)
+        return self._async_client
+
+    def record_success(self):
+        self._failures = 0
+
+    def record_failure(self, error: BaseException):
+        """Count a failed operation; connection errors eventually open the circuit."""
+        if not isinstance(error, CONNECTION_ERRORS):
+            return
+        connection_failures.inc()
+        with self._lock:
+            self._failures += 1
+            if self.state == CIRCUIT_CLOSED and self._failures >= self.failure_threshold:
+                logger.warning(f"Redis circuit opened after {self._failures} consecutive failures: {error}")
+                self._open()
+
+    def _set_state(self, state: str):
+        if state != self.state:
+            self.state = state
+            circuit_state.set(_STATE_VALUES[state])
+            circuit_transitions.labels(state=state).inc()
+
+    def _open(self):
+        """Open the circuit and start probing (caller holds the lock)."""
+        self._set_state(CIRCUIT_OPEN)
+        if self._reconnect_thread and self._reconnect_thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._reconnect_thread = threading.Thread(target=self._reconnect, name="redis-reconnect", daemon=True)
+        self._reconnect_thread.start()
+
+    def _reconnect(self):
+        backoff = self.initial_backoff
+        while not self._stop_event.wait(backoff):
+            self._set_state(CIRCUIT_HALF_OPEN)
+            try:
+                if self._client is None:
+                    self._client = self._connect()
+                else:
+                    self._client.ping()
+            except Exception as e:
+                connection_failures.inc()
+                self._set_state(CIRCUIT_OPEN)
+                backoff = min(backoff * 2, self.max_backoff)
+                logger.debug(f"Redis reconnect failed, retrying in {backoff:.0f}s: {e}")
+                continue
+            with self._lock:
+                self._failures = 0
+                self._set_state(CIRCUIT_CLOSED)
+            logger.info("Redis connection restored")
+            return
+
+    def close(self, timeout: float = 5.0):
+        self._stop_event.set()
+        if self._reconnect_thread:
+            self._reconnect_thread.join(timeout)
+        if self._client is not None:
+            self._client.connection_pool.disconnect()
+
+    async def aclose(self):
+        """Close pooled asyncio connections (call from the event loop that used them)."""
+        if self._async_client is not None:
+            await self._async_client.connection_pool.disconnect()
@@ -2,10 +2,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_lazy_db
 from app.models import User
 from app.schemas import LoginResponse, UserResponse, UserCreate
-from app.auth import authenticate_user, create_access_token, get_password_hash, get_current_user
+from app.auth import Principal, authenticate_user, create_access_token, get_current_user
 from datetime import timedelta
 from app.config import settings
 
@@ -15,10 +15,10 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 @router.post("/login", response_model=LoginResponse)
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_lazy_db)
 ):
     """Login endpoint."""
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -39,7 +39,13 @@ async def login(
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_lazy_db)
+):
     """Get current user information."""
-    return current_user
+    user = db.query(User).filter(User.id == current_user.id).first()
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    return user
 
@@ -0,0 +1,25 @@
+"""Cache administration endpoints."""
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.auth import Principal, UserRole, require_role
+from app.cache import key_family_stats
+
+router = APIRouter(prefix="/cache", tags=["cache"])
+
+
+@router.get("/families")
+def get_key_families(
+    limit: int = Query(10, ge=1, le=100),
+    max_keys: int = Query(10000, ge=1, le=1000000),
+    current_user: Principal = Depends(require_role(UserRole.ADMIN))
+):
+    """Top cache key families by Redis memory, with key counts and hit ratios.
+    
+    Sizes come from sampling up to ``max_keys`` keys; hit ratios are this
+    worker's counts since it started.
+    """
+    stats = key_family_stats(max_keys=max_keys)
+    if stats is None:
+        raise HTTPException(status_code=503, detail="Redis cache not available")
+    stats["families"] = stats["families"][:limit]
+    return stats
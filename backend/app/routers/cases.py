@@ -1,19 +1,23 @@
 """Case management API endpoints."""
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from app.database import get_db
+from typing import List, Optional, Union
+from app.database import get_lazy_db
 from app.models import Case, CaseEvent, CaseTransaction, Transaction, Entity, CaseEntity
 from app.schemas import (
     CaseCreate, CaseUpdate, CaseResponse, CaseEventCreate, CaseEventResponse,
-    CaseReportResponse, TransactionResponse, EntityResponse
+    CaseReportResponse, TransactionResponse, EntityResponse, CasePage
 )
-from app.auth import get_current_user, require_role, User, UserRole
+from app.auth import get_current_user, require_role, Principal, UserRole
 from app.config import settings
 from app.agents import InvestigationAgent
 from app.audit import log_audit_event
+from app.cache import aget_cache_raw, aset_cache, invalidate_tags_on_commit, case_tag, entity_tag, CacheKeys
 from app.models import CaseStatus
 from app.demo_data import get_demo_cases
+from app.pagination import apply_keyset, next_cursor, CURSOR_HEADER
+from app.services.archive import get_archived_transactions
+from app.services.dashboard_counters import record_case_status
 
 router = APIRouter(prefix="/cases", tags=["cases"])
 
@@ -31,8 +35,8 @@ def get_investigation_agent() -> InvestigationAgent:
 @router.post("", response_model=CaseResponse)
 async def create_case(
     case_data: CaseCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(UserRole.INVESTIGATOR, UserRole.ADMIN))
+    db: Session = Depends(get_lazy_db),
+    current_user: Principal = Depends(require_role(UserRole.INVESTIGATOR, UserRole.ADMIN))
 ):
     """Create a new case."""
     from datetime import datetime
@@ -49,6 +53,7 @@ async def create_case(
     )
     
     db.add(case)
+    record_case_status(db, None, case.status)
     db.commit()
     db.refresh(case)
     
@@ -64,41 +69,62 @@ async def create_case(
     return case
 
 
-@router.get("", response_model=List[CaseResponse])
+@router.get("", response_model=Union[List[CaseResponse], CasePage])
 async def list_cases(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     status: Optional[CaseStatus] = None,
+    cursor: Optional[str] = Query(
+        None,
+        description="Keyset cursor. Pass an empty value for the first page; the response is then "
+                    "a page object with next_cursor. Without it, skip/limit offset paging is used.",
+    ),
     demo: Optional[bool] = Query(False),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_lazy_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    """List cases."""
+    """List cases, newest first by (created_at, id)."""
+    keyset = cursor is not None
     if demo:
         demo_cases = get_demo_cases()
         if status:
             demo_cases = [case for case in demo_cases if case["status"] == status]
         if demo_cases:
-            return demo_cases[skip : skip + limit]
+            return _case_page(demo_cases[skip : skip + limit], None, keyset)
     query = db.query(Case)
     
     if status:
         query = query.filter(Case.status == status)
     
-    cases = query.order_by(Case.created_at.desc()).offset(skip).limit(limit).all()
-    if settings.demo_data_enabled and not cases:
+    query = apply_keyset(query, Case.created_at, Case.id, cursor)
+    if not keyset:
+        query = query.offset(skip)
+    cases = query.limit(limit).all()
+    if settings.demo_data_enabled and not cases and not cursor:
         demo_cases = get_demo_cases()
         if status:
             demo_cases = [case for case in demo_cases if case["status"] == status]
-        return demo_cases[skip : skip + limit]
-    return cases
+        return _case_page(demo_cases[skip : skip + limit], None, keyset)
+    
+    following = next_cursor(cases, limit, "created_at")
+    if following:
+        response.headers[CURSOR_HEADER] = following
+    return _case_page(cases, following, keyset)
+
+
+def _case_page(items, following: Optional[str], keyset: bool):
+    """Wrap items in a page object for cursor requests; plain list otherwise."""
+    if keyset:
+        return CasePage(items=items, next_cursor=following)
+    return items
 
 
 @router.get("/{case_id}", response_model=CaseResponse)
 async def get_case(
     case_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_lazy_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get a case by ID."""
     case = db.query(Case).filter(Case.id == case_id).first()
@@ -111,8 +137,8 @@ async def get_case(
 async def update_case(
     case_id: int,
     case_update: CaseUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(UserRole.INVESTIGATOR, UserRole.ADMIN))
+    db: Session = Depends(get_lazy_db),
+    current_user: Principal = Depends(require_role(UserRole.INVESTIGATOR, UserRole.ADMIN))
 ):
     """Update a case."""
     case = db.query(Case).filter(Case.id == case_id).first()
@@ -125,6 +151,7 @@ async def update_case(
         "title": case.title
     }
     
+    invalidate_tags_on_commit(db, case_tag(case_id))
     if case_update.title is not None:
         case.title = case_update.title
     if case_update.description is not None:
@@ -165,14 +192,15 @@ async def update_case(
 async def add_case_note(
     case_id: int,
     event_data: CaseEventCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_lazy_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Add a note/event to a case."""
     case = db.query(Case).filter(Case.id == case_id).first()
     if not case:
         raise HTTPException(status_code=404, detail="Case not found")
     
+    invalidate_tags_on_commit(db, case_tag(case_id))
     event = CaseEvent(
         case_id=case_id,
         event_type=event_data.event_type,
@@ -201,16 +229,14 @@ async def add_case_note(
 @router.get("/{case_id}/report", response_model=CaseReportResponse)
 async def get_case_report(
     case_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_lazy_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    """Get a case report. Cached for 5 minutes."""
-    from app.cache import get_cache, set_cache, CacheKeys
-    
+    """Get a case report. Cached for an hour, invalidated when the case or its entities change."""
     cache_key = f"{CacheKeys.CASE_REPORT}:{case_id}"
-    cached_report = get_cache(cache_key)
+    cached_report = await aget_cache_raw(cache_key)
     if cached_report:
-        return cached_report
+        return Response(content=cached_report, media_type="application/json")
     
     case = db.query(Case).filter(Case.id == case_id).first()
     if not case:
@@ -220,6 +246,10 @@ async def get_case_report(
     case_txs = db.query(CaseTransaction).filter(CaseTransaction.case_id == case_id).all()
     transaction_ids = [ct.transaction_id for ct in case_txs]
     transactions = db.query(Transaction).filter(Transaction.id.in_(transaction_ids)).all()
+    # Links to transactions whose chunks were moved to the cold tier
+    missing_ids = set(transaction_ids) - {tx.id for tx in transactions}
+    if missing_ids:
+        transactions.extend(get_archived_transactions(missing_ids))
     
     # Get related entities
     case_entities = db.query(CaseEntity).filter(CaseEntity.case_id == case_id).all()
@@ -246,8 +276,10 @@ async def get_case_report(
         summary=summary
     )
     
-    # Cache for 5 minutes
-    set_cache(cache_key, result, ttl=300)
+    await aset_cache(
+        cache_key, result, ttl=3600,
+        tags=[case_tag(case_id)] + [entity_tag(entity.id) for entity in entities],
+    )
     
     return result
 
@@ -4,7 +4,7 @@ from typing import List, Optional
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel, Field
 
-from app.auth import User, UserRole, require_role
+from app.auth import Principal, UserRole, require_role
 from app.demo_feed import (
     FeedSettings,
     start_feed,
@@ -32,7 +32,7 @@ class DemoFeedStartRequest(BaseModel):
 
 
 @router.get("/status")
-def feed_status(current_user: User = Depends(require_role(UserRole.ADMIN, UserRole.INVESTIGATOR))):
+def feed_status(current_user: Principal = Depends(require_role(UserRole.ADMIN, UserRole.INVESTIGATOR))):
     """Get current demo feed status."""
     return get_feed_status()
 
@@ -40,7 +40,7 @@ def feed_status(current_user: User = Depends(require_role(UserRole.ADMIN, UserRo
 @router.post("/start")
 def feed_start(
     payload: DemoFeedStartRequest,
-    current_user: User = Depends(require_role(UserRole.ADMIN, UserRole.INVESTIGATOR)),
+    current_user: Principal = Depends(require_role(UserRole.ADMIN, UserRole.INVESTIGATOR)),
 ):
     """Start the demo feed in the background."""
     settings = FeedSettings(
@@ -59,6 +59,6 @@ def feed_start(
 
 
 @router.post("/stop")
-def feed_stop(current_user: User = Depends(require_role(UserRole.ADMIN, UserRole.INVESTIGATOR))):
+def feed_stop(current_user: Principal = Depends(require_role(UserRole.ADMIN, UserRole.INVESTIGATOR))):
     """Stop the demo feed."""
     return stop_feed()
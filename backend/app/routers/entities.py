@@ -1,29 +1,68 @@
 """Entity API endpoints."""
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from typing import List
-from app.database import get_db
+from app.database import get_lazy_db
 from app.models import Entity, EntityLink
 from app.schemas import EntityResponse, EntityNetworkResponse
-from app.auth import get_current_user, User
-from app.cache import get_cache, set_cache, delete_cache, CacheKeys
+from app.auth import get_current_user, Principal
+from app.cache import aget_cache_raw, aset_cache, amget_cache_raw, amset_cache, entity_tag, CacheKeys
 from app.graph import get_graph_service
+from app.serialization import dumps
 
 router = APIRouter(prefix="/entities", tags=["entities"])
 
 
+@router.post("/batch", response_model=List[EntityResponse])
+async def get_entities_batch(
+    entity_ids: List[int] = Body(..., embed=True, min_length=1, max_length=1000),
+    db: Session = Depends(get_lazy_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Get several entities by ID, in request order; unknown IDs are skipped.
+    
+    Cached entities are read with one MGET and the rest with one query, then
+    cached with one pipelined write.
+    """
+    entity_ids = list(dict.fromkeys(entity_ids))
+    keys = {entity_id: CacheKeys.ENTITY + f":{entity_id}" for entity_id in entity_ids}
+    cached_entities = await amget_cache_raw(keys.values())
+    
+    payloads = {
+        entity_id: cached_entities[keys[entity_id]]
+        for entity_id in entity_ids if keys[entity_id] in cached_entities
+    }
+    
+    missing = [entity_id for entity_id in entity_ids if entity_id not in payloads]
+    if missing:
+        loaded = {
+            entity.id: EntityResponse.model_validate(entity)
+            for entity in db.query(Entity).filter(Entity.id.in_(missing)).all()
+        }
+        await amset_cache(
+            {keys[entity_id]: entity for entity_id, entity in loaded.items()},
+            ttl=21600,
+            tags={keys[entity_id]: [entity_tag(entity_id)] for entity_id in loaded},
+        )
+        payloads.update((entity_id, dumps(entity)) for entity_id, entity in loaded.items())
+    
+    # Cached entries are already response JSON; join them without re-validating
+    body = b"[" + b",".join(payloads[entity_id] for entity_id in entity_ids if entity_id in payloads) + b"]"
+    return Response(content=body, media_type="application/json")
+
+
 @router.get("/{entity_id}", response_model=EntityResponse)
 async def get_entity(
     entity_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_lazy_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get an entity by ID."""
     # Try cache first
     cache_key = CacheKeys.ENTITY + f":{entity_id}"
-    cached_entity = get_cache(cache_key)
+    cached_entity = await aget_cache_raw(cache_key)
     if cached_entity:
-        return cached_entity
+        return Response(content=cached_entity, media_type="application/json")
     
     # Query database
     entity = db.query(Entity).filter(Entity.id == entity_id).first()
@@ -31,7 +70,7 @@ async def get_entity(
         raise HTTPException(status_code=404, detail="Entity not found")
     
     # Cache result
-    set_cache(cache_key, entity, ttl=3600)
+    await aset_cache(cache_key, entity, ttl=21600, schema=EntityResponse, tags=[entity_tag(entity.id)])
     
     return entity
 
@@ -40,8 +79,8 @@ async def get_entity(
 async def get_entity_network(
     entity_id: int,
     max_depth: int = 2,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_lazy_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get entity network graph. Uses Neo4j if available, falls back to PostgreSQL."""
     # Try Neo4j first if enabled
@@ -62,9 +101,9 @@ async def get_entity_network(
     
     # Fallback to PostgreSQL (original implementation)
     cache_key = CacheKeys.ENTITY_NETWORK + f":{entity_id}:{max_depth}"
-    cached_network = get_cache(cache_key)
+    cached_network = await aget_cache_raw(cache_key)
     if cached_network:
-        return cached_network
+        return Response(content=cached_network, media_type="application/json")
     
     entity = db.query(Entity).filter(Entity.id == entity_id).first()
     if not entity:
@@ -93,8 +132,11 @@ async def get_entity_network(
         links=network_links
     )
     
-    # Cache result
-    set_cache(cache_key, result, ttl=1800)  # 30 minutes
+    # Cache result (6 hours; invalidated when any entity in it gains links)
+    member_ids = {entity.id}
+    for link in links_from + links_to:
+        member_ids.update((link.from_entity_id, link.to_entity_id))
+    await aset_cache(cache_key, result, ttl=21600, tags=[entity_tag(member_id) for member_id in member_ids])
     
     return result
 
@@ -103,8 +145,8 @@ async def get_entity_network(
 async def find_fraud_rings(
     min_entities: int = 3,
     min_connections: int = 2,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_lazy_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Find potential fraud rings using Neo4j graph analysis."""
     graph_service = get_graph_service()
@@ -0,0 +1,69 @@
+"""Bulk export API endpoints."""
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from app.database import get_lazy_db
+from app.auth import require_role, Principal, UserRole
+from app.audit import log_audit_event
+from app.services.export import (
+    stream_transactions_export, check_format, parse_risk_level, EXPORT_FORMATS, DEFAULT_CHUNK_SIZE
+)
+
+router = APIRouter(prefix="/exports", tags=["exports"])
+
+
+@router.get("/transactions")
+async def export_transactions(
+    format: str = Query("ndjson", pattern="^(ndjson|csv|parquet)$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    customer_id: Optional[str] = None,
+    merchant_id: Optional[str] = None,
+    account_id: Optional[str] = None,
+    device_id: Optional[str] = None,
+    risk_level: Optional[str] = None,
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=100, le=100000),
+    db: Session = Depends(get_lazy_db),
+    current_user: Principal = Depends(require_role(UserRole.ADMIN, UserRole.ANALYST, UserRole.INVESTIGATOR))
+):
+    """Stream transactions joined to scores as NDJSON, CSV or Parquet.
+    
+    Rows are read with a server-side cursor and encoded chunk by chunk, so the
+    export size is not limited by API memory.
+    """
+    try:
+        check_format(format)
+        risk_level = parse_risk_level(risk_level)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    filters = {
+        "start": start,
+        "end": end,
+        "customer_id": customer_id,
+        "merchant_id": merchant_id,
+        "account_id": account_id,
+        "device_id": device_id,
+        "risk_level": risk_level.value if risk_level else None,
+    }
+    
+    log_audit_event(
+        db=db,
+        action="export_transactions",
+        resource_type="transaction",
+        resource_id="*",
+        actor_id=current_user.id,
+        metadata={
+            "format": format,
+            **{key: value.isoformat() if isinstance(value, datetime) else value for key, value in filters.items()},
+        }
+    )
+    
+    filename = f"transactions-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.{format}"
+    return StreamingResponse(
+        stream_transactions_export(format, chunk_size=chunk_size, **filters),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,22 +1,27 @@
 """Transaction API endpoints."""
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import exists
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Union
 from datetime import datetime
-from app.database import get_db
-from app.models import Transaction, Score
+from collections import Counter as Tally
+from app.database import get_lazy_db
+from app.models import Transaction, Score, CaseTransaction
 from app.schemas import (
     TransactionCreate, TransactionResponse, TransactionScoreRequest,
-    TransactionScoreResponse, ScoreResponse
+    TransactionBatchScoreRequest, TransactionScoreResponse, ScoreResponse, TransactionPage
 )
-from app.auth import get_current_user, require_role, User, UserRole
+from app.auth import get_current_user, require_role, Principal, UserRole
 from app.scoring import FraudScoringEngine
 from app.features import FeatureEngineer
 from app.autoencoder import Autoencoder
 from app.agents import AnomalyAgent, ComplianceAgent, InvestigationAgent
-from app.audit import log_audit_event
+from app.audit import log_audit_event, DURABILITY_BUFFERED
 from app.config import settings
 from app.demo_data import get_demo_transactions
+from app.pagination import apply_keyset, next_cursor, CURSOR_HEADER
+from app.services.dashboard_counters import record_transactions
+from app.services.feature_store import arecord_velocity, load_historical_stats, load_velocity, scoring_stats
 import os
 
 router = APIRouter(prefix="/transactions", tags=["transactions"])
@@ -77,8 +82,8 @@ def get_investigation_agent() -> InvestigationAgent:
 @router.post("/score", response_model=TransactionScoreResponse)
 async def score_transaction(
     request: TransactionScoreRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_lazy_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Score a transaction for fraud."""
     try:
@@ -104,6 +109,9 @@ async def score_transaction(
             feature_contributions=score_result["feature_contributions"]
         )
         db.add(score)
+        transaction.risk_level = score.risk_level
+        transaction.anomaly_score = score.anomaly_score
+        transaction.decision = score.decision
         
         # Run compliance checks
         compliance_agent = get_compliance_agent()
@@ -133,7 +141,10 @@ async def score_transaction(
             except Exception as e:
                 pass  # Don't fail if case creation fails
         
+        # Last before the commit so the hot counter rows stay locked briefly
+        record_transactions(db, [transaction])
         db.commit()
+        await arecord_velocity([transaction])
         
         # Audit log
         log_audit_event(
@@ -143,7 +154,8 @@ async def score_transaction(
             resource_id=str(transaction.id),
             actor_id=current_user.id,
             after_state={"risk_level": score_result["risk_level"].value},
-            metadata={"anomaly_score": score_result["anomaly_score"]}
+            metadata={"anomaly_score": score_result["anomaly_score"]},
+            durability=DURABILITY_BUFFERED
         )
         
         return TransactionScoreResponse(
@@ -159,11 +171,121 @@ async def score_transaction(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/score/batch", response_model=List[TransactionScoreResponse])
+async def score_transactions_batch(
+    request: TransactionBatchScoreRequest,
+    db: Session = Depends(get_lazy_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Score a batch of transactions for fraud.
+    
+    Customer feature-store reads and velocity counter reads and updates are
+    pipelined for the whole batch, so Redis round trips do not grow with its
+    size. The per-transaction geographic check is left to the
+    single-transaction endpoint.
+    """
+    try:
+        payloads = [item.model_dump() for item in request.transactions]
+        transactions = [Transaction(**payload) for payload in payloads]
+        customer_ids = [t.customer_id for t in transactions]
+        stats = await load_historical_stats(db, customer_ids)
+        velocity = await load_velocity(customer_ids)
+        db.add_all(transactions)
+        db.flush()
+        
+        anomaly_agent = get_anomaly_agent()
+        compliance_agent = get_compliance_agent()
+        scored = []
+        high_risk = []
+        preceding = Tally()
+        for transaction, payload in zip(transactions, payloads):
+            historical_stats = scoring_stats(
+                transaction,
+                stats.get(transaction.customer_id),
+                velocity.get(transaction.customer_id),
+                preceding[transaction.customer_id],
+            )
+            if transaction.customer_id:
+                preceding[transaction.customer_id] += 1
+            score_result = anomaly_agent.score_transaction(payload, db, historical_stats)
+            score = Score(
+                transaction_id=transaction.id,
+                anomaly_score=score_result["anomaly_score"],
+                reconstruction_error=score_result["reconstruction_error"],
+                classifier_score=score_result.get("classifier_score"),
+                risk_level=score_result["risk_level"],
+                decision=score_result["decision"],
+                feature_contributions=score_result["feature_contributions"]
+            )
+            db.add(score)
+            transaction.risk_level = score.risk_level
+            transaction.anomaly_score = score.anomaly_score
+            transaction.decision = score.decision
+            
+            reasons = []
+            if transaction.customer_id:
+                velocity_check = compliance_agent.evaluate_velocity(
+                    transaction.customer_id, historical_stats.get("transaction_count_24h", 0)
+                )
+                if not velocity_check["passed"]:
+                    reasons.extend(velocity_check["violations"])
+            merchant_check = compliance_agent.check_merchant_restrictions(transaction)
+            if not merchant_check["passed"]:
+                reasons.extend(merchant_check["violations"])
+            if score_result["risk_level"].value in ["high", "critical"]:
+                high_risk.append((transaction, reasons))
+            
+            scored.append((transaction, score_result, reasons))
+        
+        # Auto-create cases for high risk transactions
+        investigation_agent = get_investigation_agent()
+        for transaction, reasons in high_risk:
+            try:
+                case = investigation_agent.create_case_from_transaction(
+                    transaction.id, db, owner_id=current_user.id
+                )
+                reasons.append(f"Case {case.case_id} auto-created")
+            except Exception:
+                pass  # Don't fail if case creation fails
+        
+        record_transactions(db, transactions)
+        db.commit()
+        await arecord_velocity(transactions)
+        
+        log_audit_event(
+            db=db,
+            action="score_transactions_batch",
+            resource_type="transaction",
+            resource_id="batch",
+            actor_id=current_user.id,
+            metadata={
+                "transaction_ids": [t.transaction_id for t in transactions],
+                "high_risk": len(high_risk),
+            },
+            durability=DURABILITY_BUFFERED
+        )
+        
+        return [
+            TransactionScoreResponse(
+                transaction_id=transaction.transaction_id,
+                score=score_result["anomaly_score"],
+                risk_level=score_result["risk_level"],
+                decision=score_result["decision"],
+                reasons=reasons,
+                feature_contributions=score_result["feature_contributions"]
+            )
+            for transaction, score_result, reasons in scored
+        ]
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/{transaction_id}", response_model=TransactionResponse)
 async def get_transaction(
     transaction_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_lazy_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get a transaction by ID."""
     transaction = db.query(Transaction).filter(Transaction.id == transaction_id).first()
@@ -172,27 +294,39 @@ async def get_transaction(
     return transaction
 
 
-@router.get("", response_model=List[TransactionResponse])
+@router.get("", response_model=Union[List[TransactionResponse], TransactionPage])
 async def list_transactions(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(
+        None,
+        description="Keyset cursor. Pass an empty value for the first page; the response is then "
+                    "a page object with next_cursor. Without it, skip/limit offset paging is used.",
+    ),
     risk_level: Optional[str] = None,
     customer_id: Optional[str] = None,
     merchant_id: Optional[str] = None,
     flagged: Optional[bool] = None,
     demo: Optional[bool] = Query(False),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_lazy_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    """List transactions with filters."""
+    """List transactions with filters.
+    
+    Results are ordered newest first by (timestamp, id). Offset paging via skip
+    is kept for compatibility; deep pages should use the keyset cursor, which
+    is also returned in the X-Next-Cursor header of offset responses.
+    """
+    keyset = cursor is not None
     if demo:
         demo_transactions = get_demo_transactions()
         if demo_transactions:
-            return demo_transactions[:limit]
+            return _transaction_page(demo_transactions[:limit], None, keyset)
     query = db.query(Transaction)
     
     if risk_level:
-        query = query.join(Score).filter(Score.risk_level == risk_level)
+        query = query.filter(Transaction.risk_level == risk_level)
     
     if customer_id:
         query = query.filter(Transaction.customer_id == customer_id)
@@ -201,28 +335,40 @@ async def list_transactions(
         query = query.filter(Transaction.merchant_id == merchant_id)
     
     if flagged is not None:
-        # Check if transaction is linked to any case
-        from app.models import CaseTransaction
-        if flagged:
-            tx_ids = db.query(CaseTransaction.transaction_id).distinct().all()
-            tx_ids = [tx[0] for tx in tx_ids]
-            query = query.filter(Transaction.id.in_(tx_ids))
-        else:
-            tx_ids = db.query(CaseTransaction.transaction_id).distinct().all()
-            tx_ids = [tx[0] for tx in tx_ids]
-            query = query.filter(~Transaction.id.in_(tx_ids))
+        # Semi-join against case links (index probe per candidate row)
+        linked_to_case = flagged_filter()
+        query = query.filter(linked_to_case if flagged else ~linked_to_case)
+    
+    query = apply_keyset(query, Transaction.timestamp, Transaction.id, cursor)
+    if not keyset:
+        query = query.offset(skip)
+    transactions = query.limit(limit).all()
+    if settings.demo_data_enabled and not transactions and not cursor:
+        return _transaction_page(get_demo_transactions()[:limit], None, keyset)
     
-    transactions = query.order_by(Transaction.timestamp.desc()).offset(skip).limit(limit).all()
-    if settings.demo_data_enabled and not transactions:
-        return get_demo_transactions()[:limit]
-    return transactions
+    following = next_cursor(transactions, limit, "timestamp")
+    if following:
+        response.headers[CURSOR_HEADER] = following
+    return _transaction_page(transactions, following, keyset)
+
+
+def flagged_filter():
+    """EXISTS predicate: the transaction is linked to at least one case."""
+    return exists().where(CaseTransaction.transaction_id == Transaction.id)
+
+
+def _transaction_page(items, following: Optional[str], keyset: bool):
+    """Wrap items in a page object for cursor requests; plain list otherwise."""
+    if keyset:
+        return TransactionPage(items=items, next_cursor=following)
+    return items
 
 
 @router.post("/{transaction_id}/flag")
 async def flag_transaction(
     transaction_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(UserRole.INVESTIGATOR, UserRole.ADMIN))
+    db: Session = Depends(get_lazy_db),
+    current_user: Principal = Depends(require_role(UserRole.INVESTIGATOR, UserRole.ADMIN))
 ):
     """Flag a transaction and create a case."""
     transaction = db.query(Transaction).filter(Transaction.id == transaction_id).first()
@@ -230,7 +376,6 @@ async def flag_transaction(
         raise HTTPException(status_code=404, detail="Transaction not found")
     
     # Check if case already exists
-    from app.models import CaseTransaction
     existing_case = db.query(CaseTransaction).filter(
         CaseTransaction.transaction_id == transaction_id
     ).first()
@@ -1,5 +1,5 @@
 """Pydantic schemas for API requests and responses."""
-from pydantic import BaseModel, Field
+from pydantic import AliasChoices, BaseModel, Field
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from app.models import CaseStatus, RiskLevel, UserRole
@@ -62,11 +62,22 @@ class ScoreResponse(BaseModel):
         from_attributes = True
 
 
+class TransactionPage(BaseModel):
+    """Cursor-paginated transaction listing."""
+    items: List[TransactionResponse]
+    next_cursor: Optional[str] = None
+
+
 class TransactionScoreRequest(BaseModel):
     """Transaction scoring request."""
     transaction: TransactionCreate
 
 
+class TransactionBatchScoreRequest(BaseModel):
+    """Batch transaction scoring request."""
+    transactions: List[TransactionCreate] = Field(..., min_length=1, max_length=1000)
+
+
 class TransactionScoreResponse(BaseModel):
     """Transaction scoring response."""
     transaction_id: str
@@ -122,6 +133,12 @@ class CaseResponse(BaseModel):
         from_attributes = True
 
 
+class CasePage(BaseModel):
+    """Cursor-paginated case listing."""
+    items: List[CaseResponse]
+    next_cursor: Optional[str] = None
+
+
 class CaseEventResponse(BaseModel):
     """Case event response schema."""
     id: int
@@ -129,7 +146,8 @@ class CaseEventResponse(BaseModel):
     event_type: str
     title: str
     content: Optional[str]
-    metadata: Optional[Dict[str, Any]]
+    # ORM column is event_metadata (``metadata`` is reserved on models)
+    metadata: Optional[Dict[str, Any]] = Field(None, validation_alias=AliasChoices("event_metadata", "metadata"))
     created_by_id: Optional[int]
     created_at: datetime
     
@@ -144,7 +162,8 @@ class EntityResponse(BaseModel):
     entity_id: str
     entity_type: str
     name: Optional[str]
-    metadata: Optional[Dict[str, Any]]
+    # ORM column is entity_metadata (``metadata`` is reserved on models)
+    metadata: Optional[Dict[str, Any]] = Field(None, validation_alias=AliasChoices("entity_metadata", "metadata"))
     created_at: datetime
     updated_at: datetime
     
@@ -0,0 +1,72 @@
+"""Compact, typed encoding of cached API values.
+
+Values are converted to plain JSON-compatible data once (``model_dump`` for
+Pydantic models; ORM objects go through their response schema first) and
+encoded with orjson. Payloads of at least ``CACHE_COMPRESS_MIN_BYTES`` are
+zlib-compressed. The stored form is a one-byte format marker followed by the
+payload, so on a cache hit the JSON bytes can be sent to the client as-is,
+without decoding or re-validating them.
+"""
+import zlib
+from typing import Any, Optional, Type
+import orjson
+from pydantic import BaseModel
+from app.config import settings
+
+FORMAT_JSON = b"j"
+FORMAT_ZLIB = b"z"
+
+# Cached values are read far more often than written, but writes sit on the
+# request path too; level 1 gets most of the size win at a fraction of the cost
+COMPRESSION_LEVEL = 1
+
+
+def to_plain(value: Any, schema: Optional[Type[BaseModel]] = None) -> Any:
+    """Convert models (and ORM objects, via ``schema``) to JSON-compatible data."""
+    if isinstance(value, (list, tuple)):
+        return [to_plain(item, schema) for item in value]
+    if schema is not None and not isinstance(value, BaseModel):
+        value = schema.model_validate(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    return value
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    return str(value)
+
+
+def dumps(value: Any, schema: Optional[Type[BaseModel]] = None) -> bytes:
+    """JSON bytes for ``value``."""
+    return orjson.dumps(to_plain(value, schema), default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def encode(
+    value: Any,
+    schema: Optional[Type[BaseModel]] = None,
+    compress_min_bytes: Optional[int] = None,
+) -> bytes:
+    """Stored form of ``value``: format marker plus JSON, compressed when large."""
+    payload = dumps(value, schema)
+    threshold = settings.cache_compress_min_bytes if compress_min_bytes is None else compress_min_bytes
+    if threshold and len(payload) >= threshold:
+        return FORMAT_ZLIB + zlib.compress(payload, COMPRESSION_LEVEL)
+    return FORMAT_JSON + payload
+
+
+def decode_payload(data: bytes) -> Optional[bytes]:
+    """JSON bytes from a stored value, or None if it is not in a known format."""
+    marker = data[:1]
+    if marker == FORMAT_JSON:
+        return data[1:]
+    if marker == FORMAT_ZLIB:
+        return zlib.decompress(data[1:])
+    return None
+
+
+def loads(payload: bytes) -> Any:
+    return orjson.loads(payload)
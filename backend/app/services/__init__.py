@@ -1,9 +1,14 @@
 """Services package."""
-from app.services.entity_sync import sync_entity_to_graph, sync_entity_link_to_graph, sync_all_entities_to_graph
+from app.services.entity_sync import (
+    sync_entity_to_graph,
+    sync_entity_link_to_graph,
+    sync_all_entities_to_graph,
+    run_graph_resync,
+)
 
 __all__ = [
     "sync_entity_to_graph",
     "sync_entity_link_to_graph",
-    "sync_all_entities_to_graph"
+    "sync_all_entities_to_graph",
+    "run_graph_resync",
 ]
-
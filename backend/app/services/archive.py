@@ -0,0 +1,367 @@
+"""Cold-tier archival of old hypertable chunks to Parquet.
+
+Chunks of ``transactions`` and ``audit_log`` older than the retention window
+are exported to Parquet on local disk or object storage (any URI pyarrow
+understands, e.g. ``s3://bucket/prefix``), laid out as
+``<table>/date=<chunk start>/<chunk>.parquet``. A chunk is dropped from
+PostgreSQL only after the file's row count matches the chunk's. Each table
+keeps a ``manifest.json`` listing verified files with their time and id
+ranges; the read path only ever reads files listed there, and only those
+whose ranges overlap the query.
+
+Requires TimescaleDB (chunks) and pyarrow.
+"""
+import bisect
+import enum
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+from sqlalchemy import Boolean, Column, DateTime, Float, Integer, JSON, MetaData, Table, func, select, text
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import BackgroundSessionLocal
+from app.models import AuditLog, Transaction
+
+logger = logging.getLogger(__name__)
+
+# table -> time column of the hypertable
+ARCHIVE_TABLES = {
+    "transactions": (Transaction.__table__, "timestamp"),
+    "audit_log": (AuditLog.__table__, "created_at"),
+}
+
+MANIFEST_NAME = "manifest.json"
+
+
+class ArchiveVerificationError(Exception):
+    """Archived file does not hold the same number of rows as its source chunk."""
+
+
+def _arrow_type(column: Column):
+    import pyarrow as pa
+
+    column_type = column.type
+    if isinstance(column_type, Integer):
+        return pa.int64()
+    if isinstance(column_type, Float):
+        return pa.float64()
+    if isinstance(column_type, Boolean):
+        return pa.bool_()
+    if isinstance(column_type, DateTime):
+        return pa.timestamp("us")
+    # String, Text, Enum (stored by value) and JSON (serialized)
+    return pa.string()
+
+
+def archive_schema(table: Table):
+    """Parquet schema derived from the table's model columns."""
+    import pyarrow as pa
+
+    return pa.schema([(column.name, _arrow_type(column)) for column in table.columns])
+
+
+def _archive_value(column: Column, value: Any) -> Any:
+    if value is None:
+        return None
+    if isinstance(column.type, JSON):
+        return json.dumps(value, default=str)
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+def _restore_value(column: Column, value: Any) -> Any:
+    if value is not None and isinstance(column.type, JSON):
+        return json.loads(value)
+    return value
+
+
+class ArchiveStore:
+    """Parquet files plus a per-table manifest on a pyarrow filesystem."""
+
+    def __init__(self, uri: Optional[str] = None):
+        from pyarrow import fs
+
+        uri = uri or settings.archive_uri
+        if "://" in uri:
+            self.filesystem, self.base_path = fs.FileSystem.from_uri(uri)
+        else:
+            self.filesystem, self.base_path = fs.LocalFileSystem(), os.path.abspath(uri)
+        self.base_path = self.base_path.rstrip("/")
+
+    def _path(self, *parts: str) -> str:
+        return "/".join((self.base_path,) + parts)
+
+    def load_manifest(self, table: str) -> List[Dict[str, Any]]:
+        from pyarrow import fs
+
+        path = self._path(table, MANIFEST_NAME)
+        if self.filesystem.get_file_info(path).type == fs.FileType.NotFound:
+            return []
+        with self.filesystem.open_input_stream(path) as f:
+            return json.loads(f.read())
+
+    def _save_manifest(self, table: str, entries: List[Dict[str, Any]]):
+        self.filesystem.create_dir(self._path(table), recursive=True)
+        with self.filesystem.open_output_stream(self._path(table, MANIFEST_NAME)) as f:
+            f.write(json.dumps(entries, indent=2).encode())
+
+    def write(
+        self,
+        table: str,
+        name: str,
+        range_start: datetime,
+        range_end: datetime,
+        row_chunks: Iterable[List[Dict[str, Any]]],
+        expected_rows: int,
+    ) -> Dict[str, Any]:
+        """Write rows to a Parquet file, verify its row count, and add it to the manifest.
+
+        Raises:
+            ArchiveVerificationError: the file's row count differs from ``expected_rows``;
+                the file is deleted and the manifest is left unchanged.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        source, _ = ARCHIVE_TABLES[table]
+        schema = archive_schema(source)
+        directory = self._path(table, f"date={range_start:%Y-%m-%d}")
+        path = f"{directory}/{name}.parquet"
+        self.filesystem.create_dir(directory, recursive=True)
+
+        ids = []
+        with self.filesystem.open_output_stream(path) as sink:
+            writer = pq.ParquetWriter(sink, schema, compression="zstd")
+            try:
+                for rows in row_chunks:
+                    writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+                    ids.extend(row["id"] for row in rows)
+            finally:
+                writer.close()
+
+        with self.filesystem.open_input_file(path) as f:
+            archived_rows = pq.ParquetFile(f).metadata.num_rows
+        if archived_rows != expected_rows:
+            self.filesystem.delete_file(path)
+            raise ArchiveVerificationError(
+                f"{path} has {archived_rows} rows, source chunk has {expected_rows}"
+            )
+
+        entry = {
+            "chunk": name,
+            "path": path,
+            "range_start": range_start.isoformat(),
+            "range_end": range_end.isoformat(),
+            "rows": archived_rows,
+            "min_id": min(ids, default=None),
+            "max_id": max(ids, default=None),
+            "archived_at": datetime.utcnow().isoformat(),
+        }
+        manifest = [e for e in self.load_manifest(table) if e["chunk"] != name]
+        self._save_manifest(table, manifest + [entry])
+        return entry
+
+    def read(
+        self,
+        table: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        equals: Optional[Dict[str, Any]] = None,
+        ids: Optional[Iterable[int]] = None,
+        batch_size: int = 10000,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Yield batches of archived rows matching the filters, in time order.
+
+        Files whose manifest time range does not overlap [start, end), or
+        whose id range holds none of ``ids``, are skipped without being opened.
+        """
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        source, time_column = ARCHIVE_TABLES[table]
+        if ids is not None:
+            ids = sorted(set(ids))
+        entries = sorted(self.load_manifest(table), key=lambda e: e["range_start"])
+        paths = [
+            e["path"] for e in entries
+            if (end is None or datetime.fromisoformat(e["range_start"]) < end)
+            and (start is None or datetime.fromisoformat(e["range_end"]) > start)
+            and (ids is None or _holds_any(e, ids))
+        ]
+        if not paths:
+            return
+
+        condition = None
+        clauses = []
+        if start is not None:
+            clauses.append(ds.field(time_column) >= pa.scalar(start, pa.timestamp("us")))
+        if end is not None:
+            clauses.append(ds.field(time_column) < pa.scalar(end, pa.timestamp("us")))
+        for name, value in (equals or {}).items():
+            clauses.append(ds.field(name) == value)
+        if ids is not None:
+            clauses.append(ds.field("id").isin(list(ids)))
+        for clause in clauses:
+            condition = clause if condition is None else condition & clause
+
+        dataset = ds.dataset(paths, schema=archive_schema(source), format="parquet", filesystem=self.filesystem)
+        columns = {column.name: column for column in source.columns}
+        for batch in dataset.to_batches(filter=condition, batch_size=batch_size):
+            if batch.num_rows:
+                yield [
+                    {key: _restore_value(columns[key], value) for key, value in row.items()}
+                    for row in batch.to_pylist()
+                ]
+
+    def cutoff(self, table: str) -> Optional[datetime]:
+        """End of the newest archived range: everything older lives in the archive."""
+        entries = self.load_manifest(table)
+        if not entries:
+            return None
+        return max(datetime.fromisoformat(e["range_end"]) for e in entries)
+
+
+def _holds_any(entry: Dict[str, Any], ids: List[int]) -> bool:
+    """Whether a manifest entry's id range contains any of the sorted ``ids``."""
+    if entry.get("min_id") is None:
+        # Written before id ranges were recorded
+        return True
+    position = bisect.bisect_left(ids, entry["min_id"])
+    return position < len(ids) and ids[position] <= entry["max_id"]
+
+
+def archive_enabled(uri: Optional[str] = None) -> bool:
+    """Whether an archive location is given or configured and pyarrow is importable."""
+    if not (uri or settings.archive_uri):
+        return False
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def archivable_chunks(db: Session, table: str, cutoff: datetime) -> List[Dict[str, Any]]:
+    """Chunks of ``table`` whose whole time range ends at or before ``cutoff``."""
+    rows = db.execute(text(
+        """
+        SELECT chunk_schema, chunk_name, range_start, range_end
+        FROM timescaledb_information.chunks
+        WHERE hypertable_name = :table AND range_end <= :cutoff
+        ORDER BY range_start
+        """
+    ), {"table": table, "cutoff": cutoff}).all()
+    return [dict(row._mapping) for row in rows]
+
+
+def _chunk_table(table: str, chunk_schema: str, chunk_name: str) -> Table:
+    """A Table for the chunk with the hypertable's column types (enum/JSON handling)."""
+    source, _ = ARCHIVE_TABLES[table]
+    return Table(
+        chunk_name, MetaData(),
+        *[Column(column.name, column.type) for column in source.columns],
+        schema=chunk_schema,
+    )
+
+
+def archive_chunk(
+    db: Session,
+    store: ArchiveStore,
+    table: str,
+    chunk: Dict[str, Any],
+    chunk_size: int = 10000,
+    drop: bool = True,
+) -> Dict[str, Any]:
+    """Export one chunk, verify it, and drop it, all in the caller's transaction.
+
+    The chunk is locked against writes for the duration, so rows cannot land
+    in it between the count and the drop. Commits on success.
+    """
+    chunk_table = _chunk_table(table, chunk["chunk_schema"], chunk["chunk_name"])
+    db.execute(text(f'LOCK TABLE "{chunk["chunk_schema"]}"."{chunk["chunk_name"]}" IN SHARE MODE'))
+    expected = db.execute(select(func.count()).select_from(chunk_table)).scalar()
+
+    _, time_column = ARCHIVE_TABLES[table]
+    columns = list(chunk_table.columns)
+    # Files are written in time order so archived reads come back ordered
+    result = db.execute(
+        select(*columns)
+        .order_by(chunk_table.c[time_column], chunk_table.c.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    row_chunks = (
+        [
+            {column.name: _archive_value(column, value) for column, value in zip(columns, row)}
+            for row in partition
+        ]
+        for partition in result.partitions()
+    )
+    entry = store.write(
+        table, chunk["chunk_name"], chunk["range_start"], chunk["range_end"], row_chunks, expected
+    )
+
+    if drop:
+        db.execute(text(
+            "SELECT drop_chunks(:table, older_than => :range_end, newer_than => :range_start)"
+        ), {"table": table, "range_start": chunk["range_start"], "range_end": chunk["range_end"]})
+    db.commit()
+    logger.info(f"Archived {table} chunk {chunk['chunk_name']} ({expected} rows) to {entry['path']}")
+    return entry
+
+
+def run_archive(
+    older_than_days: Optional[int] = None,
+    tables: Optional[List[str]] = None,
+    dry_run: bool = False,
+    drop: bool = True,
+    store: Optional[ArchiveStore] = None,
+    session_factory: Callable[[], Session] = BackgroundSessionLocal,
+) -> List[Dict[str, Any]]:
+    """Archive every chunk older than ``older_than_days`` for the given tables.
+
+    Returns:
+        Manifest entries for archived chunks (or the candidate chunks on a dry run)
+    """
+    older_than_days = older_than_days or settings.archive_after_days
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    store = store or ArchiveStore()
+    archived = []
+
+    db = session_factory()
+    try:
+        for table in tables or list(ARCHIVE_TABLES):
+            chunks = archivable_chunks(db, table, cutoff)
+            logger.info(f"{len(chunks)} {table} chunks older than {cutoff:%Y-%m-%d}")
+            if dry_run:
+                archived.extend(chunks)
+                continue
+            for chunk in chunks:
+                try:
+                    archived.append(archive_chunk(db, store, table, chunk, settings.archive_chunk_size, drop))
+                except Exception as e:
+                    db.rollback()
+                    logger.error(f"Failed to archive {table} chunk {chunk['chunk_name']}: {e}")
+    finally:
+        db.close()
+    return archived
+
+
+def get_archived_transactions(
+    ids: Iterable[int],
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    store: Optional[ArchiveStore] = None,
+) -> List[Dict[str, Any]]:
+    """Archived transaction rows by primary key (e.g. case links to dropped chunks).
+
+    Only files whose time range overlaps [start, end) and whose id range
+    covers one of ``ids`` are read.
+    """
+    ids = list(ids)
+    if not ids or not archive_enabled():
+        return []
+    store = store or ArchiveStore()
+    return [row for rows in store.read("transactions", start=start, end=end, ids=ids) for row in rows]
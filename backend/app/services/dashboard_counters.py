@@ -0,0 +1,309 @@
+"""Incrementally maintained dashboard KPI counters.
+
+Ingestion and case transitions bump rows in ``metric_counters`` inside their
+own database transaction, so a counter changes exactly when the data it counts
+is committed. Each counter is split over ``dashboard_counter_shards`` rows and
+a transaction bumps a random shard, so concurrent ingests rarely wait on one
+another's row locks; readers sum the shards. The dashboard reads a handful of rows instead of counting
+transactions and cases. A background reconciler periodically recomputes the
+counters from the source tables and corrects any drift (rows deleted by
+demo resets, writers that bypass these helpers, and so on). Only one worker
+reconciles at a time, and the all-time risk-level counts, which need a scan
+of every scored transaction, are recounted less often than the daily ones.
+"""
+import logging
+import random
+import threading
+import time
+from collections import Counter as Tally
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+from prometheus_client import Counter
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import BackgroundSessionLocal
+from app.models import Case, CaseStatus, MetricCounter, RiskLevel, Transaction
+from app.services.timeseries import HIGH_RISK_LEVELS
+
+logger = logging.getLogger(__name__)
+
+SCOPE_TRANSACTIONS_DAY = "transactions_day"
+SCOPE_HIGH_RISK_DAY = "high_risk_day"
+SCOPE_RISK_LEVEL = "risk_level"
+SCOPE_CASES = "cases"
+OPEN_CASES_KEY = "open"
+
+counter_corrections = Counter(
+    "dashboard_counter_corrections_total",
+    "Dashboard counters overwritten by reconciliation because they had drifted",
+    ["scope"]
+)
+
+CounterKey = Tuple[str, str]
+
+# pg advisory lock id held by the worker running a reconciliation
+RECONCILE_LOCK_ID = 0x6D657472
+
+# Reconciliation corrections go to this shard; ingest uses 1..dashboard_counter_shards
+RECONCILE_SHARD = 0
+
+
+def _insert(db: Session):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Counter upserts are not supported on {dialect}")
+    return insert(MetricCounter)
+
+
+def _upsert(db: Session, values: Dict[CounterKey, int], shard: int):
+    if not values:
+        return
+    # Sorted so concurrent writers lock counter rows in the same order
+    rows = [
+        {"scope": scope, "key": key, "shard": shard, "value": value}
+        for (scope, key), value in sorted(values.items())
+    ]
+    stmt = _insert(db).values(rows)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[MetricCounter.scope, MetricCounter.key, MetricCounter.shard],
+        set_={"value": MetricCounter.value + stmt.excluded.value, "updated_at": func.now()},
+    ))
+
+
+def increment_counters(db: Session, deltas: Dict[CounterKey, int]):
+    """Atomically add ``deltas`` to counters in the caller's transaction. Does not commit."""
+    shard = random.randint(1, max(settings.dashboard_counter_shards, 1))
+    _upsert(db, {key: delta for key, delta in deltas.items() if delta}, shard)
+
+
+def day_key(day: date) -> str:
+    return day.isoformat()
+
+
+def transaction_deltas(transactions: Iterable[Transaction]) -> Dict[CounterKey, int]:
+    """Counter increments for newly ingested (and already scored) transactions."""
+    deltas: Dict[CounterKey, int] = Tally()
+    for transaction in transactions:
+        day = day_key(transaction.timestamp.date())
+        deltas[(SCOPE_TRANSACTIONS_DAY, day)] += 1
+        if transaction.risk_level is not None:
+            level = RiskLevel(transaction.risk_level)
+            deltas[(SCOPE_RISK_LEVEL, level.value)] += 1
+            if level in HIGH_RISK_LEVELS:
+                deltas[(SCOPE_HIGH_RISK_DAY, day)] += 1
+    return deltas
+
+
+def record_transactions(db: Session, transactions: Iterable[Transaction]):
+    """Count ingested transactions. Call after the score is copied onto them."""
+    increment_counters(db, transaction_deltas(transactions))
+
+
+def record_case_status(db: Session, old_status: Optional[CaseStatus], new_status: CaseStatus):
+    """Count a case creation (``old_status`` None) or status transition."""
+    was_open = old_status is not None and old_status != CaseStatus.CLOSED
+    is_open = new_status != CaseStatus.CLOSED
+    increment_counters(db, {(SCOPE_CASES, OPEN_CASES_KEY): int(is_open) - int(was_open)})
+
+
+def get_counters(db: Session, scope: str) -> Dict[str, int]:
+    """All counters in ``scope`` as {key: value}."""
+    rows = db.query(MetricCounter.key, func.sum(MetricCounter.value)).filter(
+        MetricCounter.scope == scope
+    ).group_by(MetricCounter.key).all()
+    return {key: int(value) for key, value in rows}
+
+
+def get_counter(db: Session, scope: str, key: str) -> int:
+    value = db.query(func.sum(MetricCounter.value)).filter(
+        MetricCounter.scope == scope, MetricCounter.key == key
+    ).scalar()
+    return int(value or 0)
+
+
+def compute_counters(db: Session, days: int, totals: bool = True) -> Dict[CounterKey, int]:
+    """Recompute counters from the source tables for the last ``days`` days.
+
+    ``totals`` includes the all-time risk-level counts.
+    """
+    actual: Dict[CounterKey, int] = {}
+    today = datetime.utcnow().date()
+    for offset in range(days):
+        day = today - timedelta(days=offset)
+        start = datetime.combine(day, datetime.min.time())
+        total, high_risk = db.query(
+            func.count(Transaction.id),
+            func.count(Transaction.id).filter(Transaction.risk_level.in_(HIGH_RISK_LEVELS)),
+        ).filter(
+            Transaction.timestamp >= start,
+            Transaction.timestamp < start + timedelta(days=1),
+        ).one()
+        actual[(SCOPE_TRANSACTIONS_DAY, day_key(day))] = total
+        actual[(SCOPE_HIGH_RISK_DAY, day_key(day))] = high_risk
+
+    if totals:
+        levels = dict(db.query(Transaction.risk_level, func.count(Transaction.id)).filter(
+            Transaction.risk_level.isnot(None)
+        ).group_by(Transaction.risk_level).all())
+        for level in RiskLevel:
+            actual[(SCOPE_RISK_LEVEL, level.value)] = levels.get(level, 0)
+
+    actual[(SCOPE_CASES, OPEN_CASES_KEY)] = db.query(func.count(Case.id)).filter(
+        Case.status != CaseStatus.CLOSED
+    ).scalar()
+    return actual
+
+
+@contextmanager
+def _reconcile_lock(db: Session) -> Iterator[bool]:
+    """Hold the cluster-wide reconciliation lock; yields False if another worker has it.
+
+    A session-level advisory lock on a connection of its own, so it spans
+    the separate snapshot and apply transactions.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        yield True
+        return
+    with db.get_bind().connect() as connection:
+        params = {"lock_id": RECONCILE_LOCK_ID}
+        acquired = bool(connection.execute(text("SELECT pg_try_advisory_lock(:lock_id)"), params).scalar())
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                connection.execute(text("SELECT pg_advisory_unlock(:lock_id)"), params)
+
+
+def counter_drift(db: Session, days: int, totals: bool = True) -> Dict[CounterKey, Tuple[int, int]]:
+    """{(scope, key): (stored, actual)} for counters that differ from a recount.
+
+    On PostgreSQL the recount and the stored counters are read in one
+    REPEATABLE READ snapshot, so ``actual - stored`` is exactly the correction
+    needed as of that snapshot. Ends the session's transaction.
+    """
+    db.commit()
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ"))
+    try:
+        actual = compute_counters(db, days, totals)
+        stored = {
+            (scope, key): int(value)
+            for scope, key, value in db.query(
+                MetricCounter.scope, MetricCounter.key, func.sum(MetricCounter.value)
+            ).filter(
+                MetricCounter.scope.in_({scope for scope, _ in actual})
+            ).group_by(MetricCounter.scope, MetricCounter.key)
+        }
+    finally:
+        db.commit()
+    return {
+        key: (stored.get(key, 0), value)
+        for key, value in actual.items()
+        if stored.get(key) != value
+    }
+
+
+def apply_drift(db: Session, drift: Dict[CounterKey, Tuple[int, int]]):
+    """Add each ``actual - stored`` correction in a READ COMMITTED transaction and commit.
+
+    Increments committed since the snapshot are not overwritten, and the
+    corrections land on the reconciliation shard, which ingest never locks.
+    """
+    _upsert(db, {key: actual - stored for key, (stored, actual) in drift.items()}, RECONCILE_SHARD)
+    db.commit()
+
+
+def reconcile_counters(
+    db: Session,
+    days: Optional[int] = None,
+    totals: bool = True,
+) -> Dict[CounterKey, Tuple[int, int]]:
+    """Correct drifted counters with values recomputed from the source tables.
+
+    Does nothing if another worker is reconciling.
+
+    Returns:
+        {(scope, key): (stored, actual)} for every corrected counter
+    """
+    days = days or settings.dashboard_counter_reconcile_days
+    with _reconcile_lock(db) as leader:
+        if not leader:
+            return {}
+        drift = counter_drift(db, days, totals)
+        apply_drift(db, drift)
+
+    for (scope, key), (old, new) in drift.items():
+        counter_corrections.labels(scope=scope).inc()
+        if old:
+            logger.info(f"Dashboard counter {scope}:{key} corrected {old} -> {new}")
+    return drift
+
+
+class CounterReconciler:
+    """Background thread that periodically reconciles dashboard counters."""
+
+    def __init__(
+        self,
+        interval: Optional[float] = None,
+        session_factory: Callable[[], Session] = BackgroundSessionLocal,
+    ):
+        self.interval = interval if interval is not None else settings.dashboard_counter_reconcile_interval
+        self.session_factory = session_factory
+        self.totals_interval = settings.dashboard_counter_totals_interval
+        self._totals_due = 0.0
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="dashboard-counter-reconciler", daemon=True)
+        self._thread.start()
+        logger.info("Dashboard counter reconciler started")
+
+    def stop(self, timeout: float = 10.0):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+        logger.info("Dashboard counter reconciler stopped")
+
+    def _run(self):
+        # Reconcile immediately so a fresh deployment starts with correct counters
+        while not self._stop_event.is_set():
+            db = self.session_factory()
+            totals = time.monotonic() >= self._totals_due
+            try:
+                reconcile_counters(db, totals=totals)
+                if totals:
+                    self._totals_due = time.monotonic() + self.totals_interval
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Dashboard counter reconciliation error: {e}")
+            finally:
+                db.close()
+            self._stop_event.wait(self.interval)
+
+
+_reconciler: Optional[CounterReconciler] = None
+
+
+def start_counter_reconciler() -> CounterReconciler:
+    """Start the process-wide counter reconciler."""
+    global _reconciler
+    if _reconciler is None:
+        _reconciler = CounterReconciler()
+    _reconciler.start()
+    return _reconciler
+
+
+def stop_counter_reconciler():
+    """Stop the process-wide counter reconciler, if running."""
+    if _reconciler is not None:
+        _reconciler.stop()
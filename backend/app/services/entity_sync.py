@@ -1,6 +1,16 @@
 """Service to sync entities between PostgreSQL and Neo4j."""
+import json
 import logging
-from sqlalchemy.orm import Session
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session, aliased
+from app.config import BACKEND_DIR, settings
+from app.database import BackgroundSessionLocal
 from app.models import Entity, EntityLink
 from app.graph import get_graph_service
 
@@ -53,40 +63,380 @@ def sync_entity_link_to_graph(link: EntityLink, db: Session, graph_service=None)
         logger.error(f"Failed to sync entity link {link.id} to Neo4j: {e}")
 
 
+
+
+# Full / incremental resync
+#
+# The resync job walks ``entities`` and then ``entity_links`` by primary key
+# (keyset pagination, so every page is an index range scan no matter how deep
+# we are) and pushes each page to Neo4j with a single UNWIND query. The id
+# space is split into contiguous ranges that are processed by parallel
+# workers, and each range's cursor is persisted to a checkpoint file after
+# every page so an interrupted run resumes where it stopped.
+
+SYNC_PHASES = ("entities", "links")
+
+
+def default_checkpoint_path() -> str:
+    """The configured checkpoint file, independent of the working directory."""
+    return os.path.join(BACKEND_DIR, settings.graph_sync_checkpoint_path)
+
+
+def _changed_since(model, since: datetime):
+    """Filter for rows inserted or (where the model tracks it) updated after ``since``.
+
+    Entity links have no ``updated_at``, so incremental syncs only pick up new links.
+    """
+    if hasattr(model, "updated_at"):
+        return or_(model.created_at > since, model.updated_at > since)
+    return model.created_at > since
+
+
+def _entity_rows(db: Session, after_id: int, upper_id: int, batch_size: int,
+                 since: Optional[datetime] = None) -> List[Tuple[int, Dict[str, Any]]]:
+    """Fetch the next page of entities with ``after_id < id <= upper_id``."""
+    query = db.query(
+        Entity.id, Entity.entity_id, Entity.entity_type, Entity.name, Entity.entity_metadata
+    ).filter(Entity.id > after_id, Entity.id <= upper_id)
+    if since is not None:
+        query = query.filter(_changed_since(Entity, since))
+
+    return [
+        (row.id, {
+            "entity_id": row.entity_id,
+            "entity_type": row.entity_type,
+            "name": row.name,
+            "metadata": row.entity_metadata or {},
+        })
+        for row in query.order_by(Entity.id).limit(batch_size).all()
+    ]
+
+
+def _link_rows(db: Session, after_id: int, upper_id: int, batch_size: int,
+               since: Optional[datetime] = None) -> List[Tuple[int, Dict[str, Any]]]:
+    """Fetch the next page of entity links, resolving both endpoints in the same query."""
+    from_entity = aliased(Entity)
+    to_entity = aliased(Entity)
+    query = db.query(
+        EntityLink.id,
+        from_entity.entity_id.label("from_entity_id"),
+        to_entity.entity_id.label("to_entity_id"),
+        EntityLink.relationship_type,
+        EntityLink.link_metadata,
+    ).join(
+        from_entity, from_entity.id == EntityLink.from_entity_id
+    ).join(
+        to_entity, to_entity.id == EntityLink.to_entity_id
+    ).filter(EntityLink.id > after_id, EntityLink.id <= upper_id)
+    if since is not None:
+        query = query.filter(_changed_since(EntityLink, since))
+
+    return [
+        (row.id, {
+            "from_entity_id": row.from_entity_id,
+            "to_entity_id": row.to_entity_id,
+            "relationship_type": row.relationship_type or "RELATES_TO",
+            "metadata": row.link_metadata or {},
+        })
+        for row in query.order_by(EntityLink.id).limit(batch_size).all()
+    ]
+
+
+_PHASE_MODELS = {"entities": Entity, "links": EntityLink}
+_PHASE_FETCHERS: Dict[str, Callable[..., List[Tuple[int, Dict[str, Any]]]]] = {
+    "entities": _entity_rows,
+    "links": _link_rows,
+}
+
+
+def _write_phase_batch(graph_service, phase: str, rows: List[Dict[str, Any]]):
+    if phase == "entities":
+        graph_service.sync_entities_batch(rows)
+    else:
+        graph_service.sync_entity_links_batch(rows)
+
+
+def split_id_ranges(min_id: Optional[int], max_id: Optional[int], parts: int) -> List[Dict[str, int]]:
+    """Split ``[min_id, max_id]`` into at most ``parts`` contiguous ranges.
+
+    Each range carries a ``cursor`` (the last id already synced) that starts
+    just below its lower bound.
+    """
+    if min_id is None or max_id is None:
+        return []
+
+    parts = max(1, min(parts, max_id - min_id + 1))
+    span = (max_id - min_id + 1) // parts
+    ranges = []
+    lower = min_id
+    for index in range(parts):
+        upper = max_id if index == parts - 1 else lower + span - 1
+        ranges.append({"lo": lower, "hi": upper, "cursor": lower - 1})
+        lower = upper + 1
+    return ranges
+
+
+class SyncCheckpoint:
+    """JSON checkpoint for the resync job, written atomically after every page."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.state: Dict[str, Any] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.state = json.load(f)
+
+    @property
+    def in_progress(self) -> bool:
+        return bool(self.state.get("phases")) and not self.state.get("completed", False)
+
+    @property
+    def last_synced_at(self) -> Optional[datetime]:
+        value = self.state.get("last_synced_at")
+        return datetime.fromisoformat(value) if value else None
+
+    def start_run(self, mode: str, since: Optional[datetime], phases: Dict[str, List[Dict[str, int]]],
+                  started_at: datetime):
+        with self._lock:
+            self.state.update({
+                "mode": mode,
+                "since": since.isoformat() if since else None,
+                "run_started_at": started_at.isoformat(),
+                "completed": False,
+                "phases": phases,
+            })
+            self._save()
+
+    def advance(self, phase: str, range_index: int, cursor: int):
+        with self._lock:
+            self.state["phases"][phase][range_index]["cursor"] = cursor
+            self._save()
+
+    def complete_run(self):
+        with self._lock:
+            self.state["completed"] = True
+            # Use the run start (taken before the id ranges were planned) as the
+            # next watermark so rows written while the run was being planned or
+            # was in flight are picked up by the next incremental sync.
+            self.state["last_synced_at"] = self.state.get("run_started_at")
+            self._save()
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class SyncProgress:
+    """Thread-safe row counter that logs throughput and ETA."""
+
+    def __init__(self, phase: str, total: int, report_interval: float = 5.0):
+        self.phase = phase
+        self.total = total
+        self.done = 0
+        self.report_interval = report_interval
+        self._started = time.monotonic()
+        self._last_report = self._started
+        self._lock = threading.Lock()
+
+    def add(self, count: int):
+        with self._lock:
+            self.done += count
+            now = time.monotonic()
+            if now - self._last_report >= self.report_interval or self.done >= self.total:
+                self._last_report = now
+                logger.info(self.summary())
+
+    def rate(self) -> float:
+        elapsed = time.monotonic() - self._started
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def eta_seconds(self) -> Optional[float]:
+        rate = self.rate()
+        if rate <= 0:
+            return None
+        return max(self.total - self.done, 0) / rate
+
+    def summary(self) -> str:
+        eta = self.eta_seconds()
+        eta_text = f"{eta:.0f}s" if eta is not None else "unknown"
+        return (
+            f"Graph sync [{self.phase}] {self.done}/{self.total} rows, "
+            f"{self.rate():.0f} rows/s, ETA {eta_text}"
+        )
+
+
+def _sync_range(
+    phase: str,
+    range_index: int,
+    id_range: Dict[str, int],
+    batch_size: int,
+    since: Optional[datetime],
+    graph_service,
+    checkpoint: SyncCheckpoint,
+    progress: SyncProgress,
+    session_factory: Callable[[], Session],
+    max_retries: int = 3,
+):
+    """Sync one id range page by page, persisting the cursor after each page."""
+    fetch = _PHASE_FETCHERS[phase]
+    cursor = id_range["cursor"]
+    db = session_factory()
+    try:
+        while cursor < id_range["hi"]:
+            page = fetch(db, cursor, id_range["hi"], batch_size, since)
+            if not page:
+                break
+
+            for attempt in range(max_retries + 1):
+                try:
+                    _write_phase_batch(graph_service, phase, [row for _, row in page])
+                    break
+                except Exception as e:
+                    if attempt == max_retries:
+                        raise
+                    delay = 2 ** attempt
+                    logger.warning(f"Graph write failed for {phase} after id {cursor} ({e}); retrying in {delay}s")
+                    time.sleep(delay)
+
+            cursor = page[-1][0]
+            checkpoint.advance(phase, range_index, cursor)
+            progress.add(len(page))
+    finally:
+        db.close()
+
+
+def _plan_phase(db: Session, phase: str, workers: int, since: Optional[datetime]) -> List[Dict[str, int]]:
+    model = _PHASE_MODELS[phase]
+    query = db.query(func.min(model.id), func.max(model.id))
+    if since is not None:
+        query = query.filter(_changed_since(model, since))
+    min_id, max_id = query.one()
+    return split_id_ranges(min_id, max_id, workers)
+
+
+def _remaining_rows(db: Session, phase: str, ranges: List[Dict[str, int]], since: Optional[datetime]) -> int:
+    model = _PHASE_MODELS[phase]
+    total = 0
+    for id_range in ranges:
+        query = db.query(func.count(model.id)).filter(
+            model.id > id_range["cursor"], model.id <= id_range["hi"]
+        )
+        if since is not None:
+            query = query.filter(_changed_since(model, since))
+        total += query.scalar() or 0
+    return total
+
+
+def run_graph_resync(
+    workers: int = 4,
+    batch_size: int = 1000,
+    checkpoint_path: Optional[str] = None,
+    incremental: bool = False,
+    restart: bool = False,
+    max_retries: int = 3,
+    graph_service=None,
+    session_factory: Callable[[], Session] = BackgroundSessionLocal,
+) -> Dict[str, int]:
+    """Run a resumable, parallel resync of entities and links to Neo4j.
+
+    Args:
+        workers: Number of parallel workers (and id ranges) per phase
+        batch_size: Rows per keyset page / graph write
+        checkpoint_path: Where to persist progress (defaults to ``default_checkpoint_path()``)
+        incremental: Only sync rows created (or, for entities, updated) since the
+            last completed run started; links are insert-only here
+        restart: Ignore an unfinished checkpoint and plan a fresh run
+        max_retries: Retries (with exponential backoff) per failed graph write
+        graph_service: Graph service to write to (defaults to the global one)
+        session_factory: Factory for per-worker database sessions
+
+    Returns:
+        Number of rows synced per phase
+    """
+    graph_service = graph_service or get_graph_service()
+    if not graph_service:
+        logger.warning("Neo4j not enabled, skipping sync")
+        return {}
+
+    checkpoint_path = checkpoint_path or default_checkpoint_path()
+    checkpoint = SyncCheckpoint(checkpoint_path)
+    db = session_factory()
+    try:
+        if checkpoint.in_progress and not restart:
+            since_value = checkpoint.state.get("since")
+            since = datetime.fromisoformat(since_value) if since_value else None
+            logger.info(f"Resuming {checkpoint.state.get('mode')} graph sync from checkpoint {checkpoint_path}")
+        else:
+            since = checkpoint.last_synced_at if incremental else None
+            if incremental and since is None:
+                logger.info("No completed sync recorded; running a full sync")
+            # Rows committed after this point may fall outside the planned id
+            # ranges, so the watermark must not be later than the planning reads.
+            started_at = datetime.utcnow()
+            phases = {phase: _plan_phase(db, phase, workers, since) for phase in SYNC_PHASES}
+            checkpoint.start_run("incremental" if since else "full", since, phases, started_at)
+
+        totals = {
+            phase: _remaining_rows(db, phase, checkpoint.state["phases"][phase], since)
+            for phase in SYNC_PHASES
+        }
+    finally:
+        db.close()
+
+    synced: Dict[str, int] = {}
+    for phase in SYNC_PHASES:
+        ranges = checkpoint.state["phases"][phase]
+        progress = SyncProgress(phase, totals[phase])
+        logger.info(f"Syncing {totals[phase]} {phase} with {len(ranges)} workers...")
+
+        with ThreadPoolExecutor(max_workers=max(1, len(ranges))) as executor:
+            futures = [
+                executor.submit(
+                    _sync_range, phase, index, id_range, batch_size, since,
+                    graph_service, checkpoint, progress, session_factory, max_retries,
+                )
+                for index, id_range in enumerate(ranges)
+            ]
+            for future in futures:
+                future.result()
+
+        synced[phase] = progress.done
+
+    checkpoint.complete_run()
+    logger.info("Entity sync to Neo4j completed")
+    return synced
+
+
 def sync_all_entities_to_graph(db: Session, batch_size: int = 1000):
-    """Sync all entities from PostgreSQL to Neo4j (for initial setup)."""
+    """Sync all entities from PostgreSQL to Neo4j (for initial setup).
+
+    Single-session, non-checkpointed variant of ``run_graph_resync``.
+    """
     graph_service = get_graph_service()
     if not graph_service:
         logger.warning("Neo4j not enabled, skipping sync")
         return
-    
+
     logger.info("Starting full entity sync to Neo4j...")
-    
-    # Sync all entities
-    offset = 0
-    while True:
-        entities = db.query(Entity).offset(offset).limit(batch_size).all()
-        if not entities:
-            break
-        
-        for entity in entities:
-            sync_entity_to_graph(entity, graph_service)
-        
-        offset += batch_size
-        logger.info(f"Synced {offset} entities...")
-    
-    # Sync all entity links
-    offset = 0
-    while True:
-        links = db.query(EntityLink).offset(offset).limit(batch_size).all()
-        if not links:
-            break
-        
-        for link in links:
-            sync_entity_link_to_graph(link, db, graph_service)
-        
-        offset += batch_size
-        logger.info(f"Synced {offset} entity links...")
-    
-    logger.info("Entity sync to Neo4j completed")
 
+    for phase in SYNC_PHASES:
+        fetch = _PHASE_FETCHERS[phase]
+        max_id = db.query(func.max(_PHASE_MODELS[phase].id)).scalar() or 0
+        cursor = 0
+        synced = 0
+        while True:
+            page = fetch(db, cursor, max_id, batch_size)
+            if not page:
+                break
+            _write_phase_batch(graph_service, phase, [row for _, row in page])
+            cursor = page[-1][0]
+            synced += len(page)
+            logger.info(f"Synced {synced} {phase}...")
+
+    logger.info("Entity sync to Neo4j completed")
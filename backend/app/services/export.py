@@ -0,0 +1,299 @@
+"""Streaming bulk export of transactions joined to their scores.
+
+Rows are read through a server-side cursor (``yield_per``) and encoded chunk
+by chunk, so memory use is bounded by ``chunk_size`` regardless of how many
+rows match. Ranges older than the cold-tier cutoff are read from the Parquet
+archive first. Supported formats are NDJSON, CSV and Parquet (requires pyarrow).
+"""
+import csv
+import enum
+import io
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.database import AnalyticsSessionLocal
+from app.models import RiskLevel, Transaction, Score
+from app.services.archive import ArchiveStore, archive_enabled
+
+DEFAULT_CHUNK_SIZE = 10000
+
+EXPORT_COLUMNS = [
+    Transaction.id,
+    Transaction.transaction_id,
+    Transaction.amount,
+    Transaction.currency,
+    Transaction.merchant_id,
+    Transaction.merchant_name,
+    Transaction.merchant_category,
+    Transaction.channel,
+    Transaction.customer_id,
+    Transaction.account_id,
+    Transaction.device_id,
+    Transaction.ip_address,
+    Transaction.geo_country,
+    Transaction.geo_city,
+    Transaction.timestamp,
+    Transaction.created_at,
+    Score.anomaly_score,
+    Score.reconstruction_error,
+    Score.classifier_score,
+    Score.risk_level,
+    Score.decision,
+]
+
+FIELD_NAMES = [column.key for column in EXPORT_COLUMNS]
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def parse_risk_level(value: Optional[str]) -> Optional[RiskLevel]:
+    """A risk level filter given by value ("high") or name ("HIGH").
+
+    Raises:
+        ValueError: not a risk level
+    """
+    if value is None or isinstance(value, RiskLevel):
+        return value
+    try:
+        return RiskLevel(value.lower())
+    except ValueError:
+        raise ValueError(f"Unknown risk level: {value}")
+
+
+def build_export_query(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    customer_id: Optional[str] = None,
+    merchant_id: Optional[str] = None,
+    account_id: Optional[str] = None,
+    device_id: Optional[str] = None,
+    risk_level: Optional[str] = None,
+):
+    """Transactions left-joined to scores, filtered and ordered by time."""
+    stmt = select(*EXPORT_COLUMNS).select_from(Transaction).outerjoin(
+        Score, Score.transaction_id == Transaction.id
+    )
+    if start:
+        stmt = stmt.where(Transaction.timestamp >= start)
+    if end:
+        stmt = stmt.where(Transaction.timestamp < end)
+    if customer_id:
+        stmt = stmt.where(Transaction.customer_id == customer_id)
+    if merchant_id:
+        stmt = stmt.where(Transaction.merchant_id == merchant_id)
+    if account_id:
+        stmt = stmt.where(Transaction.account_id == account_id)
+    if device_id:
+        stmt = stmt.where(Transaction.device_id == device_id)
+    if risk_level:
+        stmt = stmt.where(Transaction.risk_level == parse_risk_level(risk_level))
+    return stmt.order_by(Transaction.timestamp, Transaction.id)
+
+
+def iter_row_chunks(db: Session, stmt, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """Yield lists of row dicts using a server-side cursor."""
+    result = db.execute(stmt.execution_options(yield_per=chunk_size))
+    for partition in result.partitions():
+        yield [
+            {
+                key: value.value if isinstance(value, enum.Enum) else value
+                for key, value in row._mapping.items()
+            }
+            for row in partition
+        ]
+
+
+# Score columns that are not copied onto transactions, so not in the archive
+ARCHIVED_SCORE_COLUMNS = [Score.reconstruction_error, Score.classifier_score]
+
+
+def iter_archived_chunks(
+    db: Session,
+    store: ArchiveStore,
+    start: Optional[datetime],
+    end: Optional[datetime],
+    chunk_size: int,
+    risk_level: Optional[str] = None,
+    **filters,
+) -> Iterator[List[Dict[str, Any]]]:
+    """Archived transactions shaped like export rows.
+
+    Score columns not stored on transactions are read from ``scores`` for
+    each batch.
+    """
+    equals = {name: value for name, value in filters.items() if value}
+    if risk_level:
+        equals["risk_level"] = parse_risk_level(risk_level).value
+    for rows in store.read("transactions", start=start, end=end, equals=equals, batch_size=chunk_size):
+        scores = {
+            score.transaction_id: {column.key: score._mapping[column.key] for column in ARCHIVED_SCORE_COLUMNS}
+            for score in db.execute(
+                select(Score.transaction_id, *ARCHIVED_SCORE_COLUMNS)
+                .where(Score.transaction_id.in_([row["id"] for row in rows]))
+            )
+        }
+        empty = dict.fromkeys(column.key for column in ARCHIVED_SCORE_COLUMNS)
+        yield [
+            {name: row.get(name) for name in FIELD_NAMES} | dict(scores.get(row["id"], empty))
+            for row in rows
+        ]
+
+
+def iter_export_chunks(
+    db: Session,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    **filters,
+) -> Iterator[List[Dict[str, Any]]]:
+    """Archived rows before the archive cutoff, then live rows from the database."""
+    store = ArchiveStore() if archive_enabled() else None
+    cutoff = store.cutoff("transactions") if store else None
+    if cutoff and (start is None or start < cutoff):
+        archive_end = min(end, cutoff) if end else cutoff
+        yield from iter_archived_chunks(db, store, start, archive_end, chunk_size, **filters)
+        start = cutoff
+        if end is not None and end <= start:
+            return
+    yield from iter_row_chunks(db, build_export_query(start=start, end=end, **filters), chunk_size)
+
+
+def _json_default(value: Any):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_ndjson(chunks: Iterable[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    for rows in chunks:
+        yield "".join(json.dumps(row, default=_json_default) + "\n" for row in rows).encode()
+
+
+def encode_csv(chunks: Iterable[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=FIELD_NAMES)
+    writer.writeheader()
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object whose contents can be drained between row groups."""
+
+    def __init__(self):
+        super().__init__()
+        self._parts: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def _parquet_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("id", pa.int64()),
+        ("transaction_id", pa.string()),
+        ("amount", pa.float64()),
+        ("currency", pa.string()),
+        ("merchant_id", pa.string()),
+        ("merchant_name", pa.string()),
+        ("merchant_category", pa.string()),
+        ("channel", pa.string()),
+        ("customer_id", pa.string()),
+        ("account_id", pa.string()),
+        ("device_id", pa.string()),
+        ("ip_address", pa.string()),
+        ("geo_country", pa.string()),
+        ("geo_city", pa.string()),
+        ("timestamp", pa.timestamp("us")),
+        ("created_at", pa.timestamp("us")),
+        ("anomaly_score", pa.float64()),
+        ("reconstruction_error", pa.float64()),
+        ("classifier_score", pa.float64()),
+        ("risk_level", pa.string()),
+        ("decision", pa.string()),
+    ])
+
+
+def encode_parquet(chunks: Iterable[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    """Write one Parquet row group per chunk, yielding bytes as they are produced."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _parquet_schema()
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for rows in chunks:
+            writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+ENCODERS: Dict[str, Callable[[Iterable[List[Dict[str, Any]]]], Iterator[bytes]]] = {
+    "ndjson": encode_ndjson,
+    "csv": encode_csv,
+    "parquet": encode_parquet,
+}
+
+
+def check_format(fmt: str):
+    """Raise ValueError for unknown formats or a missing optional dependency."""
+    if fmt not in ENCODERS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    if fmt == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ValueError("Parquet export requires pyarrow to be installed")
+
+
+def stream_transactions_export(
+    fmt: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    session_factory: Callable[[], Session] = AnalyticsSessionLocal,
+    **filters,
+) -> Iterator[bytes]:
+    """Encode a filtered transaction export, owning its own database session.
+
+    The session lives as long as the generator, so it is safe to hand the
+    generator to a streaming HTTP response.
+    """
+    check_format(fmt)
+    db = session_factory()
+    try:
+        chunks = iter_export_chunks(db, chunk_size, **filters)
+        yield from ENCODERS[fmt](chunks)
+    finally:
+        db.close()
@@ -0,0 +1,171 @@
+"""Per-customer scoring features held in Redis.
+
+Batch scoring needs the historical stats ``FeatureEngineer.build_features``
+expects for every customer in the batch, and bumps each customer's velocity
+counters. Both go through the multi-key cache API so a batch costs a few
+Redis round trips regardless of its size:
+
+- historical stats: one MGET for the whole batch; customers not cached are
+  computed with one grouped query and written back with one pipelined MSET
+- velocity: per-customer hourly transaction counters. Every ingest path
+  bumps them after its commit (one pipelined INCRBY/EXPIRE); the last 24h
+  count is the sum of the last 24 hourly buckets, read with one MGET
+
+The counters can only raise the database count used for scoring, never
+lower it. Without Redis the stats come from the database on every call and
+no velocity counters are kept.
+"""
+import math
+from collections import Counter as Tally
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+from app.cache import CacheKeys, aget_counters, aincr_counters, amget_cache, amset_cache, incr_counters
+from app.config import settings
+from app.models import Transaction
+
+# Velocity counters are hourly buckets; the window is the last 24 of them
+VELOCITY_BUCKET_SECONDS = 3600
+VELOCITY_WINDOW_BUCKETS = 24
+
+# How far back historical stats look
+STATS_LOOKBACK_DAYS = 30
+
+
+def features_key(customer_id: str) -> str:
+    return f"{CacheKeys.CUSTOMER_FEATURES}:{customer_id}"
+
+
+def _velocity_bucket(timestamp: datetime) -> int:
+    return int(timestamp.timestamp()) // VELOCITY_BUCKET_SECONDS
+
+
+def velocity_key(customer_id: str, bucket: int) -> str:
+    return f"{CacheKeys.VELOCITY}:{customer_id}:{bucket}"
+
+
+def velocity_window_keys(customer_id: str, now: datetime) -> List[str]:
+    """The hourly counters making up the 24h window that ends at ``now``."""
+    current = _velocity_bucket(now)
+    return [velocity_key(customer_id, current - offset) for offset in range(VELOCITY_WINDOW_BUCKETS)]
+
+
+def compute_historical_stats(
+    db: Session,
+    customer_ids: Iterable[str],
+    now: Optional[datetime] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """Historical stats for ``customer_ids`` from one grouped query.
+
+    Customers without recent transactions get an empty dict, which is cached
+    like any other value so they are not looked up again until it expires.
+    """
+    customer_ids = list(customer_ids)
+    now = now or datetime.utcnow()
+    rows = db.query(
+        Transaction.customer_id,
+        func.avg(Transaction.amount),
+        func.avg(Transaction.amount * Transaction.amount),
+        func.max(Transaction.timestamp),
+        func.sum(case((Transaction.timestamp >= now - timedelta(hours=24), 1), else_=0)),
+        func.sum(case((Transaction.timestamp >= now - timedelta(days=7), 1), else_=0)),
+    ).filter(
+        Transaction.customer_id.in_(customer_ids),
+        Transaction.timestamp >= now - timedelta(days=STATS_LOOKBACK_DAYS),
+        Transaction.timestamp < now,
+    ).group_by(Transaction.customer_id).all()
+
+    stats: Dict[str, Dict[str, Any]] = {customer_id: {} for customer_id in customer_ids}
+    for customer_id, avg_amount, avg_square, last_at, count_24h, count_7d in rows:
+        avg_amount = float(avg_amount or 0.0)
+        variance = float(avg_square or 0.0) - avg_amount * avg_amount
+        stats[customer_id] = {
+            "avg_amount": avg_amount,
+            "std_amount": math.sqrt(variance) if variance > 0 else 0.0,
+            "last_transaction_at": last_at.isoformat() if last_at else None,
+            "transaction_count_24h": int(count_24h or 0),
+            "transaction_count_7d": int(count_7d or 0),
+        }
+    return stats
+
+
+async def load_historical_stats(db: Session, customer_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Historical stats for each customer: one MGET, plus one query and one MSET for misses."""
+    customer_ids = list(dict.fromkeys(customer_id for customer_id in customer_ids if customer_id))
+    if not customer_ids:
+        return {}
+    cached = await amget_cache(features_key(customer_id) for customer_id in customer_ids)
+    stats = {
+        customer_id: cached[features_key(customer_id)]
+        for customer_id in customer_ids
+        if features_key(customer_id) in cached
+    }
+    missing = [customer_id for customer_id in customer_ids if customer_id not in stats]
+    if missing:
+        computed = compute_historical_stats(db, missing)
+        await amset_cache(
+            {features_key(customer_id): value for customer_id, value in computed.items()},
+            ttl=settings.feature_store_ttl,
+        )
+        stats.update(computed)
+    return stats
+
+
+def _velocity_increments(transactions: Iterable[Transaction]) -> Dict[str, int]:
+    return dict(Tally(
+        velocity_key(transaction.customer_id, _velocity_bucket(transaction.timestamp))
+        for transaction in transactions if transaction.customer_id
+    ))
+
+
+# A bucket is read for 24h after it starts; keep it a little longer
+_VELOCITY_TTL = (VELOCITY_WINDOW_BUCKETS + 1) * VELOCITY_BUCKET_SECONDS
+
+
+def record_velocity(transactions: Iterable[Transaction]):
+    """Count committed ``transactions`` in their customers' hourly velocity buckets."""
+    incr_counters(_velocity_increments(transactions), _VELOCITY_TTL)
+
+
+async def arecord_velocity(transactions: Iterable[Transaction]):
+    """Async ``record_velocity``. Call after the transactions are committed."""
+    await aincr_counters(_velocity_increments(transactions), _VELOCITY_TTL)
+
+
+async def load_velocity(customer_ids: Iterable[str], now: Optional[datetime] = None) -> Dict[str, int]:
+    """Transactions per customer over the last 24h from the counters, in one MGET.
+
+    Empty when Redis is unavailable.
+    """
+    now = now or datetime.utcnow()
+    customer_ids = list(dict.fromkeys(customer_id for customer_id in customer_ids if customer_id))
+    keys = {customer_id: velocity_window_keys(customer_id, now) for customer_id in customer_ids}
+    counters = await aget_counters(key for window in keys.values() for key in window)
+    if counters is None:
+        return {}
+    return {customer_id: sum(counters[key] for key in window) for customer_id, window in keys.items()}
+
+
+def scoring_stats(
+    transaction: Transaction,
+    stats: Optional[Dict[str, Any]],
+    recent_count: Optional[int] = None,
+    preceding: int = 0,
+) -> Dict[str, Any]:
+    """The ``historical_stats`` for scoring ``transaction``.
+
+    Recency is measured from the transaction. The 24h count is the larger of
+    the database count and ``recent_count`` (the velocity counters, which
+    may be newer than the cached stats), plus ``preceding``: the customer's
+    transactions earlier in the same, not yet committed, batch.
+    """
+    result = dict(stats or {})
+    last_at = result.pop("last_transaction_at", None)
+    if last_at:
+        elapsed = transaction.timestamp.replace(tzinfo=None) - datetime.fromisoformat(last_at).replace(tzinfo=None)
+        result["last_transaction_hours"] = max(elapsed.total_seconds() / 3600, 0.0)
+    if transaction.customer_id and (recent_count is not None or preceding):
+        counted = max(result.get("transaction_count_24h", 0), recent_count or 0)
+        result["transaction_count_24h"] = counted + preceding
+    return result
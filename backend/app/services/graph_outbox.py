@@ -0,0 +1,245 @@
+"""Transactional outbox for PostgreSQL -> Neo4j entity sync.
+
+Ingestion code records graph changes in ``graph_outbox`` inside its own
+database transaction instead of calling Neo4j inline. A background relay
+drains the outbox in batches, so ingestion latency never depends on Neo4j and
+a rolled-back transaction never leaves phantom nodes behind. Graph writes are
+MERGE-based, which makes replaying an event after a partial failure harmless.
+
+Events for the same node or relationship (``aggregate_key``) are relayed in
+id order: an event is not picked up while an earlier event for its key is
+still pending, so a retried old event can never overwrite newer state.
+"""
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+from prometheus_client import Counter, Gauge
+from sqlalchemy import func
+from sqlalchemy.orm import Session, aliased
+from app.config import settings
+from app.database import BackgroundSessionLocal
+from app.graph import get_graph_driver, get_graph_service
+from app.models import Entity, EntityLink, GraphOutbox
+
+logger = logging.getLogger(__name__)
+
+EVENT_ENTITY = "entity"
+EVENT_ENTITY_LINK = "entity_link"
+
+outbox_pending = Gauge(
+    "graph_outbox_pending_events",
+    "Graph outbox events waiting to be relayed to Neo4j"
+)
+
+outbox_lag = Gauge(
+    "graph_outbox_lag_seconds",
+    "Age of the oldest graph outbox event not yet relayed"
+)
+
+outbox_relayed = Counter(
+    "graph_outbox_relayed_total",
+    "Graph outbox events relayed to Neo4j",
+    ["event_type"]
+)
+
+outbox_failures = Counter(
+    "graph_outbox_failures_total",
+    "Failed graph outbox relay attempts",
+    ["event_type"]
+)
+
+
+def enqueue_entity(db: Session, entity: Entity):
+    """Record an entity upsert for the relay. Does not flush or commit."""
+    if not settings.neo4j_enabled:
+        return
+
+    db.add(GraphOutbox(
+        event_type=EVENT_ENTITY,
+        aggregate_key=f"{EVENT_ENTITY}:{entity.entity_id}",
+        payload={
+            "entity_id": entity.entity_id,
+            "entity_type": entity.entity_type,
+            "name": entity.name,
+            "metadata": entity.entity_metadata or {},
+        },
+    ))
+
+
+def enqueue_entity_link(db: Session, link: EntityLink, from_entity: Entity, to_entity: Entity):
+    """Record an entity link upsert for the relay. Does not flush or commit."""
+    if not settings.neo4j_enabled:
+        return
+
+    relationship_type = link.relationship_type or "RELATES_TO"
+    db.add(GraphOutbox(
+        event_type=EVENT_ENTITY_LINK,
+        aggregate_key=f"{EVENT_ENTITY_LINK}:{from_entity.entity_id}:{to_entity.entity_id}:{relationship_type}",
+        payload={
+            "from_entity_id": from_entity.entity_id,
+            "to_entity_id": to_entity.entity_id,
+            "relationship_type": relationship_type,
+            "metadata": link.link_metadata or {},
+        },
+    ))
+
+
+def backoff_seconds(attempts: int, max_backoff: Optional[int] = None) -> int:
+    """Exponential backoff (2, 4, 8, ... seconds) capped at ``max_backoff``."""
+    max_backoff = max_backoff if max_backoff is not None else settings.graph_outbox_max_backoff
+    return min(2 ** attempts, max_backoff)
+
+
+def _write_events(graph_service, event_type: str, events: List[GraphOutbox]):
+    if event_type == EVENT_ENTITY:
+        graph_service.sync_entities_batch([event.payload for event in events])
+    else:
+        graph_service.sync_entity_links_batch([event.payload for event in events])
+
+
+def relay_batch(
+    graph_service=None,
+    batch_size: Optional[int] = None,
+    session_factory: Callable[[], Session] = BackgroundSessionLocal,
+) -> int:
+    """Relay one batch of due outbox events to Neo4j.
+
+    Entities are written before links so relationship endpoints carry their
+    full properties. Only the oldest pending event of each aggregate key is
+    due, so a batch holds at most one event per key. Successful events are
+    deleted; failed ones are rescheduled with exponential backoff and hold
+    back later events for their keys until they succeed.
+
+    Returns:
+        Number of events relayed successfully
+    """
+    graph_service = graph_service or get_graph_service()
+    if not graph_service:
+        return 0
+    if getattr(graph_service, "driver", True) is None:
+        # Neo4j was unreachable when the service was created; leave the events
+        # queued (a driver-less service would silently drop them) and reconnect.
+        graph_service.driver = get_graph_driver()
+        if graph_service.driver is None:
+            return 0
+
+    batch_size = batch_size or settings.graph_outbox_batch_size
+    db = session_factory()
+    relayed = 0
+    try:
+        now = datetime.utcnow()
+        earlier = aliased(GraphOutbox)
+        events = db.query(GraphOutbox).filter(
+            GraphOutbox.next_attempt_at <= now,
+            ~db.query(earlier).filter(
+                earlier.aggregate_key == GraphOutbox.aggregate_key,
+                earlier.id < GraphOutbox.id,
+            ).exists(),
+        ).order_by(GraphOutbox.id).limit(batch_size).with_for_update(skip_locked=True).all()
+
+        for event_type in (EVENT_ENTITY, EVENT_ENTITY_LINK):
+            typed_events = [event for event in events if event.event_type == event_type]
+            if not typed_events:
+                continue
+            try:
+                _write_events(graph_service, event_type, typed_events)
+            except Exception as e:
+                outbox_failures.labels(event_type=event_type).inc(len(typed_events))
+                logger.warning(f"Graph outbox relay failed for {len(typed_events)} {event_type} events: {e}")
+                for event in typed_events:
+                    event.attempts += 1
+                    event.last_error = str(e)[:1000]
+                    event.next_attempt_at = now + timedelta(seconds=backoff_seconds(event.attempts))
+                continue
+
+            for event in typed_events:
+                db.delete(event)
+            outbox_relayed.labels(event_type=event_type).inc(len(typed_events))
+            relayed += len(typed_events)
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    return relayed
+
+
+def get_outbox_status(db: Session) -> Dict[str, Any]:
+    """Return outbox depth and lag, updating the Prometheus gauges."""
+    pending, oldest = db.query(func.count(GraphOutbox.id), func.min(GraphOutbox.created_at)).one()
+    lag = (datetime.utcnow() - oldest).total_seconds() if oldest else 0.0
+
+    outbox_pending.set(pending)
+    outbox_lag.set(max(lag, 0.0))
+    return {"pending": pending, "lag_seconds": max(lag, 0.0)}
+
+
+class GraphOutboxRelay:
+    """Background thread that continuously drains the graph outbox."""
+
+    def __init__(
+        self,
+        graph_service=None,
+        batch_size: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+        session_factory: Callable[[], Session] = BackgroundSessionLocal,
+    ):
+        self.graph_service = graph_service
+        self.batch_size = batch_size or settings.graph_outbox_batch_size
+        self.poll_interval = poll_interval if poll_interval is not None else settings.graph_outbox_poll_interval
+        self.session_factory = session_factory
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="graph-outbox-relay", daemon=True)
+        self._thread.start()
+        logger.info("Graph outbox relay started")
+
+    def stop(self, timeout: float = 10.0):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+        logger.info("Graph outbox relay stopped")
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            relayed = 0
+            try:
+                relayed = relay_batch(self.graph_service, self.batch_size, self.session_factory)
+                db = self.session_factory()
+                try:
+                    get_outbox_status(db)
+                finally:
+                    db.close()
+            except Exception as e:
+                logger.error(f"Graph outbox relay error: {e}")
+
+            # Keep draining without sleeping while there is a backlog
+            if relayed < self.batch_size:
+                self._stop_event.wait(self.poll_interval)
+
+
+_relay: Optional[GraphOutboxRelay] = None
+
+
+def start_outbox_relay() -> GraphOutboxRelay:
+    """Start the process-wide outbox relay."""
+    global _relay
+    if _relay is None:
+        _relay = GraphOutboxRelay()
+    _relay.start()
+    return _relay
+
+
+def stop_outbox_relay():
+    """Stop the process-wide outbox relay, if running."""
+    if _relay is not None:
+        _relay.stop()
@@ -0,0 +1,194 @@
+"""Monthly range partitions for the native-partitioning time-series backend.
+
+With ``TIMESERIES_BACKEND=partitioned`` (PostgreSQL without TimescaleDB),
+migration 010 turns ``transactions`` and ``audit_log`` into tables partitioned
+by month on their time column. Partitions are created ahead of time here, at
+startup and periodically, so inserts never fall through to the default
+partition. If rows for a month did land in DEFAULT before its partition
+existed, the DEFAULT partition is detached, the month's partition created,
+the rows moved into it and DEFAULT reattached, all in one transaction.
+``partition_default_rows`` reports what is left in DEFAULT.
+"""
+import logging
+import threading
+from datetime import date, datetime
+from typing import Callable, List, Optional, Tuple
+from prometheus_client import Gauge
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import BackgroundSessionLocal
+
+logger = logging.getLogger(__name__)
+
+BACKEND_TIMESCALE = "timescale"
+BACKEND_PARTITIONED = "partitioned"
+BACKEND_PLAIN = "plain"
+
+# table -> partition key
+PARTITIONED_TABLES = {
+    "transactions": "timestamp",
+    "audit_log": "created_at",
+}
+
+default_partition_rows = Gauge(
+    "partition_default_rows", "Rows in the table's DEFAULT partition (outside every monthly range)", ["table"]
+)
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y_%m}"
+
+
+def monthly_partitions(table: str, first: date, last: date) -> List[Tuple[str, date, date]]:
+    """(name, from, to) for every month from ``first``'s month through ``last``'s month."""
+    partitions = []
+    month = month_start(first)
+    while month <= last:
+        upper = add_months(month, 1)
+        partitions.append((partition_name(table, month), month, upper))
+        month = upper
+    return partitions
+
+
+def is_partitioned(db: Session, table: str) -> bool:
+    return bool(db.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p "
+        "JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = :table);"
+    ), {"table": table}).scalar())
+
+
+def default_partition(db: Session, table: str) -> Optional[str]:
+    """Name of ``table``'s DEFAULT partition, if it has one."""
+    return db.execute(text(
+        "SELECT d.relname FROM pg_partitioned_table p "
+        "JOIN pg_class c ON c.oid = p.partrelid "
+        "JOIN pg_class d ON d.oid = p.partdefid WHERE c.relname = :table;"
+    ), {"table": table}).scalar()
+
+
+def _create_partition(db: Session, table: str, name: str, lower: date, upper: date, default: Optional[str]):
+    """Create one monthly partition, first moving its rows out of ``default``.
+
+    PostgreSQL refuses to create a partition whose range matches rows in the
+    DEFAULT partition, so those rows are moved across with DEFAULT detached.
+    """
+    bounds = f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+    column = PARTITIONED_TABLES[table]
+    in_range = f"\"{column}\" >= '{lower.isoformat()}' AND \"{column}\" < '{upper.isoformat()}'"
+    if default is None or not db.execute(text(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {in_range});")).scalar():
+        db.execute(text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} {bounds};"))
+        return
+
+    db.execute(text(f"ALTER TABLE {table} DETACH PARTITION {default};"))
+    db.execute(text(f"CREATE TABLE {name} PARTITION OF {table} {bounds};"))
+    moved = db.execute(text(f"INSERT INTO {name} SELECT * FROM {default} WHERE {in_range};")).rowcount
+    db.execute(text(f"DELETE FROM {default} WHERE {in_range};"))
+    db.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT;"))
+    logger.warning(f"Moved {moved} rows from {default} into new partition {name}")
+
+
+def ensure_partitions(db: Session, months_ahead: Optional[int] = None, today: Optional[date] = None) -> List[str]:
+    """Create any missing monthly partitions from this month through ``months_ahead``.
+
+    Returns:
+        Names of the partitions created
+    """
+    months_ahead = settings.partition_months_ahead if months_ahead is None else months_ahead
+    today = today or datetime.utcnow().date()
+    created = []
+    for table in PARTITIONED_TABLES:
+        if not is_partitioned(db, table):
+            continue
+        existing = {row[0] for row in db.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = :table;"
+        ), {"table": table})}
+        default = default_partition(db, table)
+        for name, lower, upper in monthly_partitions(table, today, add_months(month_start(today), months_ahead)):
+            if name in existing:
+                continue
+            try:
+                with db.begin_nested():
+                    _create_partition(db, table, name, lower, upper, default)
+            except Exception as e:
+                logger.error(f"Could not create partition {name}: {e}")
+                continue
+            created.append(name)
+        if default is not None:
+            default_partition_rows.labels(table=table).set(
+                db.execute(text(f"SELECT COUNT(*) FROM {default};")).scalar() or 0
+            )
+    db.commit()
+    if created:
+        logger.info(f"Created partitions: {', '.join(created)}")
+    return created
+
+
+class PartitionMaintainer:
+    """Background thread that keeps future monthly partitions created."""
+
+    def __init__(
+        self,
+        interval: Optional[float] = None,
+        session_factory: Callable[[], Session] = BackgroundSessionLocal,
+    ):
+        self.interval = interval if interval is not None else settings.partition_maintenance_interval
+        self.session_factory = session_factory
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="partition-maintainer", daemon=True)
+        self._thread.start()
+        logger.info("Partition maintainer started")
+
+    def stop(self, timeout: float = 10.0):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+        logger.info("Partition maintainer stopped")
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            db = self.session_factory()
+            try:
+                ensure_partitions(db)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Partition maintenance error: {e}")
+            finally:
+                db.close()
+            self._stop_event.wait(self.interval)
+
+
+_maintainer: Optional[PartitionMaintainer] = None
+
+
+def start_partition_maintainer() -> PartitionMaintainer:
+    """Start the process-wide partition maintainer."""
+    global _maintainer
+    if _maintainer is None:
+        _maintainer = PartitionMaintainer()
+    _maintainer.start()
+    return _maintainer
+
+
+def stop_partition_maintainer():
+    """Stop the process-wide partition maintainer, if running."""
+    if _maintainer is not None:
+        _maintainer.stop()
+
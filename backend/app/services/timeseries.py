@@ -0,0 +1,253 @@
+"""Transaction time-series buckets for dashboard charts.
+
+On TimescaleDB the closed buckets come from continuous aggregates
+(``transactions_15m``, ``transactions_1h``, ``transactions_1d``, created in
+migration 007) and only the still-open tail is computed from raw rows. Without
+continuous aggregates ``time_bucket`` runs over raw rows, and on databases
+without TimescaleDB a single portable GROUP BY on floor(epoch / width) is used.
+Each backend returns only the buckets that have rows; ``transaction_buckets``
+fills the gaps so every backend yields the same series.
+"""
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+from sqlalchemy import BigInteger, Integer, cast, extract, func, text
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models import Transaction, RiskLevel
+
+logger = logging.getLogger(__name__)
+
+INTERVAL_MINUTES = {
+    "15m": 15,
+    "1h": 60,
+    "1d": 1440,
+}
+
+CONTINUOUS_AGGREGATES = {
+    "15m": "transactions_15m",
+    "1h": "transactions_1h",
+    "1d": "transactions_1d",
+}
+
+HIGH_RISK_LEVELS = [RiskLevel.HIGH, RiskLevel.CRITICAL]
+
+# How long a positive/negative feature check is trusted before re-checking
+FEATURE_CHECK_TTL_SECONDS = 300
+
+_feature_checks: Dict[str, tuple] = {}
+
+
+def _cached_check(db: Session, key: str, sql: str, params: Dict[str, Any]) -> bool:
+    checked = _feature_checks.get(key)
+    if checked and time.monotonic() - checked[1] < FEATURE_CHECK_TTL_SECONDS:
+        return checked[0]
+    try:
+        available = bool(db.execute(text(sql), params).scalar())
+    except Exception as e:
+        logger.warning(f"Feature check {key} failed: {e}")
+        db.rollback()
+        available = False
+    _feature_checks[key] = (available, time.monotonic())
+    return available
+
+
+def timescale_available(db: Session) -> bool:
+    """Whether the database has the timescaledb extension installed."""
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    return _cached_check(
+        db, "timescaledb",
+        "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'timescaledb');", {},
+    )
+
+
+def continuous_aggregate_available(db: Session, interval: str) -> bool:
+    """Whether the continuous aggregate for ``interval`` exists and may be used."""
+    if not settings.timeseries_continuous_aggregates or not timescale_available(db):
+        return False
+    view = CONTINUOUS_AGGREGATES[interval]
+    return _cached_check(
+        db, view,
+        "SELECT EXISTS (SELECT 1 FROM pg_class WHERE relname = :view AND relkind = 'v');",
+        {"view": view},
+    )
+
+
+def reset_feature_checks():
+    """Forget cached feature checks (e.g. after running migrations)."""
+    _feature_checks.clear()
+
+
+def _bucket_row(bucket: datetime, total: int, high_risk: int) -> Dict[str, Any]:
+    return {
+        "timestamp": bucket.isoformat(),
+        "total": total,
+        "high_risk": high_risk,
+        "alerts": high_risk,  # Simplified
+    }
+
+
+def _raw_time_buckets(
+    db: Session,
+    minutes: int,
+    start_time: datetime,
+    end_time: datetime,
+    include_end: bool = True,
+) -> List[Dict[str, Any]]:
+    """``time_bucket`` counts over raw rows from ``start_time`` to ``end_time``."""
+    result = db.execute(text(
+        f"""
+        SELECT
+            time_bucket(INTERVAL '{minutes} minutes', timestamp) AS bucket,
+            COUNT(*) AS total,
+            COUNT(*) FILTER (WHERE risk_level IN ('HIGH', 'CRITICAL')) AS high_risk
+        FROM transactions
+        WHERE timestamp >= :start_time AND timestamp {'<=' if include_end else '<'} :end_time
+        GROUP BY bucket
+        ORDER BY bucket
+        """
+    ), {"start_time": start_time, "end_time": end_time})
+    return [_bucket_row(row.bucket, row.total, row.high_risk) for row in result]
+
+
+def _next_bucket_start(value: datetime, width: timedelta) -> datetime:
+    """The first bucket boundary at or after ``value`` (epoch-aligned, like ``time_bucket``)."""
+    epoch = datetime(1970, 1, 1)
+    buckets = -((epoch - value) // width)
+    return epoch + buckets * width
+
+
+def continuous_aggregate_buckets(
+    db: Session,
+    interval: str,
+    start_time: datetime,
+    end_time: datetime,
+) -> List[Dict[str, Any]]:
+    """Closed buckets from the continuous aggregate, the edges from raw rows.
+
+    The aggregate is only read for buckets that start at or after
+    ``start_time``; a bucket that starts before it would count rows outside
+    the window, so that partial first bucket is counted from raw rows. The
+    aggregate is also materialized-only, so everything after its last
+    materialized bucket (the open bucket, and anything the refresh policy has
+    not reached yet) is counted from ``transactions`` directly.
+    """
+    minutes = INTERVAL_MINUTES[interval]
+    width = timedelta(minutes=minutes)
+    first_bucket = _next_bucket_start(start_time, width)
+    rows = db.execute(text(
+        f"""
+        SELECT bucket, total, high_risk
+        FROM {CONTINUOUS_AGGREGATES[interval]}
+        WHERE bucket >= :first_bucket AND bucket <= :end_time
+        ORDER BY bucket
+        """
+    ), {"first_bucket": first_bucket, "end_time": end_time}).all()
+    if not rows:
+        return _raw_time_buckets(db, minutes, start_time, end_time)
+
+    data = []
+    if start_time < first_bucket:
+        data.extend(_raw_time_buckets(db, minutes, start_time, first_bucket, include_end=False))
+    data.extend(_bucket_row(row.bucket, row.total, row.high_risk) for row in rows)
+    data.extend(_raw_time_buckets(db, minutes, rows[-1].bucket + width, end_time))
+    return data
+
+
+def time_bucket_buckets(
+    db: Session,
+    interval: str,
+    start_time: datetime,
+    end_time: datetime,
+) -> List[Dict[str, Any]]:
+    """Buckets computed with TimescaleDB ``time_bucket`` over raw rows."""
+    return _raw_time_buckets(db, INTERVAL_MINUTES[interval], start_time, end_time)
+
+
+def _epoch_seconds(db: Session, column):
+    """Whole seconds since the Unix epoch for a naive UTC timestamp column."""
+    if db.get_bind().dialect.name == "sqlite":
+        return cast(func.strftime("%s", column), Integer)
+    return cast(func.floor(extract("epoch", column)), BigInteger)
+
+
+def grouped_buckets(
+    db: Session,
+    interval: str,
+    start_time: datetime,
+    end_time: datetime,
+) -> List[Dict[str, Any]]:
+    """Portable buckets: one GROUP BY on floor(epoch / width).
+
+    Buckets are aligned to multiples of the width since the epoch, which for
+    widths up to a day matches ``time_bucket``.
+    """
+    width = INTERVAL_MINUTES[interval] * 60
+    bucket = (_epoch_seconds(db, Transaction.timestamp) // width * width).label("bucket")
+    rows = db.query(
+        bucket,
+        func.count(Transaction.id).label("total"),
+        func.count(Transaction.id).filter(
+            Transaction.risk_level.in_(HIGH_RISK_LEVELS)
+        ).label("high_risk"),
+    ).filter(
+        Transaction.timestamp >= start_time,
+        Transaction.timestamp <= end_time,
+    ).group_by(bucket).order_by(bucket).all()
+    return [
+        _bucket_row(datetime(1970, 1, 1) + timedelta(seconds=int(row.bucket)), row.total, row.high_risk)
+        for row in rows
+    ]
+
+
+def fill_bucket_gaps(
+    data: List[Dict[str, Any]],
+    interval: str,
+    start_time: datetime,
+    end_time: datetime,
+) -> List[Dict[str, Any]]:
+    """One row per epoch-aligned bucket from ``start_time`` to ``end_time``, zeros where ``data`` has none."""
+    width = INTERVAL_MINUTES[interval] * 60
+    rows = {}
+    for row in data:
+        bucket = datetime.fromisoformat(row["timestamp"])
+        if bucket.tzinfo is not None:
+            bucket = bucket.astimezone(timezone.utc).replace(tzinfo=None)
+        rows[bucket] = row
+
+    filled = []
+    first = int((start_time - datetime(1970, 1, 1)).total_seconds()) // width * width
+    last = int((end_time - datetime(1970, 1, 1)).total_seconds())
+    for epoch in range(first, last + 1, width):
+        bucket = datetime(1970, 1, 1) + timedelta(seconds=epoch)
+        filled.append(rows.get(bucket) or _bucket_row(bucket, 0, 0))
+    return filled
+
+
+def _sparse_buckets(
+    db: Session,
+    interval: str,
+    start_time: datetime,
+    end_time: datetime,
+) -> List[Dict[str, Any]]:
+    if continuous_aggregate_available(db, interval):
+        return continuous_aggregate_buckets(db, interval, start_time, end_time)
+    if timescale_available(db):
+        try:
+            return time_bucket_buckets(db, interval, start_time, end_time)
+        except Exception as e:
+            logger.warning(f"time_bucket query failed, using portable bucketing: {e}")
+            db.rollback()
+    return grouped_buckets(db, interval, start_time, end_time)
+
+
+def transaction_buckets(
+    db: Session,
+    interval: str,
+    start_time: datetime,
+    end_time: datetime,
+) -> List[Dict[str, Any]]:
+    """Total and high-risk counts per bucket using the best available backend, gaps filled."""
+    return fill_bucket_gaps(_sparse_buckets(db, interval, start_time, end_time), interval, start_time, end_time)
@@ -0,0 +1,62 @@
+"""Script to move old TimescaleDB chunks to the cold-tier Parquet archive.
+
+Each chunk is exported, its row count verified against the Parquet file, and
+only then dropped from PostgreSQL. Safe to re-run: archived chunks are gone
+from the database, and a chunk that failed verification is retried.
+
+Examples:
+    python scripts/archive_chunks.py --dry-run
+    python scripts/archive_chunks.py --older-than 365 --table transactions
+    python scripts/archive_chunks.py --uri s3://fraud-archive/prod --keep-chunks
+"""
+import argparse
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.services.archive import ARCHIVE_TABLES, ArchiveStore, archive_enabled, run_archive
+from app.config import settings
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Archive old hypertable chunks to Parquet.")
+    parser.add_argument("--older-than", type=int, default=settings.archive_after_days,
+                        help="Archive chunks whose data is entirely older than this many days.")
+    parser.add_argument("--table", action="append", choices=sorted(ARCHIVE_TABLES),
+                        help="Table to archive (repeatable; defaults to all).")
+    parser.add_argument("--uri", default=settings.archive_uri,
+                        help="Archive location: local directory or e.g. s3://bucket/prefix.")
+    parser.add_argument("--dry-run", action="store_true", help="List chunks that would be archived.")
+    parser.add_argument("--keep-chunks", action="store_true",
+                        help="Export and verify but do not drop the chunks.")
+    return parser
+
+
+def main():
+    """Archive chunks older than the retention window."""
+    args = build_parser().parse_args()
+    if not archive_enabled(args.uri):
+        logger.error("Archiving requires ARCHIVE_URI (or --uri) and pyarrow.")
+        sys.exit(1)
+
+    archived = run_archive(
+        older_than_days=args.older_than,
+        tables=args.table,
+        dry_run=args.dry_run,
+        drop=not args.keep_chunks,
+        store=ArchiveStore(args.uri),
+    )
+    if args.dry_run:
+        for chunk in archived:
+            logger.info(f"Would archive {chunk['chunk_name']} [{chunk['range_start']}, {chunk['range_end']})")
+    logger.info(f"{'Found' if args.dry_run else 'Archived'} {len(archived)} chunks")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Benchmark cache serialization: legacy json vs typed orjson (+ compression).
+
+Builds a representative case report in memory and measures, per operation,
+the cost of writing it to the cache and of serving it back on a hit:
+
+- legacy: ``json.dumps(value, default=str)`` on write; ``json.loads`` plus
+  response-model validation and re-serialization on a hit
+- typed: ``model_dump`` + orjson (zlib above the threshold) on write; the
+  stored JSON bytes returned as-is on a hit
+
+No database or Redis is needed.
+
+Examples:
+    python scripts/benchmark_cache_serialization.py
+    python scripts/benchmark_cache_serialization.py --transactions 500 --iterations 2000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import logging
+
+from app.schemas import CaseReportResponse
+from app.serialization import decode_payload, encode
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def sample_report(transactions: int, entities: int, events: int) -> CaseReportResponse:
+    now = datetime.utcnow()
+    return CaseReportResponse(
+        case={
+            "id": 1, "case_id": "CASE-1", "title": "Card testing ring", "description": "Benchmark case",
+            "status": "investigation", "priority": "high", "owner_id": 1, "tags": ["card-testing", "ring"],
+            "created_at": now, "updated_at": now, "closed_at": None,
+        },
+        transactions=[
+            {
+                "id": i, "transaction_id": f"tx_{i:08d}", "amount": 10.0 + i, "currency": "USD",
+                "merchant_id": f"merch_{i % 50}", "merchant_name": f"Merchant {i % 50}",
+                "merchant_category": "5411", "channel": "online", "customer_id": f"cust_{i % 20}",
+                "account_id": f"acct_{i % 20}", "device_id": f"dev_{i % 30}", "ip_address": "10.0.0.1",
+                "geo_country": "US", "geo_city": "Austin",
+                "timestamp": now - timedelta(minutes=i), "created_at": now - timedelta(minutes=i),
+            }
+            for i in range(transactions)
+        ],
+        entities=[
+            {
+                "id": i, "entity_id": f"cust_{i}", "entity_type": "customer", "name": f"Customer {i}",
+                "metadata": {"segment": "retail", "risk": i % 5}, "created_at": now, "updated_at": now,
+            }
+            for i in range(entities)
+        ],
+        events=[
+            {
+                "id": i, "case_id": 1, "event_type": "note", "title": f"Note {i}", "content": "Reviewed " * 20,
+                "metadata": {"source": "analyst"}, "created_by_id": 1, "created_at": now,
+            }
+            for i in range(events)
+        ],
+        summary={"transaction_count": transactions, "entity_count": entities, "event_count": events},
+    )
+
+
+def timed(fn, iterations: int) -> float:
+    """Mean microseconds per call."""
+    began = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - began) / iterations * 1e6
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transactions", type=int, default=200)
+    parser.add_argument("--entities", type=int, default=20)
+    parser.add_argument("--events", type=int, default=30)
+    parser.add_argument("--iterations", type=int, default=500)
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    report = sample_report(args.transactions, args.entities, args.events)
+
+    # What the legacy path actually needs to store a usable value: model_dump first
+    legacy_stored = json.dumps(report.model_dump(), default=str)
+    typed_stored = encode(report, compress_min_bytes=0)
+    compressed_stored = encode(report, compress_min_bytes=1)
+
+    results = {
+        "legacy": {
+            "bytes": len(legacy_stored.encode()),
+            "write_us": timed(lambda: json.dumps(report.model_dump(), default=str), args.iterations),
+            "hit_us": timed(
+                lambda: CaseReportResponse.model_validate(json.loads(legacy_stored)).model_dump_json(),
+                args.iterations,
+            ),
+        },
+        "typed": {
+            "bytes": len(typed_stored),
+            "write_us": timed(lambda: encode(report, compress_min_bytes=0), args.iterations),
+            "hit_us": timed(lambda: decode_payload(typed_stored), args.iterations),
+        },
+        "typed+zlib": {
+            "bytes": len(compressed_stored),
+            "write_us": timed(lambda: encode(report, compress_min_bytes=1), args.iterations),
+            "hit_us": timed(lambda: decode_payload(compressed_stored), args.iterations),
+        },
+    }
+
+    baseline = results["legacy"]
+    for name, stats in results.items():
+        logger.info(
+            f"{name:>11}: {stats['bytes']:>8} bytes, write {stats['write_us']:9.1f}us, "
+            f"hit {stats['hit_us']:9.1f}us (hit {baseline['hit_us'] / stats['hit_us']:.1f}x vs legacy)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""Benchmark hypertable compression: ratio, chunk sizes and per-customer lookup latency.
+
+Measures the current state, optionally recompresses chunks older than
+--older-than with the table's current compression settings (e.g. after running
+migration 009), then measures again and prints a before/after comparison.
+
+Examples:
+    python scripts/benchmark_compression.py
+    python scripts/benchmark_compression.py --recompress --older-than 30 --customers 50
+    python scripts/benchmark_compression.py --database-url postgresql://... --json results.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import create_engine, text
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+HYPERTABLES = ["transactions", "audit_log"]
+
+CUSTOMER_LOOKUP = text(
+    """
+    SELECT id, amount, merchant_id, "timestamp", risk_level
+    FROM transactions
+    WHERE customer_id = :customer_id
+      AND "timestamp" >= :start AND "timestamp" < :end
+    ORDER BY "timestamp" DESC
+    LIMIT 100
+    """
+)
+
+
+def compression_stats(conn, table: str) -> dict:
+    """Chunk counts, sizes and compression ratio for one hypertable."""
+    row = conn.execute(text(
+        "SELECT total_chunks, number_compressed_chunks, "
+        "before_compression_total_bytes, after_compression_total_bytes "
+        "FROM hypertable_compression_stats(:table)"
+    ), {"table": table}).first()
+    total_bytes = conn.execute(text("SELECT hypertable_size(:table)"), {"table": table}).scalar()
+    interval = conn.execute(text(
+        "SELECT time_interval FROM timescaledb_information.dimensions "
+        "WHERE hypertable_name = :table AND dimension_number = 1"
+    ), {"table": table}).scalar()
+    settings = conn.execute(text(
+        "SELECT attname, segmentby_column_index, orderby_column_index, orderby_asc "
+        "FROM timescaledb_information.compression_settings WHERE hypertable_name = :table "
+        "ORDER BY segmentby_column_index NULLS LAST, orderby_column_index NULLS LAST"
+    ), {"table": table}).all()
+
+    before, after = (row[2], row[3]) if row else (None, None)
+    return {
+        "chunks": row[0] if row else None,
+        "compressed_chunks": row[1] if row else None,
+        "chunk_interval": str(interval),
+        "segmentby": [s.attname for s in settings if s.segmentby_column_index is not None],
+        "orderby": [
+            f"{s.attname} {'ASC' if s.orderby_asc else 'DESC'}"
+            for s in settings if s.orderby_column_index is not None
+        ],
+        "total_bytes": total_bytes,
+        "before_compression_bytes": before,
+        "after_compression_bytes": after,
+        "compression_ratio": round(before / after, 2) if before and after else None,
+    }
+
+
+def sample_customers(conn, count: int, start: datetime, end: datetime) -> list:
+    return [row[0] for row in conn.execute(text(
+        """
+        SELECT customer_id FROM transactions
+        WHERE customer_id IS NOT NULL AND "timestamp" >= :start AND "timestamp" < :end
+        GROUP BY customer_id ORDER BY COUNT(*) DESC LIMIT :count
+        """
+    ), {"start": start, "end": end, "count": count})]
+
+
+def lookup_latency(conn, customers: list, start: datetime, end: datetime, runs: int) -> dict:
+    """Median and p95 latency (ms) of per-customer lookups over [start, end)."""
+    timings = []
+    for _ in range(runs):
+        for customer_id in customers:
+            began = time.perf_counter()
+            conn.execute(CUSTOMER_LOOKUP, {"customer_id": customer_id, "start": start, "end": end}).all()
+            timings.append((time.perf_counter() - began) * 1000)
+    if not timings:
+        return {"queries": 0}
+    timings.sort()
+    return {
+        "queries": len(timings),
+        "median_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+    }
+
+
+def measure(conn, customers: list, windows: dict, runs: int) -> dict:
+    return {
+        "tables": {table: compression_stats(conn, table) for table in HYPERTABLES},
+        "lookups": {
+            name: lookup_latency(conn, customers, start, end, runs)
+            for name, (start, end) in windows.items()
+        },
+    }
+
+
+def recompress(conn, table: str, older_than_days: int):
+    """Decompress and recompress old chunks so they pick up the current settings."""
+    chunks = [row[0] for row in conn.execute(text(
+        "SELECT c FROM show_chunks(:table, older_than => :older) c"
+    ), {"table": table, "older": timedelta(days=older_than_days)})]
+    logger.info(f"Recompressing {len(chunks)} chunks of {table}...")
+    for chunk in chunks:
+        conn.execute(text("SELECT decompress_chunk(CAST(:chunk AS regclass), if_compressed => TRUE)"), {"chunk": chunk})
+        conn.execute(text("SELECT compress_chunk(CAST(:chunk AS regclass), if_not_compressed => TRUE)"), {"chunk": chunk})
+
+
+def report(label: str, result: dict):
+    logger.info(f"== {label} ==")
+    for table, stats in result["tables"].items():
+        logger.info(
+            f"  {table}: {stats['chunks']} chunks ({stats['compressed_chunks']} compressed), "
+            f"interval {stats['chunk_interval']}, segmentby {stats['segmentby']}, "
+            f"orderby {stats['orderby']}, ratio {stats['compression_ratio']}, "
+            f"size {stats['total_bytes']} bytes"
+        )
+    for name, stats in result["lookups"].items():
+        logger.info(f"  customer lookup ({name}): {stats}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--customers", type=int, default=20, help="Number of customers to sample.")
+    parser.add_argument("--runs", type=int, default=3, help="Passes over the sampled customers.")
+    parser.add_argument("--older-than", type=int, default=30,
+                        help="Age in days separating compressed history from recent data.")
+    parser.add_argument("--recompress", action="store_true",
+                        help="Recompress chunks older than --older-than and measure again.")
+    parser.add_argument("--json", help="Write the measurements to this file.")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    if not args.database_url:
+        raise SystemExit("Set DATABASE_URL or pass --database-url")
+
+    engine = create_engine(args.database_url)
+    now = datetime.utcnow()
+    boundary = now - timedelta(days=args.older_than)
+    windows = {
+        "recent": (boundary, now),
+        "historical": (boundary - timedelta(days=30), boundary),
+    }
+
+    with engine.connect() as conn:
+        has_timescale = conn.execute(text(
+            "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'timescaledb')"
+        )).scalar()
+        if not has_timescale:
+            raise SystemExit("TimescaleDB is not installed in this database")
+
+        customers = sample_customers(conn, args.customers, *windows["historical"])
+        customers = customers or sample_customers(conn, args.customers, *windows["recent"])
+        results = {"before": measure(conn, customers, windows, args.runs)}
+        report("before", results["before"])
+
+        if args.recompress:
+            for table in HYPERTABLES:
+                recompress(conn, table, args.older_than)
+            conn.commit()
+            results["after"] = measure(conn, customers, windows, args.runs)
+            report("after", results["after"])
+
+            for name in windows:
+                before = results["before"]["lookups"][name].get("median_ms")
+                after = results["after"]["lookups"][name].get("median_ms")
+                if before and after:
+                    logger.info(f"  {name} lookup median: {before}ms -> {after}ms ({before / after:.1f}x)")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2, default=str)
+
+
+if __name__ == "__main__":
+    main()
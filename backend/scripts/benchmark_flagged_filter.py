@@ -0,0 +1,121 @@
+"""Benchmark the `flagged` transaction filter: Python IN-list vs EXISTS semi-join.
+
+Builds (or reuses) a database with a large case_transactions table and times
+the first page of GET /transactions?flagged=true|false both ways.
+
+Examples:
+    python scripts/benchmark_flagged_filter.py
+    python scripts/benchmark_flagged_filter.py --database-url postgresql://... --transactions 2000000 --case-links 500000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import create_engine, insert, func
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models import Transaction, Case, CaseTransaction, CaseStatus
+from app.routers.transactions import flagged_filter
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def populate(db, transactions: int, case_links: int, chunk: int = 50000):
+    """Insert synthetic transactions and case links if the tables are empty."""
+    if db.query(func.count(Transaction.id)).scalar():
+        logger.info("Reusing existing data")
+        return
+
+    logger.info(f"Inserting {transactions} transactions and {case_links} case links...")
+    base = datetime.utcnow() - timedelta(days=30)
+    for start in range(0, transactions, chunk):
+        db.execute(insert(Transaction), [
+            {
+                "transaction_id": f"BENCH-{i}",
+                "amount": 10.0,
+                "customer_id": f"cust_{i % 5000}",
+                "merchant_id": f"m_{i % 50}",
+                "timestamp": base + timedelta(seconds=i),
+            }
+            for i in range(start, min(start + chunk, transactions))
+        ])
+    db.commit()
+
+    case = Case(case_id="CASE-BENCH", title="Benchmark", status=CaseStatus.OPEN)
+    db.add(case)
+    db.flush()
+    rng = random.Random(7)
+    linked = rng.sample(range(1, transactions + 1), min(case_links, transactions))
+    for start in range(0, len(linked), chunk):
+        db.execute(insert(CaseTransaction), [
+            {"case_id": case.id, "transaction_id": tx_id} for tx_id in linked[start:start + chunk]
+        ])
+    db.commit()
+
+
+def legacy_page(db, flagged: bool, limit: int):
+    """Previous implementation: materialize linked ids in Python, then IN / NOT IN."""
+    tx_ids = [row[0] for row in db.query(CaseTransaction.transaction_id).distinct().all()]
+    condition = Transaction.id.in_(tx_ids)
+    query = db.query(Transaction).filter(condition if flagged else ~condition)
+    return query.order_by(Transaction.timestamp.desc(), Transaction.id.desc()).limit(limit).all()
+
+
+def semi_join_page(db, flagged: bool, limit: int):
+    """Current implementation: EXISTS / NOT EXISTS against case_transactions."""
+    condition = flagged_filter()
+    query = db.query(Transaction).filter(condition if flagged else ~condition)
+    return query.order_by(Transaction.timestamp.desc(), Transaction.id.desc()).limit(limit).all()
+
+
+def time_it(fn, runs: int):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default="sqlite:///./benchmark_flagged.db")
+    parser.add_argument("--transactions", type=int, default=200000)
+    parser.add_argument("--case-links", type=int, default=20000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        populate(db, args.transactions, args.case_links)
+
+        for flagged in (True, False):
+            label = "flagged" if flagged else "unflagged"
+            try:
+                legacy_ms = time_it(lambda: legacy_page(db, flagged, args.limit), args.runs)
+                legacy_text = f"{legacy_ms:.1f}ms"
+            except Exception as e:
+                db.rollback()
+                legacy_ms, legacy_text = None, f"failed ({type(e).__name__})"
+            semi_ms = time_it(lambda: semi_join_page(db, flagged, args.limit), args.runs)
+
+            speedup = f" ({legacy_ms / semi_ms:.1f}x faster)" if legacy_ms else ""
+            logger.info(f"{label:>9}: IN-list {legacy_text}, EXISTS {semi_ms:.1f}ms{speedup}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Script to export transactions (joined to scores) to NDJSON, CSV or Parquet.
+
+Streams rows with a server-side cursor, so memory use stays constant no matter
+how large the export is.
+
+Examples:
+    python scripts/export_transactions.py --format parquet --start 2026-01-01 --end 2026-02-01 -o jan.parquet
+    python scripts/export_transactions.py --format csv --customer-id cust_1234 > cust_1234.csv
+"""
+import argparse
+import sys
+import os
+import time
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.services.export import stream_transactions_export, DEFAULT_CHUNK_SIZE, ENCODERS
+import logging
+
+logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+logger = logging.getLogger(__name__)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Export transactions and scores.")
+    parser.add_argument("--format", choices=sorted(ENCODERS), default="ndjson")
+    parser.add_argument("-o", "--output", help="Output file (defaults to stdout).")
+    parser.add_argument("--start", type=datetime.fromisoformat, help="Inclusive start timestamp.")
+    parser.add_argument("--end", type=datetime.fromisoformat, help="Exclusive end timestamp.")
+    parser.add_argument("--customer-id")
+    parser.add_argument("--merchant-id")
+    parser.add_argument("--account-id")
+    parser.add_argument("--device-id")
+    parser.add_argument("--risk-level", choices=["low", "medium", "high", "critical"])
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    return parser
+
+
+def main():
+    """Run the export."""
+    args = build_parser().parse_args()
+    stream = stream_transactions_export(
+        args.format,
+        chunk_size=args.chunk_size,
+        start=args.start,
+        end=args.end,
+        customer_id=args.customer_id,
+        merchant_id=args.merchant_id,
+        account_id=args.account_id,
+        device_id=args.device_id,
+        risk_level=args.risk_level,
+    )
+
+    output = open(args.output, "wb") if args.output else sys.stdout.buffer
+    started = time.monotonic()
+    written = 0
+    try:
+        for data in stream:
+            output.write(data)
+            written += len(data)
+    finally:
+        if args.output:
+            output.close()
+
+    logger.info(f"Exported {written / 1e6:.1f} MB in {time.monotonic() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,7 @@ import time
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from app.database import SessionLocal
-from app.models import Transaction, Score, Entity
+from app.models import Transaction, Entity, RiskLevel
 from app.cache import get_cache, set_cache, CacheKeys, get_redis_client
 from app.config import settings
 from sqlalchemy import func, and_
@@ -27,10 +27,10 @@ def test_dashboard_metrics_query(db):
     # Test without cache
     start = time.time()
     total = db.query(Transaction).filter(Transaction.timestamp >= today_start).count()
-    high_risk = db.query(Transaction).join(Score).filter(
+    high_risk = db.query(Transaction).filter(
         and_(
             Transaction.timestamp >= today_start,
-            Score.risk_level.in_(["high", "critical"])
+            Transaction.risk_level.in_([RiskLevel.HIGH, RiskLevel.CRITICAL])
         )
     ).count()
     db_time = time.time() - start
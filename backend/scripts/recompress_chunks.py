@@ -0,0 +1,112 @@
+"""Script to apply new compression settings to a hypertable's existing chunks.
+
+TimescaleDB cannot change segmentby/orderby while compressed chunks exist,
+so migration 009 leaves such tables alone. This script does the work outside
+the migration, one chunk per transaction so no lock or transaction spans the
+whole history:
+
+1. pause the table's compression policy
+2. decompress each compressed chunk, committing after each
+3. apply the new compression settings
+4. compress each chunk older than the policy's age, committing after each
+5. resume the policy
+
+Safe to re-run after an interruption: decompression and compression skip
+chunks already in the target state.
+
+Examples:
+    python scripts/recompress_chunks.py --dry-run
+    python scripts/recompress_chunks.py --table transactions
+"""
+import argparse
+import os
+import sys
+from datetime import timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import create_engine, text
+from app.config import settings
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# table -> (segmentby, orderby, compress after days); the settings of migration 009
+COMPRESSION_SETTINGS = {
+    "transactions": ("customer_id", '"timestamp" DESC, transaction_id', 30),
+    "audit_log": ("actor_id", "created_at DESC", 90),
+}
+
+
+def compressed_chunks(conn, table: str) -> list:
+    return [row[0] for row in conn.execute(text(
+        "SELECT format('%I.%I', chunk_schema, chunk_name) FROM timescaledb_information.chunks "
+        "WHERE hypertable_name = :table AND is_compressed ORDER BY range_start"
+    ), {"table": table})]
+
+
+def set_policy_scheduled(conn, table: str, scheduled: bool):
+    conn.execute(text(
+        "SELECT alter_job(job_id, scheduled => :scheduled) FROM timescaledb_information.jobs "
+        "WHERE proc_name = 'policy_compression' AND hypertable_name = :table"
+    ), {"table": table, "scheduled": scheduled})
+    conn.commit()
+
+
+def recompress_table(conn, table: str, segmentby: str, orderby: str, compress_after_days: int):
+    """Decompress, re-tune and recompress ``table``, committing after every chunk."""
+    set_policy_scheduled(conn, table, False)
+    try:
+        chunks = compressed_chunks(conn, table)
+        logger.info(f"Decompressing {len(chunks)} {table} chunks...")
+        for chunk in chunks:
+            conn.execute(text("SELECT decompress_chunk(CAST(:chunk AS regclass), if_compressed => TRUE)"), {"chunk": chunk})
+            conn.commit()
+            logger.info(f"  decompressed {chunk}")
+
+        conn.execute(text(
+            f"ALTER TABLE {table} SET (timescaledb.compress, "
+            f"timescaledb.compress_segmentby = '{segmentby}', "
+            f"timescaledb.compress_orderby = '{orderby}')"
+        ))
+        conn.commit()
+        logger.info(f"{table}: segmentby {segmentby}, orderby {orderby}")
+
+        chunks = [row[0] for row in conn.execute(text(
+            "SELECT c::text FROM show_chunks(:table, older_than => :older) c"
+        ), {"table": table, "older": timedelta(days=compress_after_days)})]
+        logger.info(f"Compressing {len(chunks)} {table} chunks...")
+        for chunk in chunks:
+            conn.execute(text("SELECT compress_chunk(CAST(:chunk AS regclass), if_not_compressed => TRUE)"), {"chunk": chunk})
+            conn.commit()
+            logger.info(f"  compressed {chunk}")
+    finally:
+        conn.rollback()
+        set_policy_scheduled(conn, table, True)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Apply migration 009's compression settings to existing chunks.")
+    parser.add_argument("--database-url", default=settings.database_url)
+    parser.add_argument("--table", action="append", choices=sorted(COMPRESSION_SETTINGS),
+                        help="Table to recompress (repeatable; defaults to all).")
+    parser.add_argument("--dry-run", action="store_true", help="List the compressed chunks that would be rewritten.")
+    return parser
+
+
+def main():
+    """Recompress the selected hypertables chunk by chunk."""
+    args = build_parser().parse_args()
+    engine = create_engine(args.database_url)
+    with engine.connect() as conn:
+        for table in args.table or list(COMPRESSION_SETTINGS):
+            if args.dry_run:
+                logger.info(f"{table}: {len(compressed_chunks(conn, table))} compressed chunks to rewrite")
+                continue
+            recompress_table(conn, table, *COMPRESSION_SETTINGS[table])
+
+
+if __name__ == "__main__":
+    main()
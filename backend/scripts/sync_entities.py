@@ -1,12 +1,21 @@
-"""Script to sync entities from PostgreSQL to Neo4j."""
+"""Script to sync entities from PostgreSQL to Neo4j.
+
+Runs a resumable, parallel resync. Progress is checkpointed after every page,
+so re-running the script after a crash continues from where it stopped.
+
+Examples:
+    python scripts/sync_entities.py --workers 8
+    python scripts/sync_entities.py --incremental
+    python scripts/sync_entities.py --restart
+"""
+import argparse
 import sys
 import os
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from app.database import SessionLocal
-from app.services.entity_sync import sync_all_entities_to_graph
+from app.services.entity_sync import run_graph_resync, default_checkpoint_path
 from app.config import settings
 import logging
 
@@ -14,8 +23,32 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Resync entities and links to Neo4j.")
+    parser.add_argument("--workers", type=int, default=4, help="Parallel workers per phase.")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows per page / graph write.")
+    parser.add_argument(
+        "--checkpoint",
+        default=default_checkpoint_path(),
+        help="Checkpoint file used to resume interrupted runs.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only sync rows created after the last completed run.",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Discard an unfinished checkpoint and start a new run.",
+    )
+    return parser
+
+
 def main():
     """Sync all entities to Neo4j."""
+    args = build_parser().parse_args()
+
     if not settings.neo4j_enabled:
         logger.warning("Neo4j is not enabled. Set NEO4J_ENABLED=true to enable.")
         return
@@ -27,17 +60,20 @@ def main():
     logger.info("Starting entity sync to Neo4j...")
     logger.info(f"Neo4j URI: {settings.neo4j_uri}")
     
-    db = SessionLocal()
     try:
-        sync_all_entities_to_graph(db)
-        logger.info("Entity sync completed successfully!")
+        synced = run_graph_resync(
+            workers=args.workers,
+            batch_size=args.batch_size,
+            checkpoint_path=args.checkpoint,
+            incremental=args.incremental,
+            restart=args.restart,
+        )
+        logger.info(f"Entity sync completed successfully! {synced}")
     except Exception as e:
         logger.error(f"Error during entity sync: {e}", exc_info=True)
+        logger.error("Re-run the script to resume from the last checkpoint.")
         sys.exit(1)
-    finally:
-        db.close()
 
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,116 @@
+"""Verify partition pruning for hot time-bounded queries on the partitioned backend.
+
+Runs the application's hot query paths against a database migrated with
+TIMESERIES_BACKEND=partitioned, captures their SQL, and checks with
+``EXPLAIN (FORMAT JSON)`` that each one only touches the monthly partitions
+overlapping its time range. Exits non-zero if any query scans partitions
+outside its range.
+
+Examples:
+    python scripts/verify_partition_pruning.py
+    python scripts/verify_partition_pruning.py --customer cust_42 --days 7
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import event
+import logging
+
+from app.agents import ComplianceAgent
+from app.database import SessionLocal, engine
+from app.services.dashboard_counters import compute_counters
+from app.services.export import build_export_query
+from app.services.partitions import is_partitioned, monthly_partitions
+from app.services.timeseries import grouped_buckets
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def capture(fn) -> list:
+    """Run ``fn`` and return the SELECT statements it issued against transactions."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "transactions" in statement:
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return statements
+
+
+def scanned_relations(plan: dict) -> list:
+    """Relation names scanned anywhere in an ``EXPLAIN (FORMAT JSON)`` plan node."""
+    relations = [plan["Relation Name"]] if "Relation Name" in plan else []
+    for child in plan.get("Plans", []):
+        relations.extend(scanned_relations(child))
+    return relations
+
+
+def partitions_scanned(db, statement, parameters) -> set:
+    plan = db.connection().exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return {name for name in scanned_relations(plan[0]["Plan"]) if name.startswith("transactions_")}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--customer", default="cust_1", help="Customer id for the velocity check.")
+    parser.add_argument("--days", type=int, default=7, help="Export range in days.")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    db = SessionLocal()
+    try:
+        if not is_partitioned(db, "transactions"):
+            raise SystemExit("transactions is not a partitioned table (run migrations with TIMESERIES_BACKEND=partitioned)")
+
+        now = datetime.utcnow()
+        export_start = now - timedelta(days=args.days)
+        # name -> (callable, range start, range end)
+        hot_paths = {
+            "velocity check": (lambda: ComplianceAgent().check_velocity(args.customer, db), now - timedelta(hours=24), now),
+            "dashboard time series (24h)": (
+                lambda: grouped_buckets(db, "1h", now - timedelta(hours=24), now), now - timedelta(hours=24), now,
+            ),
+            "counter recount (2 days)": (lambda: compute_counters(db, 2), now - timedelta(days=2), now),
+            f"export ({args.days} days)": (
+                lambda: db.execute(build_export_query(start=export_start, end=now).limit(1)).all(), export_start, now,
+            ),
+        }
+
+        failures = 0
+        for name, (fn, start, end) in hot_paths.items():
+            allowed = {partition for partition, _, _ in monthly_partitions("transactions", start.date(), end.date())}
+            for statement, parameters in capture(fn):
+                scanned = partitions_scanned(db, statement, parameters)
+                extra = scanned - allowed
+                status = "ok" if not extra else "NOT PRUNED"
+                logger.info(f"{name}: {status}, scans {sorted(scanned)}")
+                if extra:
+                    failures += 1
+                    logger.error(f"  unexpected partitions {sorted(extra)} for:\n{statement}")
+        db.rollback()
+    finally:
+        db.close()
+
+    if failures:
+        raise SystemExit(f"{failures} statement(s) scanned partitions outside their time range")
+    logger.info("All hot queries are pruned to their time range")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Shared test fixtures: in-memory stand-ins for the Redis clients."""
+import fnmatch
+import json
+import pytest
+from app import cache
+from app.cache import local_cache
+
+
+class FakeRedis:
+    """Just enough of the redis client for the cache layer."""
+
+    def __init__(self):
+        self.store = {}
+        self.sets = {}
+        self.gets = 0
+        self.published = []
+        self.lock_available = True
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def get(self, key):
+        self.gets += 1
+        return self.store.get(key, (None, None))[0]
+
+    def mget(self, keys):
+        return [self.get(key) for key in keys]
+
+    def pttl(self, key):
+        return self.store[key][1] * 1000 if key in self.store else -2
+
+    def setex(self, key, ttl, value):
+        self.store[key] = (value, ttl)
+
+    def incrby(self, key, amount):
+        value = (self.store.get(key, (0, None))[0] or 0) + amount
+        self.store[key] = (value, 60)
+        return value
+
+    def sadd(self, key, member):
+        self.sets.setdefault(key, set()).add(member)
+
+    def smembers(self, key):
+        return set(self.sets.get(key, ()))
+
+    def expire(self, key, ttl):
+        pass
+
+    def unlink(self, *keys):
+        return sum(
+            (self.store.pop(key, None) is not None) + (self.sets.pop(key, None) is not None) for key in keys
+        )
+
+    delete = unlink
+
+    def scan_iter(self, match=None, count=None):
+        return [key for key in list(self.store) if fnmatch.fnmatchcase(key, match or "*")]
+
+    def memory_usage(self, key):
+        return len(self.store[key][0]) + 50 if key in self.store else None
+
+    def publish(self, channel, message):
+        self.published.append(json.loads(message))
+
+    def lock(self, name, timeout=None, blocking=True):
+        return FakeLock(self)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, name):
+        return lambda *args: self.commands.append((name, args))
+
+    def execute(self):
+        return [getattr(self.client, name)(*args) for name, args in self.commands]
+
+
+class FakeAsyncRedis:
+    """Async facade over FakeRedis that counts round trips."""
+
+    def __init__(self, client):
+        self.client = client
+        self.round_trips = 0
+
+    def pipeline(self, transaction=True):
+        return FakeAsyncPipeline(self)
+
+    def lock(self, name, timeout=None, blocking=True):
+        return FakeAsyncLock(self.client)
+
+
+class FakeAsyncPipeline(FakePipeline):
+    def __init__(self, facade):
+        super().__init__(facade.client)
+        self.facade = facade
+
+    async def execute(self):
+        self.facade.round_trips += 1
+        return super().execute()
+
+
+class FakeLock:
+    def __init__(self, client):
+        self.client = client
+
+    def acquire(self):
+        return self.client.lock_available
+
+    def release(self):
+        pass
+
+
+class FakeAsyncLock(FakeLock):
+    async def acquire(self):
+        return super().acquire()
+
+    async def release(self):
+        pass
+
+
+@pytest.fixture
+def redis_client(monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(cache, "get_redis_client", lambda: client)
+    local_cache.clear()
+    yield client
+    local_cache.clear()
+
+
+@pytest.fixture
+def async_redis_client(monkeypatch, redis_client):
+    client = FakeAsyncRedis(redis_client)
+    monkeypatch.setattr(cache, "get_async_redis_client", lambda: client)
+    return client
@@ -0,0 +1,108 @@
+"""Tests for the cold-tier Parquet archive."""
+import json
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.config import settings
+from app.database import Base
+from app.models import Score, Transaction, RiskLevel
+from app.services.archive import ArchiveStore, ArchiveVerificationError, get_archived_transactions
+from app.services.export import stream_transactions_export
+
+pytest.importorskip("pyarrow")
+
+CHUNK_START = datetime(2025, 1, 1)
+CHUNK_END = datetime(2025, 1, 2)
+
+
+def _archived_row(i):
+    return {
+        "id": i, "transaction_id": f"old_{i}", "amount": float(i), "currency": "USD",
+        "merchant_id": "m_1", "merchant_name": None, "merchant_category": None, "channel": "online",
+        "customer_id": f"cust_{i % 2}", "account_id": None, "device_id": None, "ip_address": None,
+        "geo_country": "US", "geo_city": None, "timestamp": CHUNK_START + timedelta(hours=i),
+        "created_at": CHUNK_START + timedelta(hours=i), "risk_level": "high" if i % 2 else "low",
+        "anomaly_score": 0.5, "decision": "review",
+    }
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "archive_uri", str(tmp_path))
+    store = ArchiveStore(str(tmp_path))
+    rows = [_archived_row(i) for i in range(1, 11)]
+    store.write("transactions", "_hyper_1_1_chunk", CHUNK_START, CHUNK_END, [rows[:4], rows[4:]], 10)
+    return store
+
+
+def test_write_verifies_and_records_manifest(store):
+    [entry] = store.load_manifest("transactions")
+
+    assert entry["rows"] == 10
+    assert (entry["min_id"], entry["max_id"]) == (1, 10)
+    assert "/transactions/date=2025-01-01/_hyper_1_1_chunk.parquet" in entry["path"]
+    assert store.cutoff("transactions") == CHUNK_END
+
+
+def test_row_count_mismatch_is_rejected(store):
+    with pytest.raises(ArchiveVerificationError):
+        store.write("transactions", "_hyper_1_2_chunk", CHUNK_END, CHUNK_END + timedelta(days=1),
+                    [[_archived_row(20)]], 2)
+
+    assert [e["chunk"] for e in store.load_manifest("transactions")] == ["_hyper_1_1_chunk"]
+
+
+def test_read_filters_and_prunes_by_range(store):
+    rows = [r for batch in store.read("transactions", equals={"customer_id": "cust_1"},
+                                      start=CHUNK_START + timedelta(hours=3)) for r in batch]
+
+    assert [r["id"] for r in rows] == [3, 5, 7, 9]
+    assert list(store.read("transactions", end=CHUNK_START)) == []
+    assert [r["transaction_id"] for r in get_archived_transactions([2, 99])] == ["old_2"]
+
+
+def test_export_reads_archive_before_cutoff(store):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    db.add_all([
+        Transaction(transaction_id=f"new_{i}", amount=1.0, customer_id="cust_1",
+                    timestamp=datetime(2026, 1, 1) + timedelta(hours=i), risk_level=RiskLevel.HIGH)
+        for i in range(3)
+    ])
+    # Scores of archived transactions stay in the database
+    db.add(Score(transaction_id=2, anomaly_score=0.5, reconstruction_error=0.25,
+                 classifier_score=0.75, risk_level=RiskLevel.LOW))
+    db.commit()
+    db.close()
+
+    def export_rows(**filters):
+        body = b"".join(stream_transactions_export("ndjson", session_factory=factory, **filters))
+        return [json.loads(line) for line in body.decode().splitlines()]
+
+    def export(**filters):
+        return [row["transaction_id"] for row in export_rows(**filters)]
+
+    assert export(customer_id="cust_1") == ["old_1", "old_3", "old_5", "old_7", "old_9", "new_0", "new_1", "new_2"]
+    assert export(risk_level="low", end=datetime(2025, 1, 1, 5)) == ["old_2", "old_4"]
+    assert export(start=datetime(2025, 6, 1)) == ["new_0", "new_1", "new_2"]
+    # Filters accept the enum name as well as its value, on both tiers
+    assert export(risk_level="HIGH", customer_id="cust_1", end=datetime(2025, 1, 1, 4)) == ["old_1", "old_3"]
+    assert export(risk_level="HIGH", start=datetime(2025, 6, 1)) == ["new_0", "new_1", "new_2"]
+    old_2, old_4 = export_rows(risk_level="low", end=datetime(2025, 1, 1, 5))
+    assert (old_2["reconstruction_error"], old_2["classifier_score"]) == (0.25, 0.75)
+    assert (old_4["reconstruction_error"], old_4["classifier_score"]) == (None, None)
+
+
+def test_id_lookups_skip_files_outside_their_id_range(store):
+    store.write("transactions", "_hyper_1_2_chunk", CHUNK_END, CHUNK_END + timedelta(days=1),
+                [[dict(_archived_row(20), timestamp=CHUNK_END)]], 1)
+    # Point the first file's entry at a path that does not exist
+    manifest = store.load_manifest("transactions")
+    manifest[0]["path"] += ".missing"
+    store._save_manifest("transactions", manifest)
+
+    assert [r["transaction_id"] for r in get_archived_transactions([20])] == ["old_20"]
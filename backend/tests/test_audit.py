@@ -0,0 +1,118 @@
+"""Tests for audit logging."""
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app import audit
+from app.audit import AuditWriter, log_audit_event, DURABILITY_BUFFERED, DURABILITY_SYNC
+from app.database import Base
+from app.models import AuditLog, User, UserRole
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    audit._username_cache.clear()
+    return engine
+
+
+@pytest.fixture
+def session_factory(engine):
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    db.add(User(id=7, username="alice", hashed_password="x", role=UserRole.ANALYST))
+    db.commit()
+    db.close()
+    return factory
+
+
+def _count_statements(engine, needle):
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if needle in statement:
+            statements.append(statement)
+
+    return statements
+
+
+def test_sync_event_is_committed_with_cached_username(engine, session_factory):
+    user_lookups = _count_statements(engine, "FROM users")
+    db = session_factory()
+
+    for _ in range(3):
+        log_audit_event(
+            db, "update_case", "case", 1, actor_id=7,
+            metadata={"field": "status"}, durability=DURABILITY_SYNC,
+        )
+
+    rows = db.query(AuditLog).all()
+    assert len(rows) == 3
+    assert all(row.actor_username == "alice" for row in rows)
+    assert rows[0].audit_metadata == {"field": "status"}
+    assert len(user_lookups) == 1
+    db.close()
+
+
+def test_buffered_events_are_group_committed(engine, session_factory, monkeypatch):
+    inserts = _count_statements(engine, "INSERT INTO audit_log")
+    writer = AuditWriter(session_factory=session_factory, batch_size=100, flush_interval=0.05)
+    monkeypatch.setattr(audit, "_audit_writer", writer)
+
+    db = session_factory()
+    for i in range(25):
+        log_audit_event(db, "score_transaction", "transaction", i, actor_id=7, durability=DURABILITY_BUFFERED)
+    writer.stop()
+
+    rows = db.query(AuditLog).all()
+    assert len(rows) == 25
+    assert {row.actor_username for row in rows} == {"alice"}
+    assert len(inserts) < 25
+    assert writer.pending == 0
+    db.close()
+
+
+def test_submit_drops_instead_of_blocking_when_queue_is_full(session_factory, monkeypatch):
+    writer = AuditWriter(session_factory=session_factory, max_queue_size=1, enqueue_timeout=0)
+    monkeypatch.setattr(writer, "_ensure_started", lambda: None)
+    monkeypatch.setattr(writer, "_write", lambda events: pytest.fail("submit wrote on the caller's thread"))
+    dropped = audit.audit_events_dropped._value.get()
+
+    writer.submit({"action": "first"})
+    writer.submit({"action": "second"})
+
+    assert writer.pending == 1
+    assert audit.audit_events_dropped._value.get() == dropped + 1
+
+
+def test_failed_batch_falls_back_to_per_event_writes(session_factory, monkeypatch):
+    monkeypatch.setattr(audit.settings, "audit_retry_backoff_ms", 0)
+    writer = AuditWriter(session_factory=session_factory)
+    dropped = audit.audit_events_dropped._value.get()
+    events = [
+        {"actor_id": 7, "actor_username": None, "action": "score_transaction", "resource_type": "transaction",
+         "resource_id": str(i), "created_at": None}
+        for i in range(3)
+    ]
+    events[1]["action"] = None  # violates NOT NULL
+
+    writer._write(events)
+
+    db = session_factory()
+    assert sorted(row.resource_id for row in db.query(AuditLog)) == ["0", "2"]
+    db.close()
+    assert audit.audit_events_dropped._value.get() == dropped + 1
+
+
+def test_usernames_cannot_change(session_factory):
+    db = session_factory()
+    user = db.get(User, 7)
+
+    with pytest.raises(ValueError):
+        user.username = "mallory"
+    user.username = "alice"
+    db.close()
@@ -0,0 +1,262 @@
+"""Tests for the two-tier (in-process + Redis) cache."""
+import asyncio
+import json
+import threading
+import time
+import pytest
+from prometheus_client import REGISTRY
+from app import cache
+from app.cache import LocalCache, apply_invalidation, cached, get_or_compute, local_cache
+
+
+def test_local_cache_evicts_least_recently_used():
+    lru = LocalCache(max_size=2)
+    lru.set("a", 1, 60)
+    lru.set("b", 2, 60)
+    lru.get("a")
+    lru.set("c", 3, 60)
+
+    assert lru.get("a") == 1
+    assert lru.get("b") is None
+    assert lru.get("c") == 3
+
+
+def test_local_cache_expires_entries():
+    lru = LocalCache(max_size=10)
+    lru.set("a", 1, 0.01)
+    time.sleep(0.02)
+    assert lru.get("a") is None
+    assert len(lru) == 0
+
+
+def test_get_cache_serves_repeat_reads_from_local_tier(redis_client):
+    cache.set_cache("metrics:dashboard", {"total": 5}, ttl=10)
+    local_cache.clear()
+
+    assert cache.get_cache("metrics:dashboard") == {"total": 5}
+    assert cache.get_cache("metrics:dashboard") == {"total": 5}
+    assert redis_client.gets == 1
+
+
+def test_writes_invalidate_local_tier_and_broadcast(redis_client):
+    cache.set_cache("entity:1", {"name": "old"}, ttl=10)
+    cache.get_cache("entity:1")
+    cache.set_cache("entity:1", {"name": "new"}, ttl=10)
+
+    assert cache.get_cache("entity:1") == {"name": "new"}
+    assert redis_client.published[-1]["keys"] == ["entity:1"]
+
+
+def test_invalidation_from_other_worker_drops_local_entries(redis_client):
+    local_cache.set("entity:1", {"name": "x"}, 60)
+    local_cache.set("entity:network:1", {"nodes": []}, 60)
+
+    assert apply_invalidation(json.dumps({"origin": cache.INSTANCE_ID, "keys": ["entity:1"]})) == 0
+    assert apply_invalidation(json.dumps({"origin": "other", "keys": ["entity:1"]})) == 1
+    assert apply_invalidation(json.dumps({"origin": "other", "pattern": "entity:network:*"})) == 1
+    assert len(local_cache) == 0
+
+
+def test_multi_key_reads_and_writes_take_one_round_trip(async_redis_client):
+    values = {f"entity:{i}": {"id": i} for i in range(100)}
+
+    assert asyncio.run(cache.amset_cache(values, ttl=10, tags={"entity:1": ["entity:1"]}))
+    assert async_redis_client.round_trips == 1
+    assert async_redis_client.client.published[-1]["keys"] == list(values)
+    assert async_redis_client.client.sets["tag:entity:1"] == {"entity:1"}
+
+    local_cache.clear()
+    found = asyncio.run(cache.amget_cache([*values, "entity:missing"]))
+    assert found == values
+    assert async_redis_client.round_trips == 2
+
+    # Now served from the local tier
+    assert asyncio.run(cache.aget_cache("entity:7")) == {"id": 7}
+    assert async_redis_client.round_trips == 2
+
+
+def test_counters_are_incremented_in_one_round_trip(async_redis_client):
+    assert asyncio.run(cache.aincr_counters({"velocity:a": 2, "velocity:b": 1}, ttl=60)) == {
+        "velocity:a": 2, "velocity:b": 1,
+    }
+    assert asyncio.run(cache.aincr_counters({"velocity:a": 3}, ttl=60)) == {"velocity:a": 5}
+    assert async_redis_client.round_trips == 2
+
+
+def test_async_api_without_redis_is_a_miss(monkeypatch):
+    monkeypatch.setattr(cache, "get_async_redis_client", lambda: None)
+
+    assert asyncio.run(cache.amget_cache(["entity:1"])) == {}
+    assert asyncio.run(cache.amset_cache({"entity:1": {}})) is False
+    assert asyncio.run(cache.aincr_counters({"velocity:a": 1}, ttl=60)) == {}
+
+
+def test_key_family_uses_longest_cache_key_prefix():
+    assert cache.key_family("entity:42") == "entity"
+    assert cache.key_family("entity:network:42:2") == "entity:network"
+    assert cache.key_family("case:report:7") == "case:report"
+    assert cache.key_family("metrics:transactions_time:15m:24") == "metrics:transactions_time"
+    assert cache.key_family("metrics:dashboard") == "metrics:dashboard"
+    assert cache.key_family("entityx:1") == "other"
+
+
+def test_hits_and_misses_are_counted_per_family(redis_client):
+    def sample(name, tier, family):
+        return REGISTRY.get_sample_value(name, {"tier": tier, "family": family}) or 0
+
+    before = sample("cache_misses_total", "redis", "case:report"), sample("cache_hits_total", "redis", "entity")
+    cache.get_cache("case:report:1")
+    cache.set_cache("entity:1", {"id": 1}, ttl=10)
+    local_cache.clear()
+    cache.get_cache("entity:1")
+
+    assert sample("cache_misses_total", "redis", "case:report") == before[0] + 1
+    assert sample("cache_hits_total", "redis", "entity") == before[1] + 1
+
+
+def test_key_family_stats_rank_families_by_memory(redis_client):
+    cache.set_cache("entity:1", {"id": 1}, ttl=10)
+    cache.set_cache("case:report:1", {"transactions": list(range(500))}, ttl=10)
+
+    stats = cache.key_family_stats()
+
+    assert stats["complete"] and stats["keys_scanned"] == 2
+    top = stats["families"][0]
+    assert top["family"] == "case:report" and top["keys"] == 1
+    assert stats["families"][1]["family"] == "entity"
+    assert cache.key_family_stats(max_keys=1)["complete"] is False
+
+
+def test_concurrent_misses_compute_once(monkeypatch):
+    monkeypatch.setattr(cache, "get_redis_client", lambda: None)
+    calls = []
+    started = threading.Event()
+
+    def compute():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return {"total": 1}
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(get_or_compute("metrics:x", compute, ttl=10)))
+        for _ in range(8)
+    ]
+    threads[0].start()
+    started.wait()
+    for thread in threads[1:]:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{"total": 1}] * 8
+
+
+def test_stale_value_served_while_another_worker_recomputes(redis_client):
+    cache.set_cache("metrics:dashboard", {"value": {"total": 1}, "fresh_until": time.time() - 1, "delta": 0.1}, 60)
+    redis_client.lock_available = False
+
+    value = get_or_compute("metrics:dashboard", lambda: pytest.fail("recomputed"), ttl=10, stale_ttl=60)
+
+    assert value == {"total": 1}
+
+
+def test_expired_value_recomputed_by_lock_holder(redis_client):
+    cache.set_cache("metrics:dashboard", {"value": {"total": 1}, "fresh_until": time.time() - 1, "delta": 0.1}, 60)
+
+    value = get_or_compute("metrics:dashboard", lambda: {"total": 2}, ttl=10, stale_ttl=60)
+
+    assert value == {"total": 2}
+    assert cache.get_cache("metrics:dashboard")["value"] == {"total": 2}
+
+
+def test_early_refresh_near_expiry(redis_client):
+    cache.set_cache("metrics:dashboard", {"value": {"total": 1}, "fresh_until": time.time() + 1, "delta": 100.0}, 60)
+
+    assert get_or_compute("metrics:dashboard", lambda: {"total": 2}, ttl=10, beta=1.0) == {"total": 2}
+
+
+def test_async_lock_waiter_reads_the_value_without_blocking(async_redis_client, monkeypatch):
+    async_redis_client.client.lock_available = False
+    monkeypatch.setattr(cache, "get_redis_client", lambda: pytest.fail("sync Redis used"))
+
+    async def other_worker():
+        await asyncio.sleep(0.1)
+        await cache.aset_cache("metrics:dashboard", {"value": {"total": 3}, "fresh_until": time.time() + 10, "delta": 0.1}, 60)
+
+    async def scenario():
+        waiter = asyncio.create_task(cache.aget_or_compute(
+            "metrics:dashboard", lambda: pytest.fail("recomputed"), ttl=10
+        ))
+        await other_worker()
+        return await waiter
+
+    local_cache.clear()
+    assert asyncio.run(scenario()) == {"total": 3}
+
+
+def test_async_recompute_stores_through_the_async_client(async_redis_client, monkeypatch):
+    monkeypatch.setattr(cache, "get_redis_client", lambda: pytest.fail("sync Redis used"))
+
+    async def compute():
+        return {"total": 2}
+
+    assert asyncio.run(cache.aget_or_compute("metrics:dashboard", compute, ttl=10)) == {"total": 2}
+    assert async_redis_client.round_trips == 2
+    local_cache.clear()
+    assert asyncio.run(cache.aget_cache("metrics:dashboard"))["value"] == {"total": 2}
+
+
+def test_cached_decorator_with_key_builder(redis_client):
+    calls = []
+
+    @cached(ttl=10, key_builder=lambda db=None, **_: "metrics:built")
+    def compute(db=None):
+        calls.append(db)
+        return {"n": len(calls)}
+
+    assert compute(db="session-1") == {"n": 1}
+    assert compute(db="session-2") == {"n": 1}
+    assert calls == ["session-1"]
+
+
+def test_invalidate_tags_deletes_tagged_keys_everywhere(redis_client):
+    cache.set_cache("case:report:1", {"case": 1}, ttl=60, tags=[cache.case_tag(1), cache.entity_tag(5)])
+    cache.set_cache("entity:5", {"id": 5}, ttl=60, tags=[cache.entity_tag(5)])
+    cache.set_cache("case:report:2", {"case": 2}, ttl=60, tags=[cache.case_tag(2)])
+
+    assert cache.invalidate_tags(cache.entity_tag(5)) == 2
+
+    assert cache.get_cache("case:report:1") is None
+    assert cache.get_cache("entity:5") is None
+    assert cache.get_cache("case:report:2") == {"case": 2}
+    assert redis_client.published[-1]["keys"] == ["case:report:1", "entity:5"]
+
+
+def test_tags_invalidated_only_after_commit(redis_client, monkeypatch):
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.orm import sessionmaker
+
+    invalidated = []
+    monkeypatch.setattr(cache, "invalidate_tags", lambda *tags: invalidated.extend(tags))
+    session = sessionmaker(bind=create_engine("sqlite://"))()
+
+    session.execute(text("SELECT 1"))
+    cache.invalidate_tags_on_commit(session, cache.case_tag(1))
+    session.rollback()
+    session.execute(text("SELECT 1"))
+    cache.invalidate_tags_on_commit(session, cache.case_tag(2))
+    assert invalidated == []
+    session.commit()
+
+    assert invalidated == [cache.case_tag(2)]
+
+
+def test_delete_cache_pattern_uses_scan(redis_client):
+    cache.set_cache("entity:network:1:2", {"a": 1}, ttl=60)
+    cache.set_cache("entity:1", {"a": 1}, ttl=60)
+
+    assert cache.delete_cache_pattern("entity:network:*") == 1
+    assert "entity:1" in redis_client.store
@@ -0,0 +1,239 @@
+"""Tests for dashboard metric aggregations."""
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database import Base
+from app.models import Case, CaseStatus, MetricCounter, Transaction, RiskLevel
+from app import cache
+from app.routers import dashboard_metrics
+from app.services import dashboard_counters, timeseries
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(cache, "get_redis_client", lambda: None)
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    levels = [RiskLevel.LOW, RiskLevel.MEDIUM, RiskLevel.HIGH, RiskLevel.CRITICAL, None]
+    session.add_all([
+        Transaction(
+            transaction_id=f"tx_{i}", amount=10.0, risk_level=levels[i % 5],
+            timestamp=today_start + timedelta(seconds=i),
+        )
+        for i in range(20)
+    ])
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_dashboard_counts_high_risk_from_transaction_columns(db):
+    dashboard_counters.reconcile_counters(db)
+    metrics = asyncio.run(dashboard_metrics.get_dashboard_metrics(db=db, current_user=None))
+
+    assert metrics["total_transactions_today"] == 20
+    assert metrics["high_risk_transactions"] == 8
+
+
+def test_risk_distribution_skips_unscored_transactions(db):
+    dashboard_counters.reconcile_counters(db)
+    distribution = asyncio.run(dashboard_metrics.get_risk_distribution(db=db, current_user=None))
+
+    assert {level: bucket["count"] for level, bucket in distribution.items()} == {
+        "critical": 4, "high": 4, "medium": 4, "low": 4,
+    }
+    assert distribution["high"]["percentage"] == 25.0
+
+
+class _Rows:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+class _RecordingSession:
+    """Returns the canned result sets in order, recording params."""
+
+    def __init__(self, *results):
+        self.results = [_Rows(rows) for rows in results]
+        self.params = []
+
+    def execute(self, statement, params):
+        self.params.append(params)
+        return self.results.pop(0)
+
+
+def test_continuous_aggregate_skipped_without_timescale(db):
+    assert not timeseries.continuous_aggregate_available(db, "15m")
+    assert not timeseries.timescale_available(db)
+
+
+def test_open_bucket_is_read_from_raw_rows_after_watermark():
+    start = datetime(2026, 1, 1, 0, 0)
+    end = datetime(2026, 1, 1, 1, 10)
+    aggregate = [
+        SimpleNamespace(bucket=start, total=5, high_risk=1),
+        SimpleNamespace(bucket=start + timedelta(minutes=15), total=3, high_risk=0),
+    ]
+    raw = [SimpleNamespace(bucket=start + timedelta(minutes=60), total=2, high_risk=2)]
+    session = _RecordingSession(aggregate, raw)
+
+    data = timeseries.continuous_aggregate_buckets(session, "15m", start, end)
+
+    assert session.params[1]["start_time"] == start + timedelta(minutes=30)
+    assert [(row["total"], row["high_risk"]) for row in data] == [(5, 1), (3, 0), (2, 2)]
+
+
+def test_partial_first_bucket_is_read_from_raw_rows():
+    start = datetime(2026, 1, 1, 0, 10)
+    end = datetime(2026, 1, 1, 0, 40)
+    first = datetime(2026, 1, 1, 0, 15)
+    head = [SimpleNamespace(bucket=datetime(2026, 1, 1, 0, 0), total=1, high_risk=0)]
+    aggregate = [SimpleNamespace(bucket=first, total=5, high_risk=1)]
+    session = _RecordingSession(aggregate, head, [])
+
+    data = timeseries.continuous_aggregate_buckets(session, "15m", start, end)
+
+    # The aggregate's 00:00 bucket would include rows from before 00:10
+    assert session.params[0]["first_bucket"] == first
+    assert (session.params[1]["start_time"], session.params[1]["end_time"]) == (start, first)
+    assert session.params[2]["start_time"] == first + timedelta(minutes=15)
+    assert [(row["total"], row["high_risk"]) for row in data] == [(1, 0), (5, 1)]
+
+
+def test_grouped_buckets_single_query_with_gaps_filled(db):
+    start = datetime(2026, 2, 1, 10, 5)
+    db.add_all([
+        Transaction(transaction_id="g_1", amount=1.0, timestamp=datetime(2026, 2, 1, 10, 20), risk_level=RiskLevel.HIGH),
+        Transaction(transaction_id="g_2", amount=1.0, timestamp=datetime(2026, 2, 1, 10, 29), risk_level=RiskLevel.LOW),
+        Transaction(transaction_id="g_3", amount=1.0, timestamp=datetime(2026, 2, 1, 11, 1), risk_level=RiskLevel.CRITICAL),
+    ])
+    db.commit()
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    data = timeseries.transaction_buckets(db, "15m", start, start + timedelta(hours=1))
+
+    assert len(statements) == 1
+    assert [row["timestamp"] for row in data] == [
+        "2026-02-01T10:00:00", "2026-02-01T10:15:00", "2026-02-01T10:30:00",
+        "2026-02-01T10:45:00", "2026-02-01T11:00:00",
+    ]
+    assert [(row["total"], row["high_risk"]) for row in data] == [(0, 0), (2, 1), (0, 0), (0, 0), (1, 1)]
+
+
+def test_every_backend_is_gap_filled(db, monkeypatch):
+    start = datetime(2026, 2, 1, 10, 0)
+    sparse = [timeseries._bucket_row(datetime(2026, 2, 1, 10, 30), 4, 1)]
+    monkeypatch.setattr(timeseries, "continuous_aggregate_available", lambda db, interval: True)
+    monkeypatch.setattr(timeseries, "continuous_aggregate_buckets", lambda *args: sparse)
+
+    data = timeseries.transaction_buckets(db, "15m", start, start + timedelta(minutes=45))
+
+    assert [(row["timestamp"], row["total"]) for row in data] == [
+        ("2026-02-01T10:00:00", 0), ("2026-02-01T10:15:00", 0),
+        ("2026-02-01T10:30:00", 4), ("2026-02-01T10:45:00", 0),
+    ]
+
+
+def test_transactions_over_time_falls_back_to_grouped_buckets(db):
+    data = asyncio.run(dashboard_metrics.get_transactions_over_time(
+        interval="1h", hours=24, db=db, current_user=None
+    ))
+
+    assert len(data) in (24, 25)
+    assert sum(row["total"] for row in data) == 20
+
+
+def test_counters_track_ingest_and_case_transitions(db):
+    today = dashboard_counters.day_key(datetime.utcnow().date())
+    transactions = [
+        Transaction(transaction_id=f"n_{i}", amount=1.0, timestamp=datetime.utcnow(), risk_level=level)
+        for i, level in enumerate([RiskLevel.CRITICAL, RiskLevel.LOW, RiskLevel.LOW])
+    ]
+    db.add_all(transactions)
+    dashboard_counters.record_transactions(db, transactions)
+    dashboard_counters.record_transactions(db, transactions[:1])
+    dashboard_counters.record_case_status(db, None, CaseStatus.OPEN)
+    dashboard_counters.record_case_status(db, None, CaseStatus.TRIAGE)
+    dashboard_counters.record_case_status(db, CaseStatus.TRIAGE, CaseStatus.CLOSED)
+    dashboard_counters.record_case_status(db, CaseStatus.OPEN, CaseStatus.INVESTIGATION)
+    db.commit()
+
+    assert dashboard_counters.get_counter(db, dashboard_counters.SCOPE_TRANSACTIONS_DAY, today) == 4
+    assert dashboard_counters.get_counter(db, dashboard_counters.SCOPE_HIGH_RISK_DAY, today) == 2
+    assert dashboard_counters.get_counters(db, dashboard_counters.SCOPE_RISK_LEVEL) == {"critical": 2, "low": 2}
+    assert dashboard_counters.get_counter(db, dashboard_counters.SCOPE_CASES, dashboard_counters.OPEN_CASES_KEY) == 1
+
+
+def test_reconciliation_corrects_drift(db):
+    db.add(Case(case_id="CASE-1", title="t", status=CaseStatus.OPEN))
+    db.commit()
+    dashboard_counters.reconcile_counters(db)
+    # Simulate a lost increment and a double-counted case
+    dashboard_counters.increment_counters(db, {
+        (dashboard_counters.SCOPE_RISK_LEVEL, "high"): -1,
+        (dashboard_counters.SCOPE_CASES, dashboard_counters.OPEN_CASES_KEY): 1,
+    })
+    db.commit()
+
+    drift = dashboard_counters.reconcile_counters(db)
+
+    assert drift == {
+        (dashboard_counters.SCOPE_RISK_LEVEL, "high"): (3, 4),
+        (dashboard_counters.SCOPE_CASES, dashboard_counters.OPEN_CASES_KEY): (2, 1),
+    }
+    assert dashboard_counters.reconcile_counters(db) == {}
+
+
+def test_daily_reconciliation_skips_all_time_totals(db):
+    dashboard_counters.reconcile_counters(db)
+    dashboard_counters.increment_counters(db, {(dashboard_counters.SCOPE_RISK_LEVEL, "low"): 5})
+    db.commit()
+
+    assert dashboard_counters.reconcile_counters(db, totals=False) == {}
+    assert dashboard_counters.reconcile_counters(db) == {
+        (dashboard_counters.SCOPE_RISK_LEVEL, "low"): (9, 4),
+    }
+
+
+def test_increment_committed_between_snapshot_and_apply_is_kept(db):
+    today = dashboard_counters.day_key(datetime.utcnow().date())
+    drift = dashboard_counters.counter_drift(db, 2)
+    assert drift[(dashboard_counters.SCOPE_TRANSACTIONS_DAY, today)] == (0, 20)
+
+    # Ingest commits after the snapshot was taken
+    late = Transaction(transaction_id="late", amount=1.0, timestamp=datetime.utcnow(), risk_level=RiskLevel.LOW)
+    db.add(late)
+    dashboard_counters.record_transactions(db, [late])
+    db.commit()
+
+    dashboard_counters.apply_drift(db, drift)
+
+    assert dashboard_counters.get_counter(db, dashboard_counters.SCOPE_TRANSACTIONS_DAY, today) == 21
+    assert dashboard_counters.reconcile_counters(db) == {}
+
+
+def test_ingest_spreads_a_counter_over_shards(db, monkeypatch):
+    monkeypatch.setattr(dashboard_counters.settings, "dashboard_counter_shards", 4)
+    key = (dashboard_counters.SCOPE_CASES, dashboard_counters.OPEN_CASES_KEY)
+    for _ in range(40):
+        dashboard_counters.increment_counters(db, {key: 1})
+    db.commit()
+
+    shards = {row.shard for row in db.query(MetricCounter)}
+    assert len(shards) > 1 and dashboard_counters.RECONCILE_SHARD not in shards
+    assert dashboard_counters.get_counter(db, *key) == 40
@@ -0,0 +1,89 @@
+"""Tests for per-workload connection pool instrumentation."""
+import asyncio
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import sessionmaker
+from app import database
+from app.database import LazySession, create_workload_engine
+
+
+def _sample(name, pool):
+    return REGISTRY.get_sample_value(name, {"pool": pool}) or 0
+
+
+def test_pool_metrics_track_checkouts_and_timeouts(tmp_path):
+    engine = create_workload_engine("test_pool", f"sqlite:///{tmp_path}/pool.db", 1, 0, 0.05)
+    timeouts = _sample("db_pool_checkout_timeouts_total", "test_pool")
+    waits = _sample("db_pool_checkout_wait_seconds_count", "test_pool")
+
+    conn = engine.connect()
+    try:
+        assert _sample("db_pool_checked_out", "test_pool") == 1
+        assert _sample("db_pool_size", "test_pool") == 1
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+    finally:
+        conn.close()
+
+    assert _sample("db_pool_checked_out", "test_pool") == 0
+    assert _sample("db_pool_checkout_timeouts_total", "test_pool") == timeouts + 1
+    assert _sample("db_pool_checkout_wait_seconds_count", "test_pool") == waits + 2
+    assert _sample("db_pool_connections_opened_total", "test_pool") >= 1
+    engine.dispose()
+
+
+def test_pool_name_survives_dispose(tmp_path):
+    engine = create_workload_engine("test_dispose", f"sqlite:///{tmp_path}/pool.db", 1, 0, 1)
+    engine.dispose()
+    assert engine.pool.pool_name == "test_dispose"
+
+
+def test_lazy_session_opens_nothing_until_used(tmp_path):
+    engine = create_workload_engine("test_lazy", f"sqlite:///{tmp_path}/lazy.db", 1, 0, 1)
+    db = LazySession(sessionmaker(bind=engine))
+
+    assert not db.started
+    assert _sample("db_pool_checked_out", "test_lazy") == 0
+    assert db.execute(text("SELECT 1")).scalar() == 1
+    assert db.started
+    assert _sample("db_pool_checked_out", "test_lazy") == 1
+    db.close()
+    assert _sample("db_pool_checked_out", "test_lazy") == 0
+    engine.dispose()
+
+
+def test_lazy_db_dependency_only_closes_used_sessions(monkeypatch):
+    opened = []
+
+    class FakeSession:
+        def __init__(self):
+            opened.append(self)
+            self.closed = False
+
+        def query(self, *args):
+            return "rows"
+
+        def close(self):
+            self.closed = True
+
+    monkeypatch.setattr(database, "SessionLocal", FakeSession)
+
+    def sample(used):
+        return REGISTRY.get_sample_value("db_lazy_sessions_total", {"pool": "oltp", "used": used}) or 0
+
+    async def request(use_session):
+        dependency = database.get_lazy_db()
+        db = await dependency.__anext__()
+        if use_session:
+            db.query("User")
+        with pytest.raises(StopAsyncIteration):
+            await dependency.__anext__()
+
+    unused, used = sample("false"), sample("true")
+    asyncio.run(request(False))
+    assert opened == []
+    asyncio.run(request(True))
+    assert len(opened) == 1 and opened[0].closed
+    assert (sample("false"), sample("true")) == (unused + 1, used + 1)
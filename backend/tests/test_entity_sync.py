@@ -0,0 +1,195 @@
+"""Tests for the resumable graph resync."""
+import os
+from datetime import datetime
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database import Base
+from app.models import Entity, EntityLink
+from app.config import BACKEND_DIR, settings
+from app.services import entity_sync
+from app.services.entity_sync import default_checkpoint_path, run_graph_resync, split_id_ranges, SyncCheckpoint
+
+
+class RecordingGraphService:
+    """Graph service double that records batched writes."""
+
+    def __init__(self, fail_after_batches=None):
+        self.entities = {}
+        self.links = set()
+        self.batches = 0
+        self.fail_after_batches = fail_after_batches
+
+    def _tick(self):
+        if self.fail_after_batches is not None and self.batches >= self.fail_after_batches:
+            raise RuntimeError("graph unavailable")
+        self.batches += 1
+
+    def sync_entities_batch(self, rows):
+        self._tick()
+        for row in rows:
+            self.entities[row["entity_id"]] = row
+
+    def sync_entity_links_batch(self, rows):
+        self._tick()
+        for row in rows:
+            self.links.add((row["from_entity_id"], row["to_entity_id"], row["relationship_type"]))
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+
+    db = factory()
+    entities = [Entity(entity_id=f"cust_{i}", entity_type="customer") for i in range(25)]
+    db.add_all(entities)
+    db.flush()
+    db.add_all([
+        EntityLink(from_entity_id=entities[i].id, to_entity_id=entities[i + 1].id, relationship_type="transacted_with")
+        for i in range(24)
+    ])
+    db.commit()
+    db.close()
+    return factory
+
+
+def test_split_id_ranges_covers_whole_space():
+    ranges = split_id_ranges(1, 10, 3)
+
+    assert ranges[0]["lo"] == 1
+    assert ranges[-1]["hi"] == 10
+    assert all(r["cursor"] == r["lo"] - 1 for r in ranges)
+    assert sum(r["hi"] - r["lo"] + 1 for r in ranges) == 10
+    assert split_id_ranges(None, None, 4) == []
+
+
+def test_full_resync_with_parallel_workers(session_factory, tmp_path):
+    graph = RecordingGraphService()
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+
+    synced = run_graph_resync(
+        workers=3, batch_size=4, checkpoint_path=checkpoint_path,
+        graph_service=graph, session_factory=session_factory,
+    )
+
+    assert synced == {"entities": 25, "links": 24}
+    assert len(graph.entities) == 25
+    assert len(graph.links) == 24
+    checkpoint = SyncCheckpoint(checkpoint_path)
+    assert checkpoint.state["completed"] is True
+    assert checkpoint.last_synced_at is not None
+
+
+def test_resync_resumes_from_checkpoint(session_factory, tmp_path):
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+
+    with pytest.raises(RuntimeError):
+        run_graph_resync(
+            workers=1, batch_size=5, checkpoint_path=checkpoint_path, max_retries=0,
+            graph_service=RecordingGraphService(fail_after_batches=2),
+            session_factory=session_factory,
+        )
+    assert SyncCheckpoint(checkpoint_path).in_progress
+
+    graph = RecordingGraphService()
+    synced = run_graph_resync(
+        workers=1, batch_size=5, checkpoint_path=checkpoint_path,
+        graph_service=graph, session_factory=session_factory,
+    )
+
+    # The first two pages (10 entities) were already written before the failure
+    assert synced["entities"] == 15
+    assert len(graph.links) == 24
+
+
+def test_incremental_resync_only_picks_up_new_rows(session_factory, tmp_path):
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+    run_graph_resync(
+        workers=2, batch_size=10, checkpoint_path=checkpoint_path,
+        graph_service=RecordingGraphService(), session_factory=session_factory,
+    )
+
+    checkpoint = SyncCheckpoint(checkpoint_path)
+    watermark = checkpoint.last_synced_at
+    db = session_factory()
+    db.add(Entity(entity_id="cust_new", entity_type="customer", created_at=watermark.replace(year=watermark.year + 1)))
+    db.commit()
+    db.close()
+
+    graph = RecordingGraphService()
+    synced = run_graph_resync(
+        workers=2, batch_size=10, checkpoint_path=checkpoint_path, incremental=True,
+        graph_service=graph, session_factory=session_factory,
+    )
+
+    assert synced == {"entities": 1, "links": 0}
+    assert list(graph.entities) == ["cust_new"]
+
+
+def test_row_committed_while_planning_is_picked_up_incrementally(session_factory, tmp_path, monkeypatch):
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+    plan_phase = entity_sync._plan_phase
+
+    def plan_then_insert(db, phase, workers, since):
+        ranges = plan_phase(db, phase, workers, since)
+        if phase == "entities":
+            # Committed after the entity id ranges were read, so the full run misses it
+            writer = session_factory()
+            writer.add(Entity(entity_id="cust_late", entity_type="customer", created_at=datetime.utcnow()))
+            writer.commit()
+            writer.close()
+        return ranges
+
+    monkeypatch.setattr(entity_sync, "_plan_phase", plan_then_insert)
+    graph = RecordingGraphService()
+    run_graph_resync(
+        workers=2, batch_size=10, checkpoint_path=checkpoint_path,
+        graph_service=graph, session_factory=session_factory,
+    )
+    assert "cust_late" not in graph.entities
+
+    monkeypatch.setattr(entity_sync, "_plan_phase", plan_phase)
+    graph = RecordingGraphService()
+    run_graph_resync(
+        workers=2, batch_size=10, checkpoint_path=checkpoint_path, incremental=True,
+        graph_service=graph, session_factory=session_factory,
+    )
+    assert list(graph.entities) == ["cust_late"]
+
+
+def test_incremental_resync_picks_up_updated_entities(session_factory, tmp_path):
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+    run_graph_resync(
+        workers=2, batch_size=10, checkpoint_path=checkpoint_path,
+        graph_service=RecordingGraphService(), session_factory=session_factory,
+    )
+
+    watermark = SyncCheckpoint(checkpoint_path).last_synced_at
+    db = session_factory()
+    entity = db.query(Entity).filter(Entity.entity_id == "cust_3").one()
+    entity.name = "Renamed"
+    entity.updated_at = watermark.replace(year=watermark.year + 1)
+    db.commit()
+    db.close()
+
+    graph = RecordingGraphService()
+    synced = run_graph_resync(
+        workers=2, batch_size=10, checkpoint_path=checkpoint_path, incremental=True,
+        graph_service=graph, session_factory=session_factory,
+    )
+
+    assert synced["entities"] == 1
+    assert graph.entities["cust_3"]["name"] == "Renamed"
+
+
+def test_checkpoint_path_does_not_depend_on_the_working_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert default_checkpoint_path() == os.path.join(BACKEND_DIR, "models", "graph_sync_checkpoint.json")
+
+    monkeypatch.setattr(settings, "graph_sync_checkpoint_path", str(tmp_path / "sync.json"))
+    assert default_checkpoint_path() == str(tmp_path / "sync.json")
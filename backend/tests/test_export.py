@@ -0,0 +1,68 @@
+"""Tests for streaming transaction exports."""
+import csv
+import io
+import json
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database import Base
+from app.models import Transaction, Score, RiskLevel
+from app.services.export import stream_transactions_export
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    base = datetime(2026, 1, 1)
+    for i in range(30):
+        tx = Transaction(
+            transaction_id=f"tx_{i}", amount=float(i), customer_id=f"cust_{i % 3}",
+            timestamp=base + timedelta(hours=i),
+        )
+        db.add(tx)
+        db.flush()
+        if i % 2 == 0:
+            db.add(Score(transaction_id=tx.id, anomaly_score=0.5, risk_level=RiskLevel.HIGH, decision="review"))
+    db.commit()
+    db.close()
+    return factory
+
+
+def _export(session_factory, fmt, **filters):
+    return b"".join(stream_transactions_export(fmt, chunk_size=7, session_factory=session_factory, **filters))
+
+
+def test_ndjson_export_joins_scores_and_filters(session_factory):
+    lines = _export(session_factory, "ndjson", customer_id="cust_0").decode().splitlines()
+    rows = [json.loads(line) for line in lines]
+
+    assert len(rows) == 10
+    assert rows[0]["risk_level"] == "high"
+    assert rows[1]["risk_level"] is None
+    assert [row["timestamp"] for row in rows] == sorted(row["timestamp"] for row in rows)
+
+
+def test_csv_export_time_range(session_factory):
+    data = _export(
+        session_factory, "csv", start=datetime(2026, 1, 1, 5), end=datetime(2026, 1, 1, 15)
+    ).decode()
+    rows = list(csv.DictReader(io.StringIO(data)))
+
+    assert len(rows) == 10
+    assert rows[0]["transaction_id"] == "tx_5"
+
+
+def test_parquet_export_round_trip(session_factory):
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    table = pq.read_table(io.BytesIO(_export(session_factory, "parquet")))
+
+    assert table.num_rows == 30
+    assert table.column("anomaly_score").null_count == 15
@@ -0,0 +1,117 @@
+"""Tests for the Redis-backed feature store used by batch scoring."""
+import asyncio
+import numpy as np
+import pytest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.agents import AnomalyAgent
+from app.autoencoder import Autoencoder
+from app.cache import local_cache
+from app.database import Base
+from app.features import FeatureEngineer
+from app.models import Score, Transaction
+from app.routers import transactions as transactions_router
+from app.schemas import TransactionBatchScoreRequest
+from app.scoring import FraudScoringEngine
+from app.services import feature_store
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    now = datetime.utcnow()
+    session.add_all([
+        Transaction(transaction_id="h1", customer_id="cust_1", amount=10.0, timestamp=now - timedelta(hours=2)),
+        Transaction(transaction_id="h2", customer_id="cust_1", amount=30.0, timestamp=now - timedelta(days=3)),
+        Transaction(transaction_id="h3", customer_id="cust_1", amount=50.0, timestamp=now - timedelta(days=20)),
+    ])
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_historical_stats_come_from_one_grouped_query(db):
+    stats = feature_store.compute_historical_stats(db, ["cust_1", "cust_2"])
+
+    assert stats["cust_2"] == {}
+    assert stats["cust_1"]["avg_amount"] == pytest.approx(30.0)
+    assert stats["cust_1"]["std_amount"] == pytest.approx(16.33, abs=0.01)
+    assert stats["cust_1"]["transaction_count_24h"] == 1
+    assert stats["cust_1"]["transaction_count_7d"] == 2
+
+
+def test_batch_feature_reads_are_cached(async_redis_client, db):
+    first = asyncio.run(feature_store.load_historical_stats(db, ["cust_1", "cust_2", "cust_1"]))
+    local_cache.clear()
+    second = asyncio.run(feature_store.load_historical_stats(db, ["cust_1", "cust_2"]))
+
+    assert first == second
+    # MGET + MSET on the cold read, MGET only on the warm one
+    assert async_redis_client.round_trips == 3
+
+
+def test_velocity_counters_never_lower_the_database_count(db):
+    transaction = Transaction(customer_id="cust_1", amount=5.0, timestamp=datetime.utcnow())
+    stats = dict(feature_store.compute_historical_stats(db, ["cust_1"])["cust_1"], transaction_count_24h=45)
+
+    # Counters only saw the batch-scored transactions
+    assert feature_store.scoring_stats(transaction, stats, recent_count=6)["transaction_count_24h"] == 45
+    # Counters are newer than the cached stats
+    assert feature_store.scoring_stats(transaction, stats, recent_count=52)["transaction_count_24h"] == 52
+    # Earlier rows of the same batch are not in either yet
+    assert feature_store.scoring_stats(transaction, stats, None, preceding=6)["transaction_count_24h"] == 51
+
+    result = feature_store.scoring_stats(transaction, stats)
+    assert result["transaction_count_24h"] == 45
+    assert 1.9 < result["last_transaction_hours"] < 2.1
+    assert "last_transaction_at" not in result
+
+
+def test_velocity_window_sums_the_last_24_hourly_buckets(async_redis_client):
+    now = datetime.utcnow()
+    asyncio.run(feature_store.arecord_velocity([
+        Transaction(customer_id="cust_1", timestamp=now),
+        Transaction(customer_id="cust_1", timestamp=now - timedelta(hours=5)),
+        Transaction(customer_id="cust_1", timestamp=now - timedelta(hours=23)),
+        Transaction(customer_id="cust_1", timestamp=now - timedelta(hours=24)),
+        Transaction(customer_id="cust_2", timestamp=now),
+    ]))
+
+    counts = asyncio.run(feature_store.load_velocity(["cust_1", "cust_2", "cust_3"], now))
+
+    assert counts == {"cust_1": 3, "cust_2": 1, "cust_3": 0}
+
+
+def test_batch_score_takes_a_handful_of_round_trips(async_redis_client, db, monkeypatch):
+    feature_engineer = FeatureEngineer()
+    feature_engineer.fit_scaler(np.random.randn(100, 18).astype(np.float32))
+    engine = FraudScoringEngine(Autoencoder(input_dim=18, latent_dim=6), feature_engineer)
+    engine.set_threshold(1e9)
+    monkeypatch.setattr(transactions_router, "_anomaly_agent", AnomalyAgent(engine))
+    monkeypatch.setattr(transactions_router, "log_audit_event", lambda **kwargs: None)
+    now = datetime.utcnow()
+    request = TransactionBatchScoreRequest(transactions=[
+        {
+            "transaction_id": f"tx_{i}", "amount": 10.0 + i % 50, "customer_id": f"cust_{i % 200}",
+            "merchant_category": "5411", "timestamp": now - timedelta(seconds=i),
+        }
+        for i in range(1000)
+    ])
+
+    results = asyncio.run(transactions_router.score_transactions_batch(
+        request, db=db, current_user=SimpleNamespace(id=None)
+    ))
+
+    assert len(results) == 1000
+    assert db.query(Score).count() == 1000
+    # Feature MGET, feature MSET for the misses, velocity MGET, velocity INCRBY after commit
+    assert async_redis_client.round_trips == 4
+    counts = asyncio.run(feature_store.load_velocity(["cust_0"]))
+    assert counts == {"cust_0": 5}
@@ -0,0 +1,126 @@
+"""Tests for the graph sync outbox and relay."""
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.config import settings
+from app.database import Base
+from app.models import Entity, EntityLink, GraphOutbox
+from app.services.graph_outbox import enqueue_entity, enqueue_entity_link, relay_batch, get_outbox_status
+
+
+class RecordingGraphService:
+    """Graph service double that records batched writes."""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.entities = []
+        self.links = []
+
+    def sync_entities_batch(self, rows):
+        if self.fail:
+            raise RuntimeError("neo4j down")
+        self.entities.extend(rows)
+
+    def sync_entity_links_batch(self, rows):
+        if self.fail:
+            raise RuntimeError("neo4j down")
+        self.links.extend(rows)
+
+
+@pytest.fixture
+def session_factory(monkeypatch):
+    monkeypatch.setattr(settings, "neo4j_enabled", True)
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+def _ingest(db):
+    customer = Entity(entity_id="cust_1", entity_type="customer", name="cust_1")
+    merchant = Entity(entity_id="m_1", entity_type="merchant", name="Shop")
+    db.add_all([customer, merchant])
+    db.flush()
+    enqueue_entity(db, customer)
+    enqueue_entity(db, merchant)
+    link = EntityLink(from_entity_id=customer.id, to_entity_id=merchant.id, relationship_type="transacted_with")
+    db.add(link)
+    db.flush()
+    enqueue_entity_link(db, link, customer, merchant)
+
+
+def test_rolled_back_ingest_leaves_no_outbox_events(session_factory):
+    db = session_factory()
+    _ingest(db)
+    db.rollback()
+
+    assert db.query(GraphOutbox).count() == 0
+    db.close()
+
+
+def test_relay_drains_outbox(session_factory):
+    db = session_factory()
+    _ingest(db)
+    db.commit()
+    db.close()
+
+    graph = RecordingGraphService()
+    relayed = relay_batch(graph, batch_size=100, session_factory=session_factory)
+
+    assert relayed == 3
+    assert {row["entity_id"] for row in graph.entities} == {"cust_1", "m_1"}
+    assert graph.links[0]["from_entity_id"] == "cust_1"
+    db = session_factory()
+    assert get_outbox_status(db)["pending"] == 0
+    db.close()
+
+
+def test_failed_relay_is_retried_with_backoff(session_factory):
+    db = session_factory()
+    _ingest(db)
+    db.commit()
+    db.close()
+
+    assert relay_batch(RecordingGraphService(fail=True), session_factory=session_factory) == 0
+
+    db = session_factory()
+    events = db.query(GraphOutbox).all()
+    assert len(events) == 3
+    assert all(event.attempts == 1 and event.last_error for event in events)
+    assert all(event.next_attempt_at > event.created_at for event in events)
+    db.close()
+
+    # Not due yet, so nothing is picked up
+    assert relay_batch(RecordingGraphService(), session_factory=session_factory) == 0
+
+
+def test_failed_event_holds_back_later_events_for_its_key(session_factory):
+    db = session_factory()
+    entity = Entity(entity_id="cust_1", entity_type="customer", name="old name")
+    db.add(entity)
+    db.flush()
+    enqueue_entity(db, entity)
+    db.commit()
+    assert relay_batch(RecordingGraphService(fail=True), session_factory=session_factory) == 0
+
+    entity.name = "new name"
+    enqueue_entity(db, entity)
+    other = Entity(entity_id="cust_2", entity_type="customer", name="other")
+    db.add(other)
+    db.flush()
+    enqueue_entity(db, other)
+    db.commit()
+
+    graph = RecordingGraphService()
+    assert relay_batch(graph, session_factory=session_factory) == 1
+    assert [row["entity_id"] for row in graph.entities] == ["cust_2"]
+
+    # Once the failed event is due and relayed, the newer one follows it
+    db.query(GraphOutbox).update({GraphOutbox.next_attempt_at: GraphOutbox.created_at})
+    db.commit()
+    db.close()
+    assert relay_batch(graph, session_factory=session_factory) == 1
+    assert relay_batch(graph, session_factory=session_factory) == 1
+    assert [row["name"] for row in graph.entities] == ["other", "old name", "new name"]
@@ -0,0 +1,82 @@
+"""Tests for keyset (cursor) pagination."""
+import pytest
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.auth import get_current_user
+from app.config import settings
+from app.database import Base, get_lazy_db
+from app.main import app
+from app.models import Transaction, User, UserRole
+from app.pagination import encode_cursor, decode_cursor, apply_keyset
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    base = datetime(2026, 1, 1)
+    # Pairs of rows share a timestamp to exercise the id tie-breaker
+    session.add_all([
+        Transaction(
+            transaction_id=f"tx_{i}", amount=10.0 + i, merchant_id="m_1" if i % 2 else "m_2",
+            timestamp=base + timedelta(minutes=i // 2),
+        )
+        for i in range(25)
+    ])
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_cursor_round_trip():
+    ts = datetime(2026, 3, 4, 5, 6, 7, 890)
+
+    assert decode_cursor(encode_cursor(ts, 42)) == (ts, 42)
+    with pytest.raises(HTTPException):
+        decode_cursor("not-a-cursor")
+
+
+def test_keyset_walk_matches_offset_order(db):
+    expected = [
+        tx.id for tx in db.query(Transaction).order_by(Transaction.timestamp.desc(), Transaction.id.desc())
+    ]
+
+    seen, cursor = [], None
+    while True:
+        page = apply_keyset(db.query(Transaction), Transaction.timestamp, Transaction.id, cursor).limit(4).all()
+        if not page:
+            break
+        seen.extend(tx.id for tx in page)
+        cursor = encode_cursor(page[-1].timestamp, page[-1].id)
+
+    assert seen == expected
+
+
+def test_list_transactions_cursor_pages(db, monkeypatch):
+    monkeypatch.setattr(settings, "demo_data_enabled", False)
+    app.dependency_overrides[get_lazy_db] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: User(id=1, username="analyst", role=UserRole.ANALYST)
+    client = TestClient(app)
+    try:
+        offset_response = client.get("/api/transactions", params={"limit": 5, "merchant_id": "m_1"})
+        assert isinstance(offset_response.json(), list)
+        assert "x-next-cursor" in offset_response.headers
+
+        ids, cursor = [], ""
+        while cursor is not None:
+            page = client.get(
+                "/api/transactions", params={"limit": 5, "merchant_id": "m_1", "cursor": cursor}
+            ).json()
+            ids.extend(item["id"] for item in page["items"])
+            cursor = page["next_cursor"]
+    finally:
+        app.dependency_overrides.clear()
+
+    assert len(ids) == len(set(ids)) == 12
@@ -0,0 +1,73 @@
+"""Tests for monthly partition naming and bounds."""
+from datetime import date
+from app.services import partitions as partitions_service
+from app.services.partitions import add_months, monthly_partitions, partition_name
+
+
+class RecordingSession:
+    """Session double that records SQL and answers the DEFAULT-partition probe."""
+
+    def __init__(self, stranded):
+        self.stranded = stranded
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append(sql)
+        return _Result(self.stranded if sql.startswith("SELECT EXISTS") else None)
+
+
+class _Result:
+    def __init__(self, value):
+        self.value = value
+        self.rowcount = 3
+
+    def scalar(self):
+        return self.value
+
+
+def test_add_months_rolls_over_year():
+    assert add_months(date(2026, 11, 1), 1) == date(2026, 12, 1)
+    assert add_months(date(2026, 12, 15), 1) == date(2027, 1, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+
+
+def test_monthly_partitions_cover_range_contiguously():
+    partitions = monthly_partitions("transactions", date(2026, 11, 20), date(2027, 2, 1))
+
+    assert [name for name, _, _ in partitions] == [
+        "transactions_p2026_11", "transactions_p2026_12", "transactions_p2027_01", "transactions_p2027_02",
+    ]
+    assert partitions[0][1] == date(2026, 11, 1)
+    assert partitions[-1][2] == date(2027, 3, 1)
+    for (_, _, upper), (_, lower, _) in zip(partitions, partitions[1:]):
+        assert upper == lower
+
+
+def test_partition_name():
+    assert partition_name("audit_log", date(2026, 3, 1)) == "audit_log_p2026_03"
+
+
+def test_partition_rows_stranded_in_default_are_moved_before_create():
+    db = RecordingSession(stranded=True)
+    partitions_service._create_partition(
+        db, "transactions", "transactions_p2026_11", date(2026, 11, 1), date(2026, 12, 1), "transactions_default"
+    )
+
+    steps = [sql.split(" transactions")[0] for sql in db.statements[1:]]
+    assert steps == [
+        "ALTER TABLE", "CREATE TABLE", "INSERT INTO", "DELETE FROM", "ALTER TABLE",
+    ]
+    assert "DETACH PARTITION transactions_default" in db.statements[1]
+    assert "\"timestamp\" >= '2026-11-01' AND \"timestamp\" < '2026-12-01'" in db.statements[3]
+    assert db.statements[-1].endswith("ATTACH PARTITION transactions_default DEFAULT;")
+
+
+def test_partition_without_stranded_rows_is_created_directly():
+    db = RecordingSession(stranded=False)
+    partitions_service._create_partition(
+        db, "audit_log", "audit_log_p2026_11", date(2026, 11, 1), date(2026, 12, 1), "audit_log_default"
+    )
+
+    assert len(db.statements) == 2
+    assert db.statements[1].startswith("CREATE TABLE IF NOT EXISTS audit_log_p2026_11 PARTITION OF audit_log")
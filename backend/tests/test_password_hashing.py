@@ -0,0 +1,51 @@
+"""Tests for offloaded, bounded password hashing."""
+import asyncio
+import time
+from fastapi import HTTPException
+from prometheus_client import REGISTRY
+from app import auth
+from app.auth import averify_password, get_password_hash, run_password_hashing
+
+
+def test_verification_runs_off_the_event_loop():
+    hashed = get_password_hash("secret")
+    queued = REGISTRY.get_sample_value("password_hash_queue_seconds_count") or 0
+
+    async def scenario():
+        ticks = []
+
+        async def ticker():
+            while True:
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.005)
+
+        task = asyncio.create_task(ticker())
+        ok, wrong = await asyncio.gather(averify_password("secret", hashed), averify_password("nope", hashed))
+        task.cancel()
+        return ok, wrong, ticks
+
+    ok, wrong, ticks = asyncio.run(scenario())
+
+    assert ok and not wrong
+    # The loop kept running while bcrypt worked
+    assert len(ticks) > 5
+    assert REGISTRY.get_sample_value("password_hash_queue_seconds_count") == queued + 2
+
+
+def test_excess_password_work_is_rejected(monkeypatch):
+    monkeypatch.setattr(auth.settings, "password_hash_max_pending", 1)
+    rejected = REGISTRY.get_sample_value("password_hash_rejected_total") or 0
+
+    async def scenario():
+        return await asyncio.gather(
+            run_password_hashing(time.sleep, 0.1),
+            run_password_hashing(time.sleep, 0.1),
+            return_exceptions=True,
+        )
+
+    first, second = asyncio.run(scenario())
+
+    assert first is None
+    assert isinstance(second, HTTPException) and second.status_code == 503
+    assert REGISTRY.get_sample_value("password_hash_rejected_total") == rejected + 1
+    assert auth._password_pending == 0
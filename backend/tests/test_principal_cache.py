@@ -0,0 +1,87 @@
+"""Tests for the authenticated principal cache."""
+import asyncio
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app import auth, cache
+from app.auth import create_access_token, get_current_user, principal_cache, require_role
+from app.database import Base
+from app.models import User, UserRole
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(cache, "get_async_redis_client", lambda: None)
+    monkeypatch.setattr(cache, "get_redis_client", lambda: None)
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add(User(username="analyst", hashed_password="x", role=UserRole.ANALYST, is_active=True))
+    session.commit()
+    principal_cache.clear()
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    session.statements = statements
+    yield session
+    session.close()
+    principal_cache.clear()
+
+
+def authenticate(db, token):
+    return asyncio.run(get_current_user(token=token, db=db))
+
+
+def user_queries(db):
+    return [sql for sql in db.statements if "FROM users" in sql]
+
+
+def test_repeat_requests_skip_the_user_query(db):
+    token = create_access_token({"sub": "analyst"})
+
+    first = authenticate(db, token)
+    second = authenticate(db, token)
+
+    assert first == second
+    assert first.role == UserRole.ANALYST
+    assert len(user_queries(db)) == 1
+
+
+def test_require_role_reads_the_cached_principal(db):
+    principal = authenticate(db, create_access_token({"sub": "analyst"}))
+
+    assert require_role(UserRole.ANALYST)(current_user=principal) is principal
+    with pytest.raises(HTTPException) as excinfo:
+        require_role(UserRole.ADMIN)(current_user=principal)
+    assert excinfo.value.status_code == 403
+
+
+def test_user_update_invalidates_cached_principals(db):
+    token = create_access_token({"sub": "analyst"})
+    authenticate(db, token)
+
+    user = db.query(User).filter(User.username == "analyst").one()
+    user.role = UserRole.ADMIN
+    db.commit()
+
+    assert len(principal_cache) == 0
+    assert authenticate(db, token).role == UserRole.ADMIN
+
+
+def test_deactivated_user_is_rejected(db):
+    token = create_access_token({"sub": "analyst"})
+    authenticate(db, token)
+
+    db.query(User).filter(User.username == "analyst").one().is_active = False
+    db.commit()
+
+    with pytest.raises(HTTPException) as excinfo:
+        authenticate(db, token)
+    assert excinfo.value.status_code == 401
+
+
+def test_principal_key_includes_issue_time():
+    assert auth.principal_key("analyst", 1700000000) == "principal:analyst:1700000000"
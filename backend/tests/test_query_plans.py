@@ -0,0 +1,125 @@
+"""Query-plan regression tests: hot queries must be index-driven.
+
+The hot code paths are executed against SQLite with the model indexes, their
+SQL is captured, and ``EXPLAIN QUERY PLAN`` must show every table access going
+through an index rather than a full table scan.
+"""
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.agents import ComplianceAgent
+from app.database import Base
+from app.models import Transaction, Score, Case, CaseTransaction, CaseStatus, RiskLevel
+from app.routers.transactions import flagged_filter
+from app.services.dashboard_counters import compute_counters
+from app.services.export import build_export_query
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    now = datetime.utcnow()
+    for i in range(200):
+        tx = Transaction(
+            transaction_id=f"tx_{i}", amount=float(i), customer_id=f"cust_{i % 20}",
+            device_id=f"dev_{i % 30}", account_id=f"acct_{i % 25}", geo_country="US",
+            timestamp=now - timedelta(minutes=i),
+            risk_level=RiskLevel.HIGH if i % 10 == 0 else RiskLevel.LOW,
+        )
+        session.add(tx)
+        session.flush()
+        session.add(Score(
+            transaction_id=tx.id, anomaly_score=0.1,
+            risk_level=RiskLevel.HIGH if i % 10 == 0 else RiskLevel.LOW, decision="approve",
+        ))
+    case = Case(case_id="CASE-1", title="t", status=CaseStatus.OPEN)
+    session.add(case)
+    session.flush()
+    for tx_id in range(1, 201, 4):
+        session.add(CaseTransaction(case_id=case.id, transaction_id=tx_id))
+    session.commit()
+    session.execute(text("ANALYZE"))
+    yield session
+    session.close()
+
+
+def _capture(engine, fn):
+    """Run ``fn`` and return the SELECT statements it issued."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return statements
+
+
+def _table_scans(db, statement, parameters):
+    """Return (full-scan plan lines, all plan lines) for a captured statement."""
+    plan = db.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+    details = [row[-1] for row in plan]
+    return [d for d in details if d.startswith("SCAN") and "USING" not in d], details
+
+
+def _assert_index_driven(engine, db, fn, *indexes):
+    """Every statement avoids full scans and one of ``indexes`` drives at least one seek."""
+    statements = _capture(engine, fn)
+    assert statements
+    plans = []
+    for statement, parameters in statements:
+        scans, details = _table_scans(db, statement, parameters)
+        assert not scans, f"Full scan in plan {details} for:\n{statement}"
+        plans.extend(details)
+    assert any(
+        d.startswith("SEARCH") and f"INDEX {index} " in d for d in plans for index in indexes
+    ), plans
+
+
+def test_velocity_check_is_index_driven(engine, db):
+    _assert_index_driven(engine, db, lambda: ComplianceAgent().check_velocity("cust_3", db),
+                         "ix_transactions_customer_timestamp_id")
+
+
+def test_previous_transaction_lookup_is_index_driven(engine, db):
+    tx = db.query(Transaction).filter(Transaction.transaction_id == "tx_5").one()
+    _assert_index_driven(engine, db, lambda: ComplianceAgent().check_geographic_consistency(tx, db),
+                         "ix_transactions_customer_timestamp_id")
+
+
+def test_device_history_is_index_driven(engine, db):
+    stmt = build_export_query(device_id="dev_4")
+    _assert_index_driven(engine, db, lambda: db.execute(stmt).all(), "ix_transactions_device_timestamp")
+
+
+def test_dashboard_reads_counters_by_key(engine, db):
+    from app.routers.dashboard_metrics import get_dashboard_metrics
+
+    _assert_index_driven(engine, db, lambda: asyncio.run(get_dashboard_metrics(db=db, current_user=None)),
+                         "sqlite_autoindex_metric_counters_1")
+
+
+def test_counter_recount_is_index_driven(engine, db):
+    _assert_index_driven(engine, db, lambda: compute_counters(db, 2),
+                         "ix_transactions_timestamp_id")
+
+
+def test_flagged_filter_is_index_driven(engine, db):
+    query = db.query(Transaction).filter(flagged_filter()).order_by(Transaction.timestamp.desc()).limit(50)
+    _assert_index_driven(engine, db, query.all, "ix_case_transactions_transaction_id")
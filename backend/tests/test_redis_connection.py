@@ -0,0 +1,58 @@
+"""Tests for the Redis circuit breaker."""
+import time
+import redis
+from app.redis_connection import CIRCUIT_CLOSED, CIRCUIT_OPEN, RedisConnectionManager
+
+
+class FakeClient:
+    def __init__(self):
+        self.connection_pool = redis.ConnectionPool()
+
+    def ping(self):
+        return True
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and not predicate():
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_unreachable_redis_fails_fast_and_recovers_in_background(monkeypatch):
+    manager = RedisConnectionManager("redis://127.0.0.1:1", initial_backoff=0.05, max_backoff=0.1)
+    try:
+        assert manager.client() is None
+        assert manager.state == CIRCUIT_OPEN
+
+        began = time.perf_counter()
+        for _ in range(100):
+            assert manager.client() is None
+        assert time.perf_counter() - began < 0.05
+
+        client = FakeClient()
+        monkeypatch.setattr(manager, "_connect", lambda: client)
+        assert _wait_for(lambda: manager.state == CIRCUIT_CLOSED)
+        assert manager.client() is client
+    finally:
+        manager.close()
+
+
+def test_circuit_opens_after_consecutive_connection_errors(monkeypatch):
+    manager = RedisConnectionManager("redis://localhost", failure_threshold=3, initial_backoff=60)
+    monkeypatch.setattr(manager, "_connect", lambda: FakeClient())
+    try:
+        assert manager.client() is not None
+
+        manager.record_failure(redis.ResponseError("WRONGTYPE"))
+        manager.record_failure(redis.ConnectionError("reset"))
+        manager.record_success()
+        manager.record_failure(redis.ConnectionError("reset"))
+        manager.record_failure(redis.TimeoutError("timeout"))
+        assert manager.state == CIRCUIT_CLOSED
+
+        manager.record_failure(redis.ConnectionError("reset"))
+        assert manager.state == CIRCUIT_OPEN
+        assert manager.client() is None
+    finally:
+        manager.close(timeout=0.1)
@@ -0,0 +1,47 @@
+"""Tests for typed cache serialization."""
+from datetime import datetime
+import orjson
+from app.models import CaseStatus, Entity
+from app.schemas import EntityNetworkResponse, EntityResponse
+from app.serialization import FORMAT_JSON, FORMAT_ZLIB, decode_payload, encode
+
+
+def _entity():
+    now = datetime(2026, 1, 2, 3, 4, 5)
+    return Entity(
+        id=7, entity_id="cust_7", entity_type="customer", name="Ada",
+        entity_metadata={"segment": "retail"}, created_at=now, updated_at=now,
+    )
+
+
+def test_orm_objects_are_stored_as_their_response_schema():
+    stored = encode(_entity(), schema=EntityResponse, compress_min_bytes=0)
+
+    assert stored[:1] == FORMAT_JSON
+    assert orjson.loads(decode_payload(stored)) == {
+        "id": 7, "entity_id": "cust_7", "entity_type": "customer", "name": "Ada",
+        "metadata": {"segment": "retail"},
+        "created_at": "2026-01-02T03:04:05", "updated_at": "2026-01-02T03:04:05",
+    }
+
+
+def test_models_with_nested_orm_objects_use_model_dump():
+    network = EntityNetworkResponse(entity=_entity(), links=[{"entity_id": "dev_1"}])
+
+    data = orjson.loads(decode_payload(encode(network, compress_min_bytes=0)))
+
+    assert data["entity"]["metadata"] == {"segment": "retail"}
+    assert data["links"] == [{"entity_id": "dev_1"}]
+
+
+def test_large_values_are_compressed_and_round_trip():
+    value = {"rows": [{"status": CaseStatus.OPEN, "n": i} for i in range(500)]}
+
+    stored = encode(value, compress_min_bytes=1024)
+
+    assert stored[:1] == FORMAT_ZLIB
+    assert orjson.loads(decode_payload(stored))["rows"][499] == {"status": "open", "n": 499}
+
+
+def test_unknown_format_is_not_decoded():
+    assert decode_payload(b'"<app.models.Entity object at 0x7f>"') is None